@@ -0,0 +1,51 @@
+"""create delivery daily rollup
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '017'
+down_revision = '016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('delivery_daily_rollup',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('planter_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('load_location', sa.String(), nullable=False),
+        sa.Column('unload_location', sa.String(), nullable=False),
+        sa.Column('quality', sa.String(), nullable=False),
+        sa.Column('loaded_kg', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('unloaded_kg', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('delivery_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['planter_id'], ['planters.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('day', 'planter_id', 'load_location', 'unload_location', 'quality', name='uq_delivery_daily_rollup_key')
+    )
+    op.create_index('ix_delivery_daily_rollup_day', 'delivery_daily_rollup', ['day'])
+    op.create_index('ix_delivery_daily_rollup_planter_id', 'delivery_daily_rollup', ['planter_id'])
+    
+    # Backfill depuis les livraisons existantes
+    op.execute("""
+        INSERT INTO delivery_daily_rollup
+            (day, planter_id, load_location, unload_location, quality, loaded_kg, unloaded_kg, delivery_count)
+        SELECT date, planter_id, load_location, unload_location, quality,
+               SUM(quantity_loaded_kg), SUM(quantity_kg), COUNT(*)
+        FROM deliveries
+        GROUP BY date, planter_id, load_location, unload_location, quality
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_delivery_daily_rollup_planter_id', table_name='delivery_daily_rollup')
+    op.drop_index('ix_delivery_daily_rollup_day', table_name='delivery_daily_rollup')
+    op.drop_table('delivery_daily_rollup')
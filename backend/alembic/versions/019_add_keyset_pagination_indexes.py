@@ -0,0 +1,28 @@
+"""add keyset pagination indexes
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '019'
+down_revision = '018'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_deliveries_date_id', 'deliveries', ['date', 'id'])
+    op.create_index('ix_deliveries_quantity_kg_id', 'deliveries', ['quantity_kg', 'id'])
+    op.create_index('ix_collectes_date_collecte_id', 'collectes', ['date_collecte', 'id'])
+    op.create_index('ix_audit_logs_created_at_id', 'audit_logs', ['created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_audit_logs_created_at_id', table_name='audit_logs')
+    op.drop_index('ix_collectes_date_collecte_id', table_name='collectes')
+    op.drop_index('ix_deliveries_quantity_kg_id', table_name='deliveries')
+    op.drop_index('ix_deliveries_date_id', table_name='deliveries')
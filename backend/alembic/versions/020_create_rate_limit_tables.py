@@ -0,0 +1,36 @@
+"""create rate limit tables
+
+Revision ID: 020
+Revises: 019
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '020'
+down_revision = '019'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rate_limit_counters',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('window_start', sa.BigInteger(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('key', 'window_start')
+    )
+    op.create_table('rate_limit_blocks',
+        sa.Column('client_key', sa.String(length=32), nullable=False),
+        sa.Column('blocked_until', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('client_key')
+    )
+    op.create_index('ix_rate_limit_blocks_blocked_until', 'rate_limit_blocks', ['blocked_until'])
+
+
+def downgrade():
+    op.drop_index('ix_rate_limit_blocks_blocked_until', table_name='rate_limit_blocks')
+    op.drop_table('rate_limit_blocks')
+    op.drop_table('rate_limit_counters')
@@ -0,0 +1,59 @@
+"""create message read watermarks
+
+Revision ID: 021
+Revises: 020
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '021'
+down_revision = '020'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('message_read_watermarks',
+        sa.Column('id', postgresql.UUID(as_uuid=True), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('channel_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('conversation_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('last_read_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.CheckConstraint('(channel_id IS NULL) <> (conversation_id IS NULL)', name='ck_message_read_watermarks_target'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['channel_id'], ['channels.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['conversation_id'], ['direct_conversations.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_message_read_watermarks_user_channel', 'message_read_watermarks',
+                    ['user_id', 'channel_id'], unique=True,
+                    postgresql_where=sa.text('channel_id IS NOT NULL'))
+    op.create_index('uq_message_read_watermarks_user_conversation', 'message_read_watermarks',
+                    ['user_id', 'conversation_id'], unique=True,
+                    postgresql_where=sa.text('conversation_id IS NOT NULL'))
+    op.create_index('ix_messages_channel_id_created_at', 'messages', ['channel_id', 'created_at'])
+    op.create_index('ix_messages_conversation_id_created_at', 'messages', ['conversation_id', 'created_at'])
+
+    # Filigrane initial : dernier message lu (par date) de chaque utilisateur
+    # dans chaque canal/conversation, d'après message_reads
+    op.execute("""
+        INSERT INTO message_read_watermarks (user_id, channel_id, conversation_id, last_read_at)
+        SELECT r.user_id, m.channel_id, m.conversation_id, MAX(m.created_at)
+        FROM message_reads r
+        JOIN messages m ON m.id = r.message_id
+        WHERE (m.channel_id IS NULL) <> (m.conversation_id IS NULL)
+        GROUP BY r.user_id, m.channel_id, m.conversation_id
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_messages_conversation_id_created_at', table_name='messages')
+    op.drop_index('ix_messages_channel_id_created_at', table_name='messages')
+    op.drop_index('uq_message_read_watermarks_user_conversation', table_name='message_read_watermarks')
+    op.drop_index('uq_message_read_watermarks_user_channel', table_name='message_read_watermarks')
+    op.drop_table('message_read_watermarks')
@@ -0,0 +1,44 @@
+"""add message full-text search indexes
+
+Revision ID: 022
+Revises: 021
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '022'
+down_revision = '021'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Configuration française insensible aux accents
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'french_unaccent') THEN
+                CREATE TEXT SEARCH CONFIGURATION french_unaccent (COPY = french);
+                ALTER TEXT SEARCH CONFIGURATION french_unaccent
+                    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+            END IF;
+        END $$;
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_messages_content_fts
+        ON messages USING gin (to_tsvector('french_unaccent'::regconfig, content))
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_messages_content_trgm
+        ON messages USING gin (content gin_trgm_ops)
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_messages_content_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_messages_content_fts")
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS french_unaccent")
@@ -0,0 +1,45 @@
+"""add trigram search indexes on names
+
+Revision ID: 023
+Revises: 022
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '023'
+down_revision = '022'
+branch_labels = None
+depends_on = None
+
+# (index, table, colonne) recherchés par search_service
+TRIGRAM_INDEXES = [
+    ("ix_planters_name_trgm", "planters", "name"),
+    ("ix_planters_cooperative_trgm", "planters", "cooperative"),
+    ("ix_chef_planteurs_name_trgm", "chef_planteurs", "name"),
+    ("ix_chef_planteurs_cooperative_trgm", "chef_planteurs", "cooperative"),
+    ("ix_users_email_trgm", "users", "email"),
+]
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # unaccent() n'est que STABLE : enveloppe IMMUTABLE utilisable dans un index
+    op.execute("""
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """)
+    for name, table, column in TRIGRAM_INDEXES:
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} "
+            f"USING gin (lower(f_unaccent({column})) gin_trgm_ops)"
+        )
+
+
+def downgrade():
+    for name, _, _ in TRIGRAM_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
@@ -0,0 +1,32 @@
+"""create chain checkpoints
+
+Revision ID: 024
+Revises: 023
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '024'
+down_revision = '023'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('chain_checkpoints',
+        sa.Column('chain', sa.String(length=50), nullable=False),
+        sa.Column('block_number', sa.Integer(), nullable=False),
+        sa.Column('block_hash', sa.String(length=64), nullable=False),
+        sa.Column('verified_at', sa.DateTime(), nullable=False),
+        sa.Column('last_full_audit_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('chain')
+    )
+    op.create_index(op.f('ix_traceability_records_block_number'), 'traceability_records', ['block_number'])
+
+
+def downgrade():
+    op.drop_index(op.f('ix_traceability_records_block_number'), table_name='traceability_records')
+    op.drop_table('chain_checkpoints')
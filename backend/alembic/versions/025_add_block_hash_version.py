@@ -0,0 +1,26 @@
+"""add block hash version
+
+Revision ID: 025
+Revises: 024
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '025'
+down_revision = '024'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Blocs existants : version 1 (hash non reproductible), à resceller avec reseal_chain.py
+    op.add_column('traceability_records', sa.Column('hash_version', sa.SmallInteger(), server_default='1', nullable=False))
+    op.add_column('traceability_records', sa.Column('legacy_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    op.drop_column('traceability_records', 'legacy_hash')
+    op.drop_column('traceability_records', 'hash_version')
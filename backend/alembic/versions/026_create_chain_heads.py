@@ -0,0 +1,35 @@
+"""create chain heads
+
+Revision ID: 026
+Revises: 025
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '026'
+down_revision = '025'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('chain_heads',
+        sa.Column('chain', sa.String(length=50), nullable=False),
+        sa.Column('block_number', sa.Integer(), nullable=False),
+        sa.Column('block_hash', sa.String(length=64), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('chain')
+    )
+    # Tête initialisée depuis le dernier bloc existant
+    op.execute("""
+        INSERT INTO chain_heads (chain, block_number, block_hash, updated_at)
+        SELECT 'traceability', block_number, blockchain_hash, now()
+        FROM traceability_records ORDER BY block_number DESC LIMIT 1
+    """)
+
+
+def downgrade():
+    op.drop_table('chain_heads')
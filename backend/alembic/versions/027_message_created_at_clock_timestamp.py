@@ -0,0 +1,24 @@
+"""message created_at defaults to clock_timestamp
+
+Revision ID: 027
+Revises: 026
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '027'
+down_revision = '026'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Heure de l'insertion plutôt que du début de la transaction (filigranes de lecture)
+    op.alter_column('messages', 'created_at', server_default=sa.text('clock_timestamp()'))
+
+
+def downgrade():
+    op.alter_column('messages', 'created_at', server_default=sa.text('now()'))
@@ -17,6 +17,34 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     CORS_ORIGINS: str = "http://localhost:3000,http://127.0.0.1:3000"
+    # Exports en arrière-plan
+    EXPORT_DIR: str = "uploads/exports"
+    EXPORT_WORKERS: int = 2
+    # Rétention des exports : fichiers et tâches supprimés au-delà de cet âge ou de ce nombre
+    EXPORT_RETENTION_HOURS: int = 24
+    EXPORT_MAX_FILES: int = 50
+    # Processus de l'audit complet de la blockchain (0 = nombre de CPU)
+    CHAIN_AUDIT_WORKERS: int = 0
+    # Images de QR code rendues à la demande : cache disque et mémoire (octets)
+    QR_CACHE_DIR: str = "uploads/qr"
+    QR_MEMORY_CACHE_BYTES: int = 32 * 1024 * 1024
+    QR_DISK_CACHE_BYTES: int = 512 * 1024 * 1024
+    QR_CACHE_PRUNE_INTERVAL: float = 300.0
+    # Seuil de requêtes SQL par requête HTTP au-delà duquel on journalise un avertissement
+    QUERY_COUNT_WARN_THRESHOLD: int = 50
+    # En-tête X-Query-Count sur chaque réponse (diagnostic, à ne pas activer en production)
+    QUERY_COUNT_HEADER: bool = False
+    # Stockage du rate limiting : "memory" (par processus) ou "postgres" (partagé entre workers)
+    RATE_LIMIT_BACKEND: str = "memory"
+    # Journal d'audit écrit par lots en arrière-plan
+    AUDIT_QUEUE_MAXSIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL: float = 1.0
+    # Bus temps réel SSE/WebSocket : "memory" (un seul worker) ou "postgres" (LISTEN/NOTIFY entre workers)
+    REALTIME_BUS_BACKEND: str = "memory"
+    # Cache d'authentification (utilisateur + session par jeton) et écriture groupée de last_activity
+    AUTH_CACHE_TTL: float = 30.0
+    SESSION_ACTIVITY_FLUSH_INTERVAL: float = 30.0
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
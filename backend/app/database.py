@@ -2,6 +2,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .utils import query_counter
 import logging
 import os
 
@@ -23,6 +24,9 @@ engine = create_engine(
     connect_args={"client_encoding": "utf8", "connect_timeout": 30}
 )
 
+# Comptage des requêtes SQL par requête HTTP (voir RequestLoggingMiddleware)
+query_counter.install(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -4,7 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from .config import settings
-from .routers import auth, users, planters, deliveries, analytics, exports, chef_planteurs, collectes, notifications, sse, cooperatives, payments, traceability, push_notifications, warehouses, documents, audit, sessions, messaging, websocket, invoices
+from .routers import auth, users, planters, deliveries, analytics, exports, chef_planteurs, collectes, notifications, sse, cooperatives, payments, traceability, push_notifications, warehouses, documents, audit, sessions, messaging, websocket, invoices, search
 
 import logging
 import os
@@ -41,10 +41,32 @@ async def startup_event():
         logger.info("Startup migrations completed")
     except Exception as e:
         logger.error(f"Error running migrations: {e}")
+    
+    # Écriture du journal d'audit en arrière-plan
+    from .services.audit_writer import audit_writer
+    await audit_writer.start()
+    
+    # Bus temps réel SSE/WebSocket (LISTEN PostgreSQL si configuré)
+    from .services.event_bus import event_bus
+    await event_bus.start()
+    
+    # Cache d'authentification : écriture groupée de last_activity
+    from .services.auth_cache import auth_cache
+    await auth_cache.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Application shutting down...")
+    from .services.audit_writer import audit_writer
+    await audit_writer.stop()
+    from .services.auth_cache import auth_cache
+    await auth_cache.stop()
+    from .services.event_bus import event_bus
+    await event_bus.stop()
+    from .services import export_job_service
+    export_job_service.shutdown()
+    from .services import traceability_service
+    traceability_service.shutdown()
 
 # Middleware de gestion des erreurs (doit être en premier)
 from .middleware.error_handler import ErrorHandlerMiddleware, RequestLoggingMiddleware
@@ -94,6 +116,7 @@ app.include_router(documents.router, prefix="/api/v1")
 app.include_router(audit.router, prefix="/api/v1")
 app.include_router(sessions.router, prefix="/api/v1")
 app.include_router(messaging.router, prefix="/api/v1")
+app.include_router(search.router, prefix="/api/v1")
 from .routers import messaging_features
 app.include_router(messaging_features.router, prefix="/api/v1")
 app.include_router(websocket.router)
@@ -4,9 +4,7 @@ Middleware pour l'audit automatique des requêtes - Version améliorée
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
-from sqlalchemy.orm import Session
-from ..services.audit_service import AuditService
-from ..database import SessionLocal
+from ..services.audit_writer import audit_writer, audit_event
 import json
 import logging
 import time
@@ -85,15 +83,18 @@ class AuditMiddleware(BaseHTTPMiddleware):
         # Calculer le temps de réponse
         response_time = time.time() - start_time
         
-        # Enregistrer l'audit (succès et échecs importants)
+        # Enregistrer l'audit (succès et échecs importants) : mis en file,
+        # écrit par lots en arrière-plan
         try:
-            self._log_audit_enhanced(
+            event = self._log_audit_enhanced(
                 request=request,
                 response=response,
                 body=body,
                 response_time=response_time,
                 body_size=len(body_bytes)
             )
+            if event:
+                await audit_writer.enqueue(event)
         except Exception as e:
             logger.error(f"Error logging audit: {e}")
         
@@ -120,9 +121,8 @@ class AuditMiddleware(BaseHTTPMiddleware):
         body: dict = None,
         response_time: float = 0,
         body_size: int = 0
-    ):
-        """Enregistrer l'action dans le journal d'audit avec détails enrichis"""
-        db = SessionLocal()
+    ) -> Optional[dict]:
+        """Préparer l'événement d'audit avec détails enrichis"""
         try:
             # Déterminer l'action
             action = self._get_action(request.method)
@@ -160,9 +160,8 @@ class AuditMiddleware(BaseHTTPMiddleware):
                     "timestamp": datetime.utcnow().isoformat()
                 }
             
-            # Enregistrer dans le journal d'audit
-            AuditService.log_action(
-                db=db,
+            # Événement pour le journal d'audit
+            event = audit_event(
                 action=action,
                 entity_type=entity_type,
                 entity_id=entity_id,
@@ -184,10 +183,11 @@ class AuditMiddleware(BaseHTTPMiddleware):
                 severity=severity
             )
             
+            return event
+            
         except Exception as e:
             logger.error(f"Error in audit logging: {e}")
-        finally:
-            db.close()
+            return None
     
     def _get_client_ip(self, request: Request) -> str:
         """Récupérer l'IP du client avec support proxy"""
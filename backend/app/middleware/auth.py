@@ -8,6 +8,7 @@ from ..database import get_db
 from ..models import User
 from ..models.session import Session as SessionModel
 from ..utils.security import decode_token
+from ..services.auth_cache import auth_cache, token_key
 
 security = HTTPBearer()
 
@@ -27,44 +28,51 @@ def get_current_user(
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    key = token_key(token)
+    entry = auth_cache.get(key)
+    if entry is None or str(entry.user.id) != str(user_id):
+        generation = auth_cache.generation()
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        
+        # Vérifier si la session est toujours active (optionnel - ne bloque pas si pas trouvée)
+        session = None
+        try:
+            token_prefix = token[:50]
+            # Chercher une session active pour cet utilisateur avec ce token
+            session = db.query(SessionModel).filter(
+                SessionModel.user_id == str(user_id),
+                SessionModel.session_token == token_prefix,
+                SessionModel.is_active == True
+            ).first()
+        except Exception as e:
+            # En cas d'erreur de vérification de session, on laisse passer
+            print(f"Session check error: {e}")
+        entry = auth_cache.put(key, user, session, generation)
+    else:
+        # Entrée en cache : rattacher la copie à la session de la requête, sans requête
+        user = db.merge(entry.user, load=False)
     
     # Stocker l'utilisateur dans le request state pour le middleware d'audit
     if request:
         request.state.user = user
     
-    # Vérifier si la session est toujours active (optionnel - ne bloque pas si pas trouvée)
-    try:
-        token_prefix = token[:50]
-        # Chercher une session active pour cet utilisateur avec ce token
-        session = db.query(SessionModel).filter(
-            SessionModel.user_id == str(user_id),
-            SessionModel.session_token == token_prefix,
-            SessionModel.is_active == True
-        ).first()
-        
-        if session:
-            # Vérifier si la session est expirée
-            if session.expires_at < datetime.utcnow():
-                # Marquer comme inactive
-                session.is_active = False
-                db.commit()
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED, 
-                    detail="Session has expired. Please login again."
-                )
-            
-            # Mettre à jour la dernière activité
-            session.last_activity = datetime.utcnow()
+    if entry.session_id is not None:
+        # Vérifier si la session est expirée
+        if entry.session_expires_at < datetime.utcnow():
+            # Marquer comme inactive
+            db.query(SessionModel).filter(SessionModel.id == entry.session_id).update({"is_active": False})
             db.commit()
-        # Si pas de session trouvée, on laisse passer (pour compatibilité avec anciennes sessions)
-    except HTTPException:
-        raise
-    except Exception as e:
-        # En cas d'erreur de vérification de session, on laisse passer
-        print(f"Session check error: {e}")
+            auth_cache.invalidate_sessions([entry.session_id])
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, 
+                detail="Session has expired. Please login again."
+            )
+        
+        # Mettre à jour la dernière activité (écrite par lots)
+        auth_cache.touch(entry.session_id)
+    # Si pas de session trouvée, on laisse passer (pour compatibilité avec anciennes sessions)
     
     return user
 
@@ -10,6 +10,8 @@ import time
 import json
 from typing import Callable
 from datetime import datetime
+from ..config import settings
+from ..utils.query_counter import track_queries
 
 # Configuration du logger pour Azure
 logger = logging.getLogger(__name__)
@@ -194,7 +196,8 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             f"  User-Agent: {request.headers.get('user-agent', 'unknown')}"
         )
         
-        response = await call_next(request)
+        with track_queries() as queries:
+            response = await call_next(request)
         
         process_time = time.time() - start_time
         
@@ -202,11 +205,18 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         logger.debug(
             f"[{request_id}] Réponse:\n"
             f"  Status: {response.status_code}\n"
-            f"  Temps: {process_time:.3f}s"
+            f"  Temps: {process_time:.3f}s\n"
+            f"  Requêtes SQL: {queries.count}"
         )
+        if queries.count > settings.QUERY_COUNT_WARN_THRESHOLD:
+            logger.warning(
+                f"[{request_id}] {queries.count} requêtes SQL pour {request.method} {request.url.path}"
+            )
         
         # Ajouter le temps de traitement dans les headers
         response.headers["X-Process-Time"] = f"{process_time:.3f}"
         response.headers["X-Request-ID"] = str(request_id)
+        if settings.QUERY_COUNT_HEADER:
+            response.headers["X-Query-Count"] = str(queries.count)
         
         return response
@@ -0,0 +1,239 @@
+"""
+Backends de stockage du rate limiter
+
+Chaque backend implémente `hit(client_key, endpoint_type, config)` :
+enregistre une requête et décide si elle est autorisée. Seules les
+requêtes autorisées sont comptées dans la fenêtre (les refus et les
+requêtes d'un client bloqué ne pèsent pas sur la fenêtre suivante).
+
+Algorithme commun : fenêtre glissante approchée par deux compteurs
+(fenêtre fixe courante + précédente pondérée par le temps restant),
+soit O(1) en temps et en mémoire par couple (client, type d'endpoint).
+Un client qui dépasse une limite est bloqué `block_duration` secondes
+sur tous les types d'endpoints (comportement historique).
+
+- InMemoryBackend : local au processus, sans verrou (aucun await pendant
+  la mise à jour, donc atomique dans la boucle asyncio).
+- PostgresBackend : compteurs partagés dans PostgreSQL, les limites
+  tiennent entre workers gunicorn et réplicas.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Tuple
+import asyncio
+import logging
+import math
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int = 0
+    reset: int = 0
+    retry_after: int = 0
+    blocked: bool = False
+    count: int = 0
+
+
+def _evaluate(config: dict, now: float, current: int, previous: int) -> Tuple[float, int, int]:
+    """Retourne (estimation fenêtre glissante, début de fenêtre, reset)"""
+    window = config["window"]
+    window_start = int(now // window) * window
+    elapsed = (now - window_start) / window
+    estimated = previous * (1 - elapsed) + current
+    return estimated, window_start, window_start + window
+
+
+class RateLimitBackend(ABC):
+    """Interface des backends"""
+
+    @abstractmethod
+    async def hit(self, client_key: str, endpoint_type: str, config: dict) -> RateLimitResult:
+        """Enregistrer une requête et décider si elle est autorisée"""
+
+    async def cleanup(self) -> None:
+        """Purge des données expirées (optionnel)"""
+
+
+class InMemoryBackend(RateLimitBackend):
+    # Purge amortie : un balayage complet toutes les N requêtes
+    CLEANUP_EVERY = 10000
+    # Âge (s) au-delà duquel un compteur n'influence plus aucune fenêtre
+    STALE_AFTER = 600
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        # {(client, type): [début de fenêtre, compteur courant, compteur précédent]}
+        self.counters: Dict[Tuple[str, str], list] = {}
+        # {client: timestamp de fin de blocage}
+        self.blocked: Dict[str, float] = {}
+        self._hits = 0
+
+    def hit_sync(self, client_key: str, endpoint_type: str, config: dict) -> RateLimitResult:
+        now = self.clock()
+        limit = config["requests"]
+
+        self._hits += 1
+        if self._hits % self.CLEANUP_EVERY == 0:
+            self._sweep(now)
+
+        block_until = self.blocked.get(client_key)
+        if block_until is not None:
+            if now < block_until:
+                return RateLimitResult(
+                    allowed=False, limit=limit, blocked=True,
+                    retry_after=max(1, math.ceil(block_until - now))
+                )
+            del self.blocked[client_key]
+
+        window = config["window"]
+        window_start = int(now // window) * window
+        entry = self.counters.get((client_key, endpoint_type))
+        if entry is None:
+            entry = [window_start, 0, 0]
+            self.counters[(client_key, endpoint_type)] = entry
+        elif entry[0] != window_start:
+            # Fenêtre suivante : la courante devient la précédente (0 si trou > 1 fenêtre)
+            entry[2] = entry[1] if window_start - entry[0] == window else 0
+            entry[1] = 0
+            entry[0] = window_start
+
+        estimated, _, reset = _evaluate(config, now, entry[1], entry[2])
+        if estimated >= limit:
+            self.blocked[client_key] = now + config["block_duration"]
+            return RateLimitResult(
+                allowed=False, limit=limit, reset=reset,
+                retry_after=config["block_duration"], count=int(estimated)
+            )
+
+        entry[1] += 1
+        return RateLimitResult(
+            allowed=True, limit=limit, reset=reset,
+            remaining=max(0, int(limit - estimated - 1)), count=int(estimated) + 1
+        )
+
+    async def hit(self, client_key: str, endpoint_type: str, config: dict) -> RateLimitResult:
+        return self.hit_sync(client_key, endpoint_type, config)
+
+    def _sweep(self, now: float) -> None:
+        for client_key in [k for k, until in self.blocked.items() if until <= now]:
+            del self.blocked[client_key]
+        stale = [
+            key for key, entry in self.counters.items()
+            if now - entry[0] > self.STALE_AFTER
+        ]
+        for key in stale:
+            del self.counters[key]
+
+    async def cleanup(self) -> None:
+        self._sweep(self.clock())
+
+
+class PostgresBackend(RateLimitBackend):
+    """
+    Compteurs partagés dans les tables rate_limit_counters / rate_limit_blocks.
+    Deux allers-retours par requête, exécutés hors de la boucle d'événements.
+    """
+    # Probabilité de purger les compteurs expirés à chaque requête
+    CLEANUP_PROBABILITY = 0.001
+
+    def __init__(self, engine=None, clock=time.time):
+        if engine is None:
+            from ..database import engine as default_engine
+            engine = default_engine
+        self.engine = engine
+        self.clock = clock
+
+    def hit_sync(self, client_key: str, endpoint_type: str, config: dict) -> RateLimitResult:
+        from sqlalchemy import select
+        from sqlalchemy.dialects.postgresql import insert
+        from ..models.rate_limit import RateLimitCounter, RateLimitBlock
+
+        now = self.clock()
+        limit = config["requests"]
+        window = config["window"]
+        window_start = int(now // window) * window
+        key = f"{client_key}:{endpoint_type}"
+
+        with self.engine.begin() as conn:
+            # Blocage éventuel et compteur de la fenêtre précédente en un aller-retour
+            block_until, previous = conn.execute(select(
+                select(RateLimitBlock.blocked_until).where(
+                    RateLimitBlock.client_key == client_key,
+                    RateLimitBlock.blocked_until > now
+                ).scalar_subquery(),
+                select(RateLimitCounter.count).where(
+                    RateLimitCounter.key == key,
+                    RateLimitCounter.window_start == window_start - window
+                ).scalar_subquery()
+            )).one()
+            if block_until is not None:
+                return RateLimitResult(
+                    allowed=False, limit=limit, blocked=True,
+                    retry_after=max(1, math.ceil(block_until - now))
+                )
+
+            stmt = insert(RateLimitCounter).values(key=key, window_start=window_start, count=1)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["key", "window_start"],
+                set_={"count": RateLimitCounter.count + 1}
+            ).returning(RateLimitCounter.count)
+            current = conn.execute(stmt).scalar()
+            previous = previous or 0
+
+            # `current` inclut la requête en cours
+            estimated, _, reset = _evaluate(config, now, current - 1, previous)
+            if estimated >= limit:
+                # Requête refusée : retirée du compteur, comme le backend mémoire
+                conn.execute(RateLimitCounter.__table__.update().where(
+                    RateLimitCounter.key == key,
+                    RateLimitCounter.window_start == window_start
+                ).values(count=RateLimitCounter.count - 1))
+                block = insert(RateLimitBlock).values(
+                    client_key=client_key, blocked_until=now + config["block_duration"]
+                )
+                conn.execute(block.on_conflict_do_update(
+                    index_elements=["client_key"],
+                    set_={"blocked_until": block.excluded.blocked_until}
+                ))
+                return RateLimitResult(
+                    allowed=False, limit=limit, reset=reset,
+                    retry_after=config["block_duration"], count=int(estimated)
+                )
+
+            if random.random() < self.CLEANUP_PROBABILITY:
+                self._purge(conn, now)
+
+        return RateLimitResult(
+            allowed=True, limit=limit, reset=reset,
+            remaining=max(0, int(limit - estimated - 1)), count=int(estimated) + 1
+        )
+
+    async def hit(self, client_key: str, endpoint_type: str, config: dict) -> RateLimitResult:
+        return await asyncio.to_thread(self.hit_sync, client_key, endpoint_type, config)
+
+    def _purge(self, conn, now: float) -> None:
+        from ..models.rate_limit import RateLimitCounter, RateLimitBlock
+        conn.execute(RateLimitCounter.__table__.delete().where(
+            RateLimitCounter.window_start < now - InMemoryBackend.STALE_AFTER
+        ))
+        conn.execute(RateLimitBlock.__table__.delete().where(RateLimitBlock.blocked_until < now))
+
+    async def cleanup(self) -> None:
+        def _run():
+            with self.engine.begin() as conn:
+                self._purge(conn, self.clock())
+        await asyncio.to_thread(_run)
+
+
+def create_backend(name: str) -> RateLimitBackend:
+    if name == "postgres":
+        return PostgresBackend()
+    if name != "memory":
+        logger.warning(f"Backend de rate limiting inconnu '{name}', utilisation de la mémoire")
+    return InMemoryBackend()
@@ -4,11 +4,11 @@ Rate Limiter Middleware - Protection contre les abus
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
-from collections import defaultdict
-from datetime import datetime, timedelta
-import asyncio
+from typing import Optional
 import hashlib
 import logging
+from ..config import settings
+from .rate_limit_backends import RateLimitBackend, create_backend
 
 logger = logging.getLogger(__name__)
 
@@ -27,16 +27,12 @@ class RateLimitExceeded(HTTPException):
 
 class RateLimiter:
     """
-    Rate limiter en mémoire avec différentes limites par endpoint
+    Rate limiter avec différentes limites par type d'endpoint.
+    Le stockage est délégué à un backend (voir rate_limit_backends).
     """
     
-    def __init__(self):
-        # Stockage des requêtes: {client_key: [(timestamp, endpoint), ...]}
-        self.requests = defaultdict(list)
-        # Stockage des blocages temporaires
-        self.blocked = {}
-        # Lock pour thread safety
-        self.lock = asyncio.Lock()
+    def __init__(self, backend: Optional[RateLimitBackend] = None):
+        self.backend = backend or create_backend(settings.RATE_LIMIT_BACKEND)
         
         # Configuration des limites par type d'endpoint
         self.limits = {
@@ -102,87 +98,47 @@ class RateLimiter:
         endpoint_type = self._get_endpoint_type(request.url.path, request.method)
         limit_config = self.limits.get(endpoint_type, self.limits["default"])
         
-        now = datetime.now()
-        
-        async with self.lock:
-            # Vérifier si le client est bloqué
-            if client_key in self.blocked:
-                block_until = self.blocked[client_key]
-                if now < block_until:
-                    retry_after = int((block_until - now).total_seconds())
-                    return False, {
-                        "blocked": True,
-                        "retry_after": retry_after,
-                        "reason": "temporarily_blocked"
-                    }
-                else:
-                    del self.blocked[client_key]
-            
-            # Nettoyer les anciennes requêtes
-            window_start = now - timedelta(seconds=limit_config["window"])
-            self.requests[client_key] = [
-                (ts, ep) for ts, ep in self.requests[client_key]
-                if ts > window_start
-            ]
-            
-            # Compter les requêtes pour ce type d'endpoint
-            endpoint_requests = [
-                (ts, ep) for ts, ep in self.requests[client_key]
-                if self._get_endpoint_type(ep, request.method) == endpoint_type
-            ]
-            
-            current_count = len(endpoint_requests)
-            
-            if current_count >= limit_config["requests"]:
-                # Bloquer le client
-                self.blocked[client_key] = now + timedelta(seconds=limit_config["block_duration"])
-                
-                logger.warning(
-                    f"Rate limit exceeded for {client_key} on {endpoint_type}",
-                    extra={
-                        "client_key": client_key,
-                        "endpoint_type": endpoint_type,
-                        "request_count": current_count,
-                        "path": request.url.path
-                    }
-                )
-                
-                return False, {
-                    "blocked": False,
-                    "retry_after": limit_config["block_duration"],
-                    "reason": "rate_limit_exceeded",
-                    "limit": limit_config["requests"],
-                    "window": limit_config["window"]
+        try:
+            result = await self.backend.hit(client_key, endpoint_type, limit_config)
+        except Exception as e:
+            # Backend partagé indisponible : on laisse passer plutôt que de bloquer l'API
+            logger.error(f"Rate limit backend error: {e}")
+            return True, {"remaining": limit_config["requests"], "limit": limit_config["requests"], "reset": 0}
+        
+        if result.blocked:
+            return False, {
+                "blocked": True,
+                "retry_after": result.retry_after,
+                "reason": "temporarily_blocked"
+            }
+        
+        if not result.allowed:
+            logger.warning(
+                f"Rate limit exceeded for {client_key} on {endpoint_type}",
+                extra={
+                    "client_key": client_key,
+                    "endpoint_type": endpoint_type,
+                    "request_count": result.count,
+                    "path": request.url.path
                 }
-            
-            # Enregistrer la requête
-            self.requests[client_key].append((now, request.url.path))
-            
-            return True, {
-                "remaining": limit_config["requests"] - current_count - 1,
-                "limit": limit_config["requests"],
-                "reset": int((window_start + timedelta(seconds=limit_config["window"])).timestamp())
+            )
+            return False, {
+                "blocked": False,
+                "retry_after": result.retry_after,
+                "reason": "rate_limit_exceeded",
+                "limit": result.limit,
+                "window": limit_config["window"]
             }
+        
+        return True, {
+            "remaining": result.remaining,
+            "limit": result.limit,
+            "reset": result.reset
+        }
     
     async def cleanup(self):
         """Nettoie les données expirées"""
-        async with self.lock:
-            now = datetime.now()
-            
-            # Nettoyer les blocages expirés
-            expired_blocks = [k for k, v in self.blocked.items() if v < now]
-            for k in expired_blocks:
-                del self.blocked[k]
-            
-            # Nettoyer les requêtes anciennes (> 5 minutes)
-            cutoff = now - timedelta(minutes=5)
-            for client_key in list(self.requests.keys()):
-                self.requests[client_key] = [
-                    (ts, ep) for ts, ep in self.requests[client_key]
-                    if ts > cutoff
-                ]
-                if not self.requests[client_key]:
-                    del self.requests[client_key]
+        await self.backend.cleanup()
 
 
 # Instance globale
@@ -181,6 +181,159 @@ def run_startup_migrations(engine):
             END IF;
         END $$;
         """,
+        # ========== AGRÉGAT JOURNALIER DES LIVRAISONS ==========
+        """
+        CREATE TABLE IF NOT EXISTS delivery_daily_rollup (
+            id BIGSERIAL PRIMARY KEY,
+            day DATE NOT NULL,
+            planter_id UUID NOT NULL REFERENCES planters(id) ON DELETE CASCADE,
+            load_location VARCHAR NOT NULL,
+            unload_location VARCHAR NOT NULL,
+            quality VARCHAR NOT NULL,
+            loaded_kg NUMERIC(14, 2) DEFAULT 0 NOT NULL,
+            unloaded_kg NUMERIC(14, 2) DEFAULT 0 NOT NULL,
+            delivery_count INTEGER DEFAULT 0 NOT NULL,
+            CONSTRAINT uq_delivery_daily_rollup_key UNIQUE (day, planter_id, load_location, unload_location, quality)
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_delivery_daily_rollup_day ON delivery_daily_rollup(day);",
+        "CREATE INDEX IF NOT EXISTS ix_delivery_daily_rollup_planter_id ON delivery_daily_rollup(planter_id);",
+        # Backfill uniquement si l'agrégat est vide
+        """
+        INSERT INTO delivery_daily_rollup
+            (day, planter_id, load_location, unload_location, quality, loaded_kg, unloaded_kg, delivery_count)
+        SELECT date, planter_id, load_location, unload_location, quality,
+               SUM(quantity_loaded_kg), SUM(quantity_kg), COUNT(*)
+        FROM deliveries
+        WHERE NOT EXISTS (SELECT 1 FROM delivery_daily_rollup)
+        GROUP BY date, planter_id, load_location, unload_location, quality;
+        """,
+        # ========== EXPORTS EN ARRIÈRE-PLAN ==========
+        """
+        CREATE TABLE IF NOT EXISTS export_jobs (
+            id UUID PRIMARY KEY,
+            format VARCHAR(10) NOT NULL,
+            filters JSON,
+            cache_key VARCHAR(64) NOT NULL,
+            status VARCHAR(20) DEFAULT 'pending' NOT NULL,
+            file_path VARCHAR,
+            file_size BIGINT,
+            error TEXT,
+            created_by UUID REFERENCES users(id) ON DELETE SET NULL,
+            created_at TIMESTAMP DEFAULT NOW() NOT NULL,
+            started_at TIMESTAMP,
+            completed_at TIMESTAMP
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_export_jobs_cache_key ON export_jobs(cache_key);",
+        "CREATE INDEX IF NOT EXISTS ix_export_jobs_status ON export_jobs(status);",
+        # ========== PAGINATION PAR CLÉ ==========
+        "CREATE INDEX IF NOT EXISTS ix_deliveries_date_id ON deliveries(date, id);",
+        "CREATE INDEX IF NOT EXISTS ix_deliveries_quantity_kg_id ON deliveries(quantity_kg, id);",
+        "CREATE INDEX IF NOT EXISTS ix_collectes_date_collecte_id ON collectes(date_collecte, id);",
+        "CREATE INDEX IF NOT EXISTS ix_audit_logs_created_at_id ON audit_logs(created_at, id);",
+        # ========== RATE LIMITING PARTAGÉ ==========
+        """
+        CREATE TABLE IF NOT EXISTS rate_limit_counters (
+            key VARCHAR(64) NOT NULL,
+            window_start BIGINT NOT NULL,
+            count INTEGER DEFAULT 0 NOT NULL,
+            PRIMARY KEY (key, window_start)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS rate_limit_blocks (
+            client_key VARCHAR(32) PRIMARY KEY,
+            blocked_until DOUBLE PRECISION NOT NULL
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_rate_limit_blocks_blocked_until ON rate_limit_blocks(blocked_until);",
+        # ========== FILIGRANES DE LECTURE DE LA MESSAGERIE ==========
+        """
+        CREATE TABLE IF NOT EXISTS message_read_watermarks (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            channel_id UUID REFERENCES channels(id) ON DELETE CASCADE,
+            conversation_id UUID REFERENCES direct_conversations(id) ON DELETE CASCADE,
+            last_read_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            CONSTRAINT ck_message_read_watermarks_target CHECK ((channel_id IS NULL) <> (conversation_id IS NULL))
+        );
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_message_read_watermarks_user_channel
+        ON message_read_watermarks(user_id, channel_id) WHERE channel_id IS NOT NULL;
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_message_read_watermarks_user_conversation
+        ON message_read_watermarks(user_id, conversation_id) WHERE conversation_id IS NOT NULL;
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_messages_channel_id_created_at ON messages(channel_id, created_at);",
+        "CREATE INDEX IF NOT EXISTS ix_messages_conversation_id_created_at ON messages(conversation_id, created_at);",
+        # Backfill depuis message_reads (ne fait rien si des filigranes existent déjà)
+        """
+        INSERT INTO message_read_watermarks (user_id, channel_id, conversation_id, last_read_at)
+        SELECT r.user_id, m.channel_id, m.conversation_id, MAX(m.created_at)
+        FROM message_reads r
+        JOIN messages m ON m.id = r.message_id
+        WHERE (m.channel_id IS NULL) <> (m.conversation_id IS NULL)
+          AND NOT EXISTS (SELECT 1 FROM message_read_watermarks)
+        GROUP BY r.user_id, m.channel_id, m.conversation_id;
+        """,
+        # ========== RECHERCHE PLEIN TEXTE DES MESSAGES ==========
+        "CREATE EXTENSION IF NOT EXISTS unaccent;",
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'french_unaccent') THEN
+                CREATE TEXT SEARCH CONFIGURATION french_unaccent (COPY = french);
+                ALTER TEXT SEARCH CONFIGURATION french_unaccent
+                    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+            END IF;
+        END $$;
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS ix_messages_content_fts
+        ON messages USING gin (to_tsvector('french_unaccent'::regconfig, content));
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_messages_content_trgm ON messages USING gin (content gin_trgm_ops);",
+        # ========== RECHERCHE APPROCHÉE (TRIGRAMMES) ==========
+        """
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_planters_name_trgm ON planters USING gin (lower(f_unaccent(name)) gin_trgm_ops);",
+        "CREATE INDEX IF NOT EXISTS ix_planters_cooperative_trgm ON planters USING gin (lower(f_unaccent(cooperative)) gin_trgm_ops);",
+        "CREATE INDEX IF NOT EXISTS ix_chef_planteurs_name_trgm ON chef_planteurs USING gin (lower(f_unaccent(name)) gin_trgm_ops);",
+        "CREATE INDEX IF NOT EXISTS ix_chef_planteurs_cooperative_trgm ON chef_planteurs USING gin (lower(f_unaccent(cooperative)) gin_trgm_ops);",
+        "CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING gin (lower(f_unaccent(email)) gin_trgm_ops);",
+        # ========== POINTS DE CONTRÔLE DE LA BLOCKCHAIN ==========
+        """
+        CREATE TABLE IF NOT EXISTS chain_checkpoints (
+            chain VARCHAR(50) PRIMARY KEY,
+            block_number INTEGER NOT NULL,
+            block_hash VARCHAR(64) NOT NULL,
+            verified_at TIMESTAMP NOT NULL,
+            last_full_audit_at TIMESTAMP
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_traceability_records_block_number ON traceability_records(block_number);",
+        # ========== VERSION DU HASH DES BLOCS ==========
+        "ALTER TABLE traceability_records ADD COLUMN IF NOT EXISTS hash_version SMALLINT NOT NULL DEFAULT 1;",
+        "ALTER TABLE traceability_records ADD COLUMN IF NOT EXISTS legacy_hash VARCHAR(64);",
+        # ========== TÊTE DE CHAÎNE (SÉQUENCEMENT DES AJOUTS) ==========
+        """
+        CREATE TABLE IF NOT EXISTS chain_heads (
+            chain VARCHAR(50) PRIMARY KEY,
+            block_number INTEGER NOT NULL,
+            block_hash VARCHAR(64),
+            updated_at TIMESTAMP NOT NULL
+        );
+        """,
+        # ========== HORODATAGE DES MESSAGES À L'INSERTION ==========
+        "ALTER TABLE messages ALTER COLUMN created_at SET DEFAULT clock_timestamp();",
     ]
     
     with engine.connect() as conn:
@@ -1,23 +1,27 @@
 from .user import User
 from .planter import Planter
 from .delivery import Delivery
+from .delivery_rollup import DeliveryDailyRollup
 from .chef_planter import ChefPlanteur
 from .collecte import Collecte
 from .notification import Notification
 from .session import Session
 from .payment import Payment, PaymentMethod, PaymentStatus
 from .audit_log import AuditLog
-from .messaging import Channel, ChannelMember, DirectConversation, Message, MessageRead, PinnedMessage, UserStatus, MessageReaction, PushSubscription
+from .messaging import Channel, ChannelMember, DirectConversation, Message, MessageRead, MessageReadWatermark, PinnedMessage, UserStatus, MessageReaction, PushSubscription
 from .warehouse import Warehouse
 from .document import Document
 from .invoice import Invoice
-from .traceability import TraceabilityRecord
+from .traceability import TraceabilityRecord, ChainCheckpoint, ChainHead
 from .stock_movement import StockMovement
 from .role_change_log import RoleChangeLog
+from .export_job import ExportJob
+from .rate_limit import RateLimitCounter, RateLimitBlock
 
 __all__ = [
-    "User", "Planter", "Delivery", "ChefPlanteur", "Collecte", "Notification", "Session", 
+    "User", "Planter", "Delivery", "DeliveryDailyRollup", "ChefPlanteur", "Collecte", "Notification", "Session", 
     "Payment", "PaymentMethod", "PaymentStatus", "AuditLog",
-    "Channel", "ChannelMember", "DirectConversation", "Message", "MessageRead", "PinnedMessage", "UserStatus", "MessageReaction", "PushSubscription",
-    "Warehouse", "Document", "Invoice", "TraceabilityRecord", "StockMovement", "RoleChangeLog"
+    "Channel", "ChannelMember", "DirectConversation", "Message", "MessageRead", "MessageReadWatermark", "PinnedMessage", "UserStatus", "MessageReaction", "PushSubscription",
+    "Warehouse", "Document", "Invoice", "TraceabilityRecord", "ChainCheckpoint", "ChainHead", "StockMovement", "RoleChangeLog", "ExportJob",
+    "RateLimitCounter", "RateLimitBlock"
 ]
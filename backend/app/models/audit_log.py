@@ -1,7 +1,7 @@
 """
 Modèle pour les logs d'audit
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from ..database import Base
@@ -10,6 +10,10 @@ from ..database import Base
 class AuditLog(Base):
     """Modèle pour le journal d'audit"""
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Pagination par clé
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
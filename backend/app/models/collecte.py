@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Date, Numeric, ForeignKey, Text
+from sqlalchemy import Column, String, DateTime, Date, Numeric, ForeignKey, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -7,6 +7,10 @@ from ..database import Base
 
 class Collecte(Base):
     __tablename__ = "collectes"
+    __table_args__ = (
+        # Pagination par clé
+        Index("ix_collectes_date_collecte_id", "date_collecte", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     designation = Column(String, nullable=False)  # Description de l'opération
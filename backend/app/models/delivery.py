@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Date, Numeric, ForeignKey
+from sqlalchemy import Column, String, DateTime, Date, Numeric, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -7,6 +7,11 @@ from ..database import Base
 
 class Delivery(Base):
     __tablename__ = "deliveries"
+    __table_args__ = (
+        # Pagination par clé (tri date / quantité, id en départage)
+        Index("ix_deliveries_date_id", "date", "id"),
+        Index("ix_deliveries_quantity_kg_id", "quantity_kg", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     planter_id = Column(UUID(as_uuid=True), ForeignKey("planters.id", ondelete="CASCADE"), nullable=False, index=True)
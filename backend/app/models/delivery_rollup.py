@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, Date, Numeric, Integer, BigInteger, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from ..database import Base
+
+class DeliveryDailyRollup(Base):
+    """Agrégat journalier des livraisons (jour x planteur x lieux x qualité)"""
+    __tablename__ = "delivery_daily_rollup"
+    __table_args__ = (
+        UniqueConstraint("day", "planter_id", "load_location", "unload_location", "quality", name="uq_delivery_daily_rollup_key"),
+    )
+    
+    id = Column(BigInteger, primary_key=True)
+    day = Column(Date, nullable=False, index=True)
+    planter_id = Column(UUID(as_uuid=True), ForeignKey("planters.id", ondelete="CASCADE"), nullable=False, index=True)
+    load_location = Column(String, nullable=False)
+    unload_location = Column(String, nullable=False)
+    quality = Column(String, nullable=False)
+    loaded_kg = Column(Numeric(14, 2), nullable=False, default=0)  # Somme des quantités chargées
+    unloaded_kg = Column(Numeric(14, 2), nullable=False, default=0)  # Somme des quantités déchargées
+    delivery_count = Column(Integer, nullable=False, default=0)
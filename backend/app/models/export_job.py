@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, DateTime, BigInteger, Text, ForeignKey, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+from ..database import Base
+
+class ExportJob(Base):
+    """Tâche d'export exécutée en arrière-plan"""
+    __tablename__ = "export_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    format = Column(String(10), nullable=False)  # excel, pdf
+    filters = Column(JSON, nullable=True)
+    cache_key = Column(String(64), nullable=False, index=True)  # Hash (format, filtres, version des données)
+    status = Column(String(20), default="pending", nullable=False, index=True)  # pending, running, completed, failed
+    file_path = Column(String, nullable=True)
+    file_size = Column(BigInteger, nullable=True)
+    error = Column(Text, nullable=True)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
@@ -1,5 +1,5 @@
 """Modèles pour le système de messagerie interne"""
-from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, CheckConstraint
+from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, CheckConstraint, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -70,6 +70,11 @@ class DirectConversation(Base):
 class Message(Base):
     """Modèle pour les messages"""
     __tablename__ = "messages"
+    __table_args__ = (
+        # Comptage des non-lus : plage created_at > filigrane de lecture
+        Index("ix_messages_channel_id_created_at", "channel_id", "created_at"),
+        Index("ix_messages_conversation_id_created_at", "conversation_id", "created_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     channel_id = Column(UUID(as_uuid=True), ForeignKey("channels.id", ondelete="CASCADE"))
@@ -83,7 +88,9 @@ class Message(Base):
     reply_to_id = Column(UUID(as_uuid=True), ForeignKey("messages.id"))  # Pour les réponses
     edited_at = Column(DateTime(timezone=True))
     deleted_at = Column(DateTime(timezone=True))
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # clock_timestamp() (heure de l'insertion) et non now() (début de la transaction) : l'ordre
+    # des created_at suit au plus près l'ordre de validation, sur lequel reposent les filigranes de lecture
+    created_at = Column(DateTime(timezone=True), server_default=func.clock_timestamp(), index=True)
 
     # Relations
     channel = relationship("Channel", back_populates="messages")
@@ -115,6 +122,44 @@ class MessageRead(Base):
         return f"<MessageRead {self.message_id} by {self.user_id}>"
 
 
+class MessageReadWatermark(Base):
+    """
+    Filigrane de lecture par (utilisateur, canal) ou (utilisateur, conversation) :
+    tous les messages créés jusqu'à `last_read_at` inclus sont lus.
+    
+    Tolérance : created_at est fixé à l'insertion, pas à la validation. Un
+    message inséré avant le filigrane mais validé après (écart de quelques
+    millisecondes entre INSERT et COMMIT d'un envoi) est compté comme lu sans
+    avoir été vu ; de même un message dont created_at est égal au filigrane
+    (résolution : la microseconde).
+    """
+    __tablename__ = "message_read_watermarks"
+    __table_args__ = (
+        CheckConstraint(
+            "(channel_id IS NULL) <> (conversation_id IS NULL)",
+            name="ck_message_read_watermarks_target"
+        ),
+        Index(
+            "uq_message_read_watermarks_user_channel", "user_id", "channel_id",
+            unique=True, postgresql_where=text("channel_id IS NOT NULL")
+        ),
+        Index(
+            "uq_message_read_watermarks_user_conversation", "user_id", "conversation_id",
+            unique=True, postgresql_where=text("conversation_id IS NOT NULL")
+        ),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    channel_id = Column(UUID(as_uuid=True), ForeignKey("channels.id", ondelete="CASCADE"))
+    conversation_id = Column(UUID(as_uuid=True), ForeignKey("direct_conversations.id", ondelete="CASCADE"))
+    last_read_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<MessageReadWatermark {self.user_id} {self.channel_id or self.conversation_id} {self.last_read_at}>"
+
+
 class PinnedMessage(Base):
     """Modèle pour les messages épinglés"""
     __tablename__ = "pinned_messages"
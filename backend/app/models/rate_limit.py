@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, Integer, BigInteger, Float
+from ..database import Base
+
+class RateLimitCounter(Base):
+    """Compteur de requêtes par (client:type d'endpoint) et fenêtre fixe (backend postgres)"""
+    __tablename__ = "rate_limit_counters"
+    
+    key = Column(String(64), primary_key=True)
+    window_start = Column(BigInteger, primary_key=True)  # Timestamp epoch du début de fenêtre
+    count = Column(Integer, default=0, nullable=False)
+
+class RateLimitBlock(Base):
+    """Blocage temporaire d'un client (backend postgres)"""
+    __tablename__ = "rate_limit_blocks"
+    
+    client_key = Column(String(32), primary_key=True)
+    blocked_until = Column(Float, nullable=False, index=True)  # Timestamp epoch
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Integer, JSON
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Integer, SmallInteger, JSON
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 import uuid
 from ..database import Base
@@ -14,12 +14,16 @@ class TraceabilityRecord(Base):
     
     # QR Code
     qr_code = Column(String(255), unique=True, nullable=False, index=True)
-    qr_code_image = Column(Text)  # Base64 encoded image
+    # Historique (base64) : les images sont rendues à la demande et la colonne vidée (strip_qr_images.py)
+    qr_code_image = deferred(Column(Text))
     
     # Blockchain
     blockchain_hash = Column(String(64), unique=True, nullable=False)  # SHA-256
     previous_hash = Column(String(64))  # Hash du bloc précédent
-    block_number = Column(Integer, nullable=False)
+    block_number = Column(Integer, nullable=False, index=True)
+    # Version de l'encodage haché (voir services/block_encoding) ; 1 = historique, non reproductible
+    hash_version = Column(SmallInteger, nullable=False, server_default="1")
+    legacy_hash = Column(String(64))  # Hash v1 d'origine, conservé après rescellement
     
     # Données de traçabilité
     trace_data = Column(JSON)  # Toutes les infos de la livraison
@@ -28,6 +32,10 @@ class TraceabilityRecord(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     verified_at = Column(DateTime)
     
+    @property
+    def qr_code_image_url(self) -> str:
+        return f"/api/v1/traceability/qr-code/{self.qr_code}/image"
+    
     # Relations
     delivery = relationship("Delivery")  # back_populates commented out in Delivery model
     scans = relationship("TraceabilityScan", back_populates="record", cascade="all, delete-orphan")
@@ -54,3 +62,22 @@ class TraceabilityScan(Base):
     
     # Relation
     record = relationship("TraceabilityRecord", back_populates="scans")
+
+class ChainCheckpoint(Base):
+    """Dernier bloc dont la chaîne a été vérifiée (vérification incrémentale)"""
+    __tablename__ = "chain_checkpoints"
+
+    chain = Column(String(50), primary_key=True)
+    block_number = Column(Integer, nullable=False)
+    block_hash = Column(String(64), nullable=False)
+    verified_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_full_audit_at = Column(DateTime)
+
+class ChainHead(Base):
+    """Dernier bloc ajouté : ligne verrouillée (FOR UPDATE) par chaque ajout de blocs"""
+    __tablename__ = "chain_heads"
+
+    chain = Column(String(50), primary_key=True)
+    block_number = Column(Integer, nullable=False)
+    block_hash = Column(String(64))
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -8,6 +8,8 @@ from sqlalchemy import desc, and_, or_
 from ..database import get_db
 from ..middleware.auth import get_current_user
 from ..models import AuditLog, User
+from ..utils.pagination import keyset_paginate, estimate_count
+from ..services.audit_writer import audit_writer
 from typing import Optional, List
 from datetime import datetime, timedelta
 import io
@@ -30,12 +32,18 @@ async def get_audit_logs(
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
     search: Optional[str] = None,
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="offset (skip/total exact) ou cursor (pagination par clé)"),
+    cursor: Optional[str] = Query(None, description="Curseur renvoyé par next_cursor (active le mode cursor)"),
+    with_total: bool = Query(False, description="Mode cursor : inclure un total estimé"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Récupérer les logs d'audit avec filtres
     
+    En mode cursor, ni OFFSET ni COUNT : la page suivante est lue à partir
+    de (created_at, id) du dernier log renvoyé.
+    
     Permissions: admin, manager
     """
     if current_user.role not in ["superadmin", "admin", "manager"]:
@@ -80,16 +88,22 @@ async def get_audit_logs(
         if filters:
             query = query.filter(and_(*filters))
         
-        # Count total
-        total = query.count()
-        
-        # Get logs
-        logs = query.order_by(desc(AuditLog.created_at)).offset(skip).limit(limit).all()
+        next_cursor = None
+        if pagination == "cursor" or cursor:
+            total = estimate_count(query) if with_total else None
+            logs, next_cursor = keyset_paginate(query, [AuditLog.created_at, AuditLog.id], cursor, limit)
+        else:
+            # Count total
+            total = query.count()
+            
+            # Get logs
+            logs = query.order_by(desc(AuditLog.created_at)).offset(skip).limit(limit).all()
         
         return {
             "total": total,
             "skip": skip,
             "limit": limit,
+            "next_cursor": next_cursor,
             "logs": [
                 {
                     "id": log.id,
@@ -107,6 +121,8 @@ async def get_audit_logs(
             ]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching audit logs: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -204,6 +220,17 @@ async def get_audit_stats(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/writer/metrics")
+async def get_audit_writer_metrics(
+    current_user: User = Depends(get_current_user)
+):
+    """Métriques de l'écriture asynchrone du journal (profondeur de file, latence des lots)"""
+    if current_user.role not in ["superadmin", "admin"]:
+        raise HTTPException(status_code=403, detail="Permission denied")
+    
+    return audit_writer.get_metrics()
+
+
 @router.get("/export/csv")
 async def export_audit_csv(
     from_date: Optional[str] = None,
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from ..database import get_db
 from ..schemas import LoginRequest, TokenResponse, RefreshRequest, UserResponse, UserCreate
 from ..services import auth_service
+from ..services.auth_cache import auth_cache
 from ..middleware.auth import get_current_user
 from ..utils.security import decode_token
 from ..models import User
@@ -129,6 +130,7 @@ def revoke_session(
     
     session.is_active = False
     db.commit()
+    auth_cache.invalidate_sessions([session.id])
     
     return {"message": "Session révoquée"}
 
@@ -149,6 +151,7 @@ def logout_all_sessions(
         session.is_active = False
     
     db.commit()
+    auth_cache.invalidate_users([current_user.id])
     
     return {"message": f"{count} session(s) déconnectée(s)"}
 
@@ -202,6 +205,7 @@ def admin_revoke_session(
     
     session.is_active = False
     db.commit()
+    auth_cache.invalidate_sessions([session.id])
     
     return {"message": "Session révoquée"}
 
@@ -19,9 +19,21 @@ def list_collectes(
     chef_planteur_id: Optional[UUID] = None,
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=1000),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="offset (page/total exact) ou cursor (pagination par clé)"),
+    cursor: Optional[str] = Query(None, description="Curseur renvoyé par next_cursor (active le mode cursor)"),
+    with_total: bool = Query(False, description="Mode cursor : inclure un total estimé"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
+    if pagination == "cursor" or cursor:
+        collectes, next_cursor, total = collecte_service.get_collectes_keyset(
+            db, search, from_date, to_date, chef_planteur_id, size, cursor, with_total
+        )
+        return PaginatedResponse(
+            items=collectes, page=page, size=size, total=total,
+            next_cursor=next_cursor, total_is_estimate=total is not None
+        )
+    
     collectes, total = collecte_service.get_collectes(
         db, search, from_date, to_date, chef_planteur_id, page, size
     )
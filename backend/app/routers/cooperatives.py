@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func, distinct
-from typing import List
+from sqlalchemy import func
+from typing import List, Optional
 from ..database import get_db
 from ..models import Planter, ChefPlanteur, Delivery
 from ..middleware.auth import get_current_user
+from ..services import cooperative_service, search_service, autocomplete_service
+from ..utils import http_cache
 
 router = APIRouter(prefix="/cooperatives", tags=["cooperatives"])
 
@@ -14,114 +16,29 @@ def list_cooperatives(
     current_user = Depends(get_current_user)
 ):
     """Liste toutes les coopératives avec leurs statistiques"""
-    
-    # Récupérer toutes les coopératives uniques des planteurs
-    planteurs_coops = db.query(
-        Planter.cooperative.label('nom'),
-        func.count(Planter.id).label('nb_planteurs')
-    ).filter(
-        Planter.cooperative.isnot(None),
-        Planter.cooperative != ''
-    ).group_by(Planter.cooperative).all()
-    
-    # Récupérer toutes les coopératives uniques des fournisseurs
-    fournisseurs_coops = db.query(
-        ChefPlanteur.cooperative.label('nom'),
-        func.count(ChefPlanteur.id).label('nb_fournisseurs')
-    ).filter(
-        ChefPlanteur.cooperative.isnot(None),
-        ChefPlanteur.cooperative != ''
-    ).group_by(ChefPlanteur.cooperative).all()
-    
-    # Créer un dictionnaire pour fusionner les données
-    cooperatives_dict = {}
-    
-    # Ajouter les coopératives des planteurs
-    for coop in planteurs_coops:
-        if coop.nom not in cooperatives_dict:
-            cooperatives_dict[coop.nom] = {
-                'nom': coop.nom,
-                'nb_planteurs': 0,
-                'nb_fournisseurs': 0,
-                'total_charge_kg': 0,
-                'total_decharge_kg': 0,
-                'pertes_kg': 0,
-                'pourcentage_pertes': 0
-            }
-        cooperatives_dict[coop.nom]['nb_planteurs'] = coop.nb_planteurs
-    
-    # Ajouter les coopératives des fournisseurs
-    for coop in fournisseurs_coops:
-        if coop.nom not in cooperatives_dict:
-            cooperatives_dict[coop.nom] = {
-                'nom': coop.nom,
-                'nb_planteurs': 0,
-                'nb_fournisseurs': 0,
-                'total_charge_kg': 0,
-                'total_decharge_kg': 0,
-                'pertes_kg': 0,
-                'pourcentage_pertes': 0
-            }
-        cooperatives_dict[coop.nom]['nb_fournisseurs'] = coop.nb_fournisseurs
-    
-    # Calculer les statistiques de livraison pour chaque coopérative
-    for nom_coop in cooperatives_dict.keys():
-        # Récupérer les IDs des planteurs de cette coopérative
-        planteur_ids = db.query(Planter.id).filter(Planter.cooperative == nom_coop).all()
-        planteur_ids = [p[0] for p in planteur_ids]
-        
-        if planteur_ids:
-            # Calculer les totaux
-            stats = db.query(
-                func.sum(Delivery.quantity_loaded_kg).label('total_charge'),
-                func.sum(Delivery.quantity_kg).label('total_decharge')
-            ).filter(Delivery.planter_id.in_(planteur_ids)).first()
-            
-            total_charge = float(stats.total_charge or 0)
-            total_decharge = float(stats.total_decharge or 0)
-            pertes = total_charge - total_decharge
-            pourcentage_pertes = (pertes / total_charge * 100) if total_charge > 0 else 0
-            
-            cooperatives_dict[nom_coop]['total_charge_kg'] = total_charge
-            cooperatives_dict[nom_coop]['total_decharge_kg'] = total_decharge
-            cooperatives_dict[nom_coop]['pertes_kg'] = pertes
-            cooperatives_dict[nom_coop]['pourcentage_pertes'] = round(pourcentage_pertes, 2)
-    
-    # Convertir en liste et trier par nom
-    cooperatives_list = sorted(cooperatives_dict.values(), key=lambda x: x['nom'])
-    
-    return cooperatives_list
+    return cooperative_service.get_cooperatives_stats(db)
 
 @router.get("/names")
 def get_cooperative_names(
+    request: Request,
+    response: Response,
+    q: Optional[str] = Query(None, max_length=100, description="Préfixe (ou, à défaut, filtre approché)"),
+    limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Récupère la liste des noms de coopératives uniques pour l'autocomplétion"""
-    
-    # Récupérer les coopératives des planteurs
-    planteurs_coops = db.query(distinct(Planter.cooperative)).filter(
-        Planter.cooperative.isnot(None),
-        Planter.cooperative != ''
-    ).all()
-    
-    # Récupérer les coopératives des fournisseurs
-    fournisseurs_coops = db.query(distinct(ChefPlanteur.cooperative)).filter(
-        ChefPlanteur.cooperative.isnot(None),
-        ChefPlanteur.cooperative != ''
-    ).all()
-    
-    # Fusionner et dédupliquer
-    all_coops = set()
-    for coop in planteurs_coops:
-        if coop[0]:
-            all_coops.add(coop[0])
-    for coop in fournisseurs_coops:
-        if coop[0]:
-            all_coops.add(coop[0])
-    
-    # Retourner la liste triée
-    return sorted(list(all_coops))
+    """Récupère la liste triée des noms de coopératives uniques pour l'autocomplétion
+    (dictionnaire en mémoire, 304 si la liste n'a pas changé)"""
+    etag = autocomplete_service.get_etag(db, autocomplete_service.COOPERATIVES)
+    if http_cache.etag_matches(request, etag):
+        return http_cache.not_modified(etag)
+    http_cache.set_etag(response, etag)
+    
+    if q and q.strip():
+        names = autocomplete_service.complete(db, autocomplete_service.COOPERATIVES, q, limit)
+        # Aucun préfixe : recherche approchée (fautes de frappe)
+        return names or [r.label for r in search_service.search_cooperatives(db, q, limit)]
+    return autocomplete_service.get_values(db, autocomplete_service.COOPERATIVES)
 
 @router.get("/{nom_cooperative:path}")
 def get_cooperative_details(
@@ -141,20 +58,16 @@ def get_cooperative_details(
     # Récupérer les fournisseurs de cette coopérative
     fournisseurs = db.query(ChefPlanteur).filter(ChefPlanteur.cooperative == nom_cooperative).all()
     
-    # Calculer les statistiques
-    planteur_ids = [p.id for p in planteurs]
-    
-    total_charge = 0
-    total_decharge = 0
+    # Calculer les statistiques (jointure plutôt qu'une liste IN des planteurs)
+    stats = db.query(
+        func.sum(Delivery.quantity_loaded_kg).label('total_charge'),
+        func.sum(Delivery.quantity_kg).label('total_decharge')
+    ).join(Planter, Planter.id == Delivery.planter_id).filter(
+        Planter.cooperative == nom_cooperative
+    ).first()
     
-    if planteur_ids:
-        stats = db.query(
-            func.sum(Delivery.quantity_loaded_kg).label('total_charge'),
-            func.sum(Delivery.quantity_kg).label('total_decharge')
-        ).filter(Delivery.planter_id.in_(planteur_ids)).first()
-        
-        total_charge = float(stats.total_charge or 0)
-        total_decharge = float(stats.total_decharge or 0)
+    total_charge = float(stats.total_charge or 0)
+    total_decharge = float(stats.total_decharge or 0)
     
     pertes = total_charge - total_decharge
     pourcentage_pertes = (pertes / total_charge * 100) if total_charge > 0 else 0
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import Optional
 from uuid import UUID
@@ -9,6 +9,7 @@ from ..schemas import DeliveryCreate, DeliveryUpdate, DeliveryResponse
 from ..services import delivery_service
 from ..middleware.auth import require_role, get_current_user
 from ..utils.pagination import PaginatedResponse
+from ..utils import http_cache
 
 router = APIRouter(prefix="/deliveries", tags=["deliveries"])
 
@@ -25,9 +26,21 @@ def list_deliveries(
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=10000),
     sort: str = Query("date"),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="offset (page/total exact) ou cursor (pagination par clé)"),
+    cursor: Optional[str] = Query(None, description="Curseur renvoyé par next_cursor (active le mode cursor)"),
+    with_total: bool = Query(False, description="Mode cursor : inclure un total estimé"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
+    if pagination == "cursor" or cursor:
+        deliveries, next_cursor, total = delivery_service.get_deliveries_keyset(
+            db, from_date, to_date, planter_id, load, unload, quality, min_qty, max_qty, size, sort, cursor, with_total
+        )
+        return PaginatedResponse(
+            items=deliveries, page=page, size=size, total=total,
+            next_cursor=next_cursor, total_is_estimate=total is not None
+        )
+    
     deliveries, total = delivery_service.get_deliveries(
         db, from_date, to_date, planter_id, load, unload, quality, min_qty, max_qty, page, size, sort
     )
@@ -56,8 +69,16 @@ def delete_delivery(delivery_id: UUID, db: Session = Depends(get_db)):
 
 @router.get("/locations/unique")
 def get_unique_locations(
+    request: Request,
+    response: Response,
+    q: Optional[str] = Query(None, max_length=100, description="Préfixe (insensible à la casse et aux accents)"),
+    limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Récupère tous les lieux uniques pour l'autocomplétion"""
-    return delivery_service.get_unique_locations(db)
+    """Récupère tous les lieux uniques pour l'autocomplétion (304 si inchangés)"""
+    etag = delivery_service.get_locations_etag(db)
+    if http_cache.etag_matches(request, etag):
+        return http_cache.not_modified(etag)
+    http_cache.set_etag(response, etag)
+    return delivery_service.get_unique_locations(db, q.strip() if q else None, limit)
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse, FileResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import date
 from uuid import UUID
 from ..database import get_db
-from ..services import export_service
+from ..services import export_service, export_job_service
+from ..schemas.export_job import ExportJobCreate, ExportJobResponse
 from ..middleware.auth import get_current_user
 
 router = APIRouter(prefix="/exports", tags=["exports"])
@@ -18,10 +19,14 @@ def export_excel(
     load: Optional[str] = None,
     unload: Optional[str] = None,
     quality: Optional[str] = None,
+    stream: bool = Query(False, description="Export à mémoire constante, sans limite de lignes (fichier envoyé une fois entièrement généré)"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    output = export_service.export_excel(db, from_date, to_date, planter_id, load, unload, quality)
+    if stream:
+        output = export_service.export_excel_stream(db, from_date, to_date, planter_id, load, unload, quality)
+    else:
+        output = export_service.export_excel(db, from_date, to_date, planter_id, load, unload, quality)
     filename = f"livraisons_cacao_{date.today().isoformat()}.xlsx"
     return StreamingResponse(
         output,
@@ -46,3 +51,53 @@ def export_pdf(
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
+
+def _job_response(job, cached: bool = False) -> ExportJobResponse:
+    response = ExportJobResponse.model_validate(job)
+    response.cached = cached
+    if job.status == "completed":
+        response.download_url = f"/api/v1/exports/jobs/{job.id}/download"
+    return response
+
+@router.post("/jobs", response_model=ExportJobResponse, status_code=202)
+def create_export_job(
+    job_data: ExportJobCreate,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Lancer un export en arrière-plan (réutilise un fichier identique déjà généré)"""
+    job, cached = export_job_service.create_job(db, job_data, current_user.id)
+    return _job_response(job, cached)
+
+@router.get("/jobs/{job_id}", response_model=ExportJobResponse)
+def get_export_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Suivre l'avancement d'un export"""
+    job = export_job_service.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export not found")
+    return _job_response(job)
+
+@router.get("/jobs/{job_id}/download")
+def download_export_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Télécharger le fichier d'un export terminé"""
+    job = export_job_service.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export not found")
+    if job.status != "completed" or not job.file_path:
+        raise HTTPException(status_code=409, detail=f"Export not ready (status: {job.status})")
+    
+    if job.format == "excel":
+        filename = f"livraisons_cacao_{job.created_at.date().isoformat()}.xlsx"
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        filename = f"synthese_cacao_{job.created_at.date().isoformat()}.pdf"
+        media_type = "application/pdf"
+    return FileResponse(job.file_path, media_type=media_type, filename=filename)
@@ -10,6 +10,7 @@ from ..models import User
 from ..middleware.auth import get_current_user, require_role
 from ..schemas.invoice import InvoiceCreate, InvoiceUpdate, InvoiceResponse, InvoiceStatus
 from ..services.invoice_service import InvoiceService
+from ..services.entity_resolver import resolve_planters
 from ..models.invoice import Invoice
 from ..models.planter import Planter
 import os
@@ -62,13 +63,15 @@ def list_invoices(
         planter_id=planter_id
     )
     
-    # Enrichir avec les données des planteurs
+    # Enrichir avec les données des planteurs (chargés en une requête)
+    planters = resolve_planters(db, (invoice.planter_id for invoice in invoices))
     result = []
     for invoice in invoices:
         response = InvoiceResponse.from_orm(invoice)
-        if invoice.planter:
-            response.planter_name = invoice.planter.name
-            response.planter_phone = invoice.planter.phone
+        planter = planters.get(invoice.planter_id)
+        if planter:
+            response.planter_name = planter.name
+            response.planter_phone = planter.phone
         result.append(response)
     
     return result
@@ -2,7 +2,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
 from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
@@ -17,7 +16,8 @@ from ..schemas.messaging import (
     Message, MessageCreate, MessageUpdate,
     DirectConversation, DirectConversationCreate,
     MessageSearchQuery, MessageSearchResult,
-    UnreadCounts, UserStatusUpdate, UserStatusInfo
+    UnreadCounts, UserStatusUpdate, UserStatusInfo,
+    MarkReadUpTo, ReadWatermark
 )
 from ..services.messaging_service import MessagingService
 from ..middleware.auth import get_current_user
@@ -36,42 +36,7 @@ async def get_user_channels(
     db: Session = Depends(get_db)
 ):
     """Récupérer tous les canaux de l'utilisateur"""
-    from ..models import Message as MessageModel, MessageRead
-    
-    channels = MessagingService.get_user_channels(db, current_user.id)
-    
-    # Ajouter les informations supplémentaires
-    result = []
-    for channel in channels:
-        # Calculer le nombre de messages non lus dans ce canal
-        unread_count = db.query(MessageModel).outerjoin(
-            MessageRead,
-            and_(
-                MessageRead.message_id == MessageModel.id,
-                MessageRead.user_id == current_user.id
-            )
-        ).filter(
-            MessageModel.channel_id == channel.id,
-            MessageModel.sender_id != current_user.id,
-            MessageModel.deleted_at.is_(None),
-            MessageRead.id.is_(None)
-        ).count()
-        
-        channel_dict = {
-            "id": channel.id,
-            "name": channel.name,
-            "display_name": channel.display_name,
-            "description": channel.description,
-            "type": channel.type,
-            "created_by": channel.created_by,
-            "created_at": channel.created_at,
-            "member_count": len(channel.members),
-            "is_member": True,
-            "unread_count": unread_count
-        }
-        result.append(channel_dict)
-    
-    return result
+    return MessagingService.get_channel_listing(db, current_user.id)
 
 
 @router.get("/channels/public", response_model=List[Channel])
@@ -80,50 +45,7 @@ async def get_public_channels(
     db: Session = Depends(get_db)
 ):
     """Récupérer tous les canaux publics"""
-    from ..models import Channel as ChannelModel, Message as MessageModel, MessageRead
-    
-    channels = db.query(ChannelModel).filter(
-        ChannelModel.type == 'public'
-    ).all()
-    
-    user_channels = MessagingService.get_user_channels(db, current_user.id)
-    user_channel_ids = {ch.id for ch in user_channels}
-    
-    result = []
-    for channel in channels:
-        is_member = channel.id in user_channel_ids
-        
-        # Calculer le nombre de messages non lus seulement si membre
-        unread_count = 0
-        if is_member:
-            unread_count = db.query(MessageModel).outerjoin(
-                MessageRead,
-                and_(
-                    MessageRead.message_id == MessageModel.id,
-                    MessageRead.user_id == current_user.id
-                )
-            ).filter(
-                MessageModel.channel_id == channel.id,
-                MessageModel.sender_id != current_user.id,
-                MessageModel.deleted_at.is_(None),
-                MessageRead.id.is_(None)
-            ).count()
-        
-        channel_dict = {
-            "id": channel.id,
-            "name": channel.name,
-            "display_name": channel.display_name,
-            "description": channel.description,
-            "type": channel.type,
-            "created_by": channel.created_by,
-            "created_at": channel.created_at,
-            "member_count": len(channel.members),
-            "is_member": is_member,
-            "unread_count": unread_count
-        }
-        result.append(channel_dict)
-    
-    return result
+    return MessagingService.get_channel_listing(db, current_user.id, public_only=True)
 
 
 @router.post("/channels", response_model=Channel, status_code=status.HTTP_201_CREATED)
@@ -314,6 +236,8 @@ async def delete_message(
     
     message.deleted_at = datetime.now()
     db.commit()
+    # Un message supprimé ne compte plus dans les non-lus
+    MessagingService.invalidate_unread_counts()
     
     return {"message": "Message supprimé avec succès"}
 
@@ -325,51 +249,7 @@ async def get_user_conversations(
     db: Session = Depends(get_db)
 ):
     """Récupérer toutes les conversations de l'utilisateur"""
-    conversations = MessagingService.get_user_conversations(db, current_user.id)
-    
-    result = []
-    for conv in conversations:
-        other_user_id = conv.user2_id if conv.user1_id == current_user.id else conv.user1_id
-        other_user = db.query(User).filter(User.id == other_user_id).first()
-        
-        # Calculer le nombre de messages non lus
-        from ..models import Message as MessageModel, MessageRead
-        unread_count = db.query(MessageModel).outerjoin(
-            MessageRead,
-            and_(
-                MessageRead.message_id == MessageModel.id,
-                MessageRead.user_id == current_user.id
-            )
-        ).filter(
-            MessageModel.conversation_id == conv.id,
-            MessageModel.sender_id != current_user.id,
-            MessageModel.deleted_at.is_(None),
-            MessageRead.id.is_(None)
-        ).count()
-        
-        # Récupérer le dernier message
-        last_message = db.query(MessageModel).filter(
-            MessageModel.conversation_id == conv.id,
-            MessageModel.deleted_at.is_(None)
-        ).order_by(MessageModel.created_at.desc()).first()
-        
-        conv_dict = {
-            "id": conv.id,
-            "user1_id": conv.user1_id,
-            "user2_id": conv.user2_id,
-            "created_at": conv.created_at,
-            "other_user": {
-                "id": other_user.id,
-                "email": other_user.email,
-                "role": other_user.role
-            } if other_user else None,
-            "unread_count": unread_count,
-            "last_message": last_message.content[:50] + "..." if last_message and len(last_message.content) > 50 else (last_message.content if last_message else None),
-            "last_message_at": last_message.created_at if last_message else None
-        }
-        result.append(conv_dict)
-    
-    return result
+    return MessagingService.get_conversation_listing(db, current_user.id)
 
 
 @router.post("/conversations", response_model=DirectConversation, status_code=status.HTTP_201_CREATED)
@@ -447,11 +327,43 @@ async def mark_message_as_read(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Marquer un message comme lu"""
-    MessagingService.mark_message_as_read(db, message_id, current_user.id)
+    """Marquer un message comme lu (ainsi que les précédents du même fil)"""
+    try:
+        last_read_at = MessagingService.mark_message_as_read(db, message_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    if last_read_at is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Message non trouvé"
+        )
     return {"message": "Message marqué comme lu"}
 
 
+@router.post("/read", response_model=ReadWatermark)
+async def mark_read_up_to(
+    data: MarkReadUpTo,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Marquer comme lus tous les messages d'un canal ou d'une conversation jusqu'à `up_to`"""
+    if (data.channel_id is None) == (data.conversation_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Préciser channel_id ou conversation_id"
+        )
+    try:
+        last_read_at = MessagingService.mark_read_up_to(
+            db, current_user.id,
+            channel_id=data.channel_id,
+            conversation_id=data.conversation_id,
+            up_to=data.up_to
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    return {"last_read_at": last_read_at}
+
+
 @router.get("/unread", response_model=UnreadCounts)
 async def get_unread_counts(
     current_user: User = Depends(get_current_user),
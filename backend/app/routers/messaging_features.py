@@ -3,7 +3,7 @@
 - Recherche de messages
 - Notifications push
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_, func
 from typing import List, Optional
@@ -14,6 +14,7 @@ from ..database import get_db
 from ..models import User
 from ..models.messaging import Message, MessageReaction, PushSubscription, Channel, DirectConversation
 from ..middleware.auth import get_current_user
+from ..services import message_search_service
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/messaging", tags=["messaging-features"])
@@ -45,6 +46,7 @@ class MessageSearchQuery(BaseModel):
 class MessageSearchResult(BaseModel):
     id: UUID
     content: str
+    snippet: Optional[str] = None
     sender_id: UUID
     sender_email: str
     channel_id: Optional[UUID]
@@ -155,23 +157,18 @@ async def delete_reaction(
 
 @router.get("/messages/search", response_model=List[MessageSearchResult])
 async def search_messages(
+    response: Response,
     q: str = Query(..., min_length=2, description="Terme de recherche"),
     channel_id: Optional[UUID] = Query(None, description="Filtrer par canal"),
     conversation_id: Optional[UUID] = Query(None, description="Filtrer par conversation"),
     limit: int = Query(50, le=100, description="Nombre maximum de résultats"),
+    cursor: Optional[str] = Query(None, description="Curseur de la page suivante (en-tête X-Next-Cursor)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Rechercher des messages par contenu"""
-    # Construire la requête de base
-    query = db.query(Message).filter(
-        Message.deleted_at.is_(None),
-        Message.content.ilike(f"%{q}%")
-    )
-    
-    # Filtrer par canal ou conversation
+    """Rechercher des messages par contenu (plein texte, triés par pertinence)"""
+    # Vérifier l'accès au canal ou à la conversation demandés
     if channel_id:
-        # Vérifier que l'utilisateur est membre du canal
         from ..models.messaging import ChannelMember
         is_member = db.query(ChannelMember).filter(
             ChannelMember.channel_id == channel_id,
@@ -180,11 +177,8 @@ async def search_messages(
         
         if not is_member:
             raise HTTPException(status_code=403, detail="Accès refusé à ce canal")
-        
-        query = query.filter(Message.channel_id == channel_id)
     
     elif conversation_id:
-        # Vérifier que l'utilisateur fait partie de la conversation
         conversation = db.query(DirectConversation).filter(
             DirectConversation.id == conversation_id,
             or_(
@@ -195,48 +189,32 @@ async def search_messages(
         
         if not conversation:
             raise HTTPException(status_code=403, detail="Accès refusé à cette conversation")
-        
-        query = query.filter(Message.conversation_id == conversation_id)
-    
-    else:
-        # Rechercher dans tous les canaux/conversations de l'utilisateur
-        from ..models.messaging import ChannelMember
-        
-        user_channel_ids = db.query(ChannelMember.channel_id).filter(
-            ChannelMember.user_id == current_user.id
-        ).subquery()
-        
-        user_conversation_ids = db.query(DirectConversation.id).filter(
-            or_(
-                DirectConversation.user1_id == current_user.id,
-                DirectConversation.user2_id == current_user.id
-            )
-        ).subquery()
-        
-        query = query.filter(
-            or_(
-                Message.channel_id.in_(user_channel_ids),
-                Message.conversation_id.in_(user_conversation_ids)
-            )
-        )
     
-    # Trier par pertinence (date décroissante)
-    messages = query.order_by(Message.created_at.desc()).limit(limit).all()
-    
-    # Formater les résultats
-    results = []
-    for msg in messages:
-        results.append({
-            "id": msg.id,
-            "content": msg.content,
-            "sender_id": msg.sender_id,
-            "sender_email": msg.sender.email if msg.sender else "Inconnu",
-            "channel_id": msg.channel_id,
-            "conversation_id": msg.conversation_id,
-            "created_at": msg.created_at
-        })
+    # Sinon : tous les canaux/conversations de l'utilisateur
+    page = message_search_service.search_messages(
+        db, current_user.id, q,
+        channel_id=channel_id,
+        conversation_id=None if channel_id else conversation_id,
+        limit=limit,
+        cursor=cursor
+    )
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    response.headers["X-Search-Mode"] = page.mode
     
-    return results
+    return [
+        {
+            "id": hit.message.id,
+            "content": hit.message.content,
+            "snippet": hit.snippet,
+            "sender_id": hit.message.sender_id,
+            "sender_email": hit.message.sender.email if hit.message.sender else "Inconnu",
+            "channel_id": hit.message.channel_id,
+            "conversation_id": hit.message.conversation_id,
+            "created_at": hit.message.created_at
+        }
+        for hit in page.hits
+    ]
 
 
 # ============================================
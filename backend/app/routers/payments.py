@@ -15,6 +15,7 @@ from ..schemas.payment import (
     PlanterBalance
 )
 from ..routers.auth import get_current_user
+from ..services import payment_service
 
 router = APIRouter(prefix="/payments", tags=["payments"])
 
@@ -143,40 +144,17 @@ def delete_payment(
 
 @router.get("/balances/all", response_model=List[PlanterBalance])
 def get_all_balances(
+    sort: str = Query("total_livraisons_kg", description="Colonne de tri : " + ", ".join(sorted(payment_service.BALANCE_SORTS))),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=10000, description="Nombre maximum de soldes (tous par défaut)"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Calculer les soldes de tous les planteurs"""
-    planters = db.query(Planter).all()
-    balances = []
-    
-    for planter in planters:
-        # Total des livraisons (en supposant un prix moyen, à ajuster selon vos besoins)
-        deliveries = db.query(Delivery).filter(Delivery.planter_id == planter.id).all()
-        total_kg = sum(float(d.quantity_kg) for d in deliveries)
-        
-        # Total des paiements
-        payments = db.query(Payment).filter(Payment.planter_id == planter.id).all()
-        total_paiements = sum(p.montant for p in payments)
-        
-        # Dates
-        derniere_livraison = max([d.date for d in deliveries]) if deliveries else None
-        dernier_paiement = max([p.date_paiement for p in payments]) if payments else None
-        
-        # Solde (on ne peut pas calculer sans prix, donc on met juste les paiements)
-        balances.append(PlanterBalance(
-            planter_id=planter.id,
-            planter_name=planter.name,
-            total_livraisons_kg=total_kg,
-            total_paiements=total_paiements,
-            solde=0,  # À calculer avec les prix réels
-            nombre_livraisons=len(deliveries),
-            nombre_paiements=len(payments),
-            derniere_livraison=derniere_livraison,
-            dernier_paiement=dernier_paiement
-        ))
-    
-    return sorted(balances, key=lambda x: x.total_livraisons_kg, reverse=True)
+    if sort not in payment_service.BALANCE_SORTS:
+        raise HTTPException(status_code=400, detail=f"Tri invalide : {sort}")
+    return payment_service.get_balances(db, sort, order == "desc", skip, limit)
 
 @router.get("/balances/{planter_id}", response_model=PlanterBalance)
 def get_planter_balance(
@@ -185,30 +163,7 @@ def get_planter_balance(
     current_user: User = Depends(get_current_user)
 ):
     """Calculer le solde d'un planteur spécifique"""
-    planter = db.query(Planter).filter(Planter.id == planter_id).first()
-    if not planter:
+    balance = payment_service.get_planter_balance(db, planter_id)
+    if not balance:
         raise HTTPException(status_code=404, detail="Planteur non trouvé")
-    
-    # Total des livraisons
-    deliveries = db.query(Delivery).filter(Delivery.planter_id == planter_id).all()
-    total_kg = sum(float(d.quantity_kg) for d in deliveries)
-    
-    # Total des paiements
-    payments = db.query(Payment).filter(Payment.planter_id == planter_id).all()
-    total_paiements = sum(p.montant for p in payments)
-    
-    # Dates
-    derniere_livraison = max([d.date for d in deliveries]) if deliveries else None
-    dernier_paiement = max([p.date_paiement for p in payments]) if payments else None
-    
-    return PlanterBalance(
-        planter_id=planter.id,
-        planter_name=planter.name,
-        total_livraisons_kg=total_kg,
-        total_paiements=total_paiements,
-        solde=0,  # À calculer avec les prix réels
-        nombre_livraisons=len(deliveries),
-        nombre_paiements=len(payments),
-        derniere_livraison=derniere_livraison,
-        dernier_paiement=dernier_paiement
-    )
+    return balance
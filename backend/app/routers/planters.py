@@ -16,11 +16,19 @@ def list_planters(
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=10000),
     with_stats: bool = Query(False, description="Inclure les statistiques de livraison"),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="offset (page/total exact) ou cursor (pagination par clé)"),
+    cursor: Optional[str] = Query(None, description="Curseur renvoyé par next_cursor (active le mode cursor)"),
+    with_total: bool = Query(False, description="Mode cursor : inclure un total estimé"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     print(f"DEBUG: with_stats = {with_stats}, type = {type(with_stats)}")
-    planters, total = planter_service.get_planters(db, search, page, size)
+    next_cursor = None
+    cursor_mode = pagination == "cursor" or bool(cursor)
+    if cursor_mode:
+        planters, next_cursor, total = planter_service.get_planters_keyset(db, search, size, cursor, with_total)
+    else:
+        planters, total = planter_service.get_planters(db, search, page, size)
     
     # Enrichir avec le nom du chef planteur et optionnellement les stats
     items = []
@@ -48,7 +56,10 @@ def list_planters(
                 "updated_at": planter.updated_at
             }
         items.append(planter_dict)
-    return PaginatedResponse(items=items, page=page, size=size, total=total)
+    return PaginatedResponse(
+        items=items, page=page, size=size, total=total,
+        next_cursor=next_cursor, total_is_estimate=cursor_mode and total is not None
+    )
 
 @router.get("/{planter_id}", response_model=PlanterResponse)
 def get_planter(
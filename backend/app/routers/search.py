@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from ..database import get_db
+from ..middleware.auth import get_current_user
+from ..schemas.search import SearchResponse
+from ..services import search_service
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("", response_model=SearchResponse)
+def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    types: Optional[str] = Query(None, description="Types séparés par des virgules : planters,fournisseurs,cooperatives,users"),
+    limit: int = Query(search_service.DEFAULT_LIMIT, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Recherche approchée unifiée (insensible aux accents, tolérante aux fautes), triée par pertinence"""
+    wanted = [t.strip() for t in types.split(",")] if types else None
+    results = search_service.search_all(db, q, current_user, wanted, limit)
+    return SearchResponse(query=q, **{kind: [vars(r) for r in hits] for kind, hits in results.items()})
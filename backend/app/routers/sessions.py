@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session as DBSession
 from sqlalchemy import desc
 from ..database import get_db
 from ..middleware.auth import get_current_user
+from ..services.auth_cache import auth_cache
 from ..models import Session, User
 from datetime import datetime
 import logging
@@ -112,6 +113,7 @@ async def revoke_session(
         
         session.is_active = False
         db.commit()
+        auth_cache.invalidate_sessions([session.id])
         
         logger.info(f"Session {session_id} revoked by user {current_user.email}")
         
@@ -153,6 +155,7 @@ async def revoke_all_sessions(
         
         count = query.update({"is_active": False})
         db.commit()
+        auth_cache.invalidate_users([current_user.id])
         
         logger.info(f"Revoked {count} sessions for user {current_user.email}")
         
@@ -279,6 +282,7 @@ async def admin_revoke_session(
         
         session.is_active = False
         db.commit()
+        auth_cache.invalidate_sessions([session.id])
         
         logger.info(f"Session {session_id} revoked by admin {current_user.email}")
         
@@ -2,18 +2,26 @@ from fastapi import APIRouter, Depends
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 import asyncio
-import json
-from typing import AsyncGenerator
+from typing import AsyncGenerator, List, Tuple
 from ..database import get_db
 from ..middleware.auth import get_current_user
 from ..models.user import User
 from ..services import notification_service
+from ..services.event_bus import event_bus
+from ..utils.frames import Frame
 
 router = APIRouter(prefix="/sse", tags=["sse"])
 
 # Dictionnaire pour stocker les connexions actives par user_id
 active_connections: dict[str, list[asyncio.Queue]] = {}
 MAX_CONNECTIONS_PER_USER = 3  # Limiter les connexions par utilisateur
+# Topic du bus temps réel : chaque worker livre à ses propres connexions
+SSE_TOPIC = "sse.notification"
+
+# Événements fixes encodés une seule fois
+CONNECTED_EVENT = Frame({'type': 'connected', 'message': 'Connected to notification stream'}).sse()
+TIMEOUT_EVENT = Frame({'type': 'disconnect', 'reason': 'timeout'}).sse()
+PING_EVENT = Frame({'type': 'ping'}).sse()
 
 async def event_generator(user_id: str, db: Session) -> AsyncGenerator[str, None]:
     """Générateur d'événements SSE pour un utilisateur"""
@@ -36,7 +44,7 @@ async def event_generator(user_id: str, db: Session) -> AsyncGenerator[str, None
     
     try:
         # Envoyer un message de connexion initial
-        yield f"data: {json.dumps({'type': 'connected', 'message': 'Connected to notification stream'})}\n\n"
+        yield CONNECTED_EVENT
         
         # Boucle avec timeout pour éviter les connexions infinies
         max_duration = 3600  # 1 heure maximum
@@ -45,18 +53,19 @@ async def event_generator(user_id: str, db: Session) -> AsyncGenerator[str, None
         while True:
             # Vérifier le timeout global
             if asyncio.get_event_loop().time() - start_time > max_duration:
-                yield f"data: {json.dumps({'type': 'disconnect', 'reason': 'timeout'})}\n\n"
+                yield TIMEOUT_EVENT
                 break
             
             # Attendre un événement dans la queue
             try:
                 event = await asyncio.wait_for(queue.get(), timeout=30.0)
-                if event.get('type') == 'disconnect':
+                if isinstance(event, dict) and event.get('type') == 'disconnect':
                     break
-                yield f"data: {json.dumps(event)}\n\n"
+                # Frame partagée entre les connexions, déjà encodée
+                yield event.sse()
             except asyncio.TimeoutError:
                 # Envoyer un ping toutes les 30 secondes pour maintenir la connexion
-                yield f"data: {json.dumps({'type': 'ping'})}\n\n"
+                yield PING_EVENT
     except asyncio.CancelledError:
         pass
     finally:
@@ -103,14 +112,35 @@ async def notification_stream(
             status_code=401
         )
 
+def _deliver(event: dict) -> None:
+    """Handler du bus : remettre une notification aux connexions locales"""
+    queues = active_connections.get(event['user_id'])
+    if not queues:
+        return
+    frame = Frame({'type': 'notification', 'data': event['data']})
+    for queue in queues:
+        try:
+            queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Client trop lent : la notification reste consultable via l'API
+            pass
+
+event_bus.subscribe(SSE_TOPIC, _deliver)
+
 async def broadcast_notification(user_id: str, notification_data: dict):
-    """Envoyer une notification à un utilisateur spécifique"""
-    if user_id in active_connections:
-        for queue in active_connections[user_id]:
-            await queue.put({
-                'type': 'notification',
-                'data': notification_data
-            })
+    """Envoyer une notification à un utilisateur spécifique (tous workers)"""
+    event_bus.publish(SSE_TOPIC, {'user_id': user_id, 'data': notification_data})
+
+def broadcast_notifications(batch: List[Tuple[str, dict]]) -> None:
+    """
+    Envoyer un lot de (user_id, notification) en une seule publication.
+    Utilisable depuis la boucle d'événements ou depuis un thread du
+    threadpool (endpoints synchrones).
+    """
+    event_bus.publish_many(SSE_TOPIC, [
+        {'user_id': user_id, 'data': notification_data}
+        for user_id, notification_data in batch
+    ])
 
 async def broadcast_to_roles(db: Session, roles: list[str], notification_data: dict):
     """Envoyer une notification à tous les utilisateurs avec certains rôles"""
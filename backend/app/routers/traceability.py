@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
+from datetime import date
 from uuid import UUID
 
 from ..database import get_db
@@ -11,9 +13,12 @@ from ..schemas.traceability import (
     TraceabilityRecordResponse,
     TraceabilityScanCreate,
     TraceabilityScanResponse,
-    BlockchainVerificationResponse
+    BlockchainVerificationResponse,
+    LabelSheetRequest
 )
-from ..services.traceability_service import TraceabilityService, BlockchainService
+from ..services.traceability_service import TraceabilityService, BlockchainService, QRCodeService
+from ..services import label_service, qr_image_service
+from ..utils import http_cache
 
 router = APIRouter(prefix="/traceability", tags=["traceability"])
 
@@ -82,38 +87,79 @@ def get_delivery_timeline(
 
 @router.get("/blockchain/verify")
 def verify_blockchain(
+    full: bool = Query(False, description="Audit complet depuis le bloc 1 (admin) au lieu des seuls nouveaux blocs"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Vérifier l'intégrité de toute la blockchain"""
-    is_valid = BlockchainService.verify_chain(db)
+    """Vérifier l'intégrité de la blockchain (incrémentale depuis le dernier point de contrôle)"""
+    if full and current_user.role not in ['admin', 'superadmin']:
+        raise HTTPException(status_code=403, detail="Permission denied")
+    
+    verification = BlockchainService.verify_chain(db, full=full)
     
     total_blocks = db.query(TraceabilityRecord).count()
     
     return {
-        'is_valid': is_valid,
+        'is_valid': verification.is_valid,
         'total_blocks': total_blocks,
-        'message': 'Blockchain intègre' if is_valid else 'Blockchain compromise - Données altérées détectées'
+        'message': 'Blockchain intègre' if verification.is_valid else 'Blockchain compromise - Données altérées détectées',
+        'verification': verification.as_dict()
     }
 
 @router.get("/qr-code/{qr_code}/image")
 def get_qr_code_image(
     qr_code: str,
+    request: Request,
+    format: str = Query("png", pattern="^(png|svg)$", description="png ou svg"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Obtenir l'image du QR code"""
-    record = db.query(TraceabilityRecord).filter(
-        TraceabilityRecord.qr_code == qr_code
-    ).first()
+    """Obtenir l'image du QR code (rendue à la demande, mise en cache)"""
+    record = db.query(
+        TraceabilityRecord.qr_code,
+        TraceabilityRecord.delivery_id,
+        TraceabilityRecord.blockchain_hash
+    ).filter(TraceabilityRecord.qr_code == qr_code).first()
     
     if not record:
         raise HTTPException(status_code=404, detail="QR code non trouvé")
     
-    return {
-        'qr_code': record.qr_code,
-        'image': record.qr_code_image
-    }
+    payload = qr_image_service.record_payload(record)
+    etag = qr_image_service.etag(payload, format)
+    if http_cache.etag_matches(request, etag):
+        return http_cache.not_modified(etag)
+    
+    response = Response(content=qr_image_service.get_image(payload, format), media_type=QRCodeService.FORMATS[format])
+    http_cache.set_etag(response, etag)
+    return response
+
+@router.post("/labels")
+def get_label_sheet(
+    label_request: LabelSheetRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Planche d'étiquettes QR (PDF A4) pour une liste de livraisons ou une période"""
+    if label_request.per_page not in label_service.LAYOUTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"per_page doit valoir {', '.join(map(str, label_service.LAYOUTS))}"
+        )
+    try:
+        labels = label_service.fetch_labels(
+            db, label_request.delivery_ids, label_request.from_date, label_request.to_date
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not labels:
+        raise HTTPException(status_code=404, detail="Aucune livraison tracée à étiqueter")
+    
+    filename = f"etiquettes_qr_{date.today().isoformat()}.pdf"
+    return StreamingResponse(
+        label_service.label_sheet_stream(labels, label_request.per_page),
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
 
 @router.get("/stats")
 def get_traceability_stats(
@@ -126,7 +172,8 @@ def get_traceability_stats(
     from ..models.traceability import TraceabilityScan
     total_scans = db.query(TraceabilityScan).count()
     
-    is_blockchain_valid = BlockchainService.verify_chain(db)
+    # Vérification incrémentale : seuls les blocs ajoutés depuis le dernier appel sont relus
+    is_blockchain_valid = BlockchainService.verify_chain(db).is_valid
     
     return {
         'total_deliveries_tracked': total_records,
@@ -6,7 +6,8 @@ from datetime import datetime
 from pydantic import BaseModel
 from ..database import get_db
 from ..schemas import UserCreate, UserResponse, UserUpdate
-from ..services import auth_service
+from ..services import auth_service, search_service
+from ..services.auth_cache import auth_cache
 from ..middleware.auth import get_current_user
 from ..models import User, RoleChangeLog
 from ..core.permissions import (
@@ -66,18 +67,10 @@ def search_users(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Rechercher des utilisateurs par email"""
-    query = db.query(User)
-    
+    """Rechercher des utilisateurs par email (approchée, triée par pertinence)"""
     # Filtrer par zone si l'utilisateur n'est pas admin+
-    if current_user.role not in [Role.ADMIN.value, Role.SUPERADMIN.value]:
-        if current_user.zone:
-            query = query.filter(User.zone == current_user.zone)
-    
-    if q:
-        query = query.filter(User.email.ilike(f"%{q}%"))
-    
-    return query.limit(50).all()
+    query = search_service.visible_users(db, current_user)
+    return search_service.search(query, User.email, q).limit(50).all()
 
 
 @router.get("/me/permissions")
@@ -177,6 +170,7 @@ def change_user_role(
     db.add(log)
     db.commit()
     db.refresh(user)
+    auth_cache.invalidate_users([user.id])
     
     return user
 
@@ -212,6 +206,7 @@ def change_user_status(
     
     db.commit()
     db.refresh(user)
+    auth_cache.invalidate_users([user.id])
     
     return user
 
@@ -243,5 +238,6 @@ def delete_user(
     
     db.delete(user)
     db.commit()
+    auth_cache.invalidate_users([user_id])
     
     return {"message": "Utilisateur supprimé"}
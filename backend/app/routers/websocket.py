@@ -1,8 +1,9 @@
 """WebSocket pour la messagerie en temps réel"""
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query
 from sqlalchemy.orm import Session
-from typing import Dict, Set
+from typing import Dict, List, Optional, Set, Tuple
 from uuid import UUID
+import asyncio
 import json
 import logging
 from datetime import datetime
@@ -10,122 +11,228 @@ from datetime import datetime
 from ..database import get_db
 from ..models import User
 from ..services.messaging_service import MessagingService
+from ..services.event_bus import event_bus
+from ..utils.frames import Frame, as_frame
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Topic du bus temps réel pour les diffusions WebSocket
+WS_TOPIC = "ws.event"
+
+
+class _Connection:
+    """Connexion WebSocket avec sa file d'envoi bornée et sa tâche d'écriture"""
+    
+    def __init__(self, websocket: WebSocket, user_id: str, maxsize: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.task: Optional[asyncio.Task] = None
+    
+    def close(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
 
 class ConnectionManager:
-    """Gestionnaire de connexions WebSocket"""
+    """
+    Gestionnaire de connexions WebSocket
+    
+    Chaque connexion a sa propre file d'envoi bornée vidée par une tâche
+    d'écriture : une diffusion ne fait que déposer le message dans les files
+    (sans await), les envois vers les différents clients se font en
+    parallèle. Un client dont la file déborde ou dont un envoi dépasse
+    SEND_TIMEOUT est déconnecté plutôt que de ralentir les autres.
+    
+    Un index inverse utilisateur -> abonnements permet de nettoyer une
+    déconnexion en O(nombre d'abonnements de l'utilisateur).
+    """
+    # Messages en attente par connexion avant éviction
+    SEND_QUEUE_SIZE = 100
+    # Durée maximale (s) d'un envoi vers un client
+    SEND_TIMEOUT = 10.0
+    # Code de fermeture pour un client trop lent ("Try Again Later")
+    SLOW_CONSUMER_CLOSE_CODE = 1013
     
     def __init__(self):
-        # user_id -> Set[WebSocket]
-        self.active_connections: Dict[str, Set[WebSocket]] = {}
+        # user_id -> Set[_Connection]
+        self.active_connections: Dict[str, Set[_Connection]] = {}
+        # WebSocket -> _Connection
+        self.connections: Dict[WebSocket, _Connection] = {}
         # channel_id -> Set[user_id]
         self.channel_subscriptions: Dict[str, Set[str]] = {}
         # conversation_id -> Set[user_id]
         self.conversation_subscriptions: Dict[str, Set[str]] = {}
+        # user_id -> Set[(type, id)] : index inverse des abonnements
+        self.user_subscriptions: Dict[str, Set[Tuple[str, str]]] = {}
+        self.evicted = 0
+    
+    def _index(self, kind: str) -> Dict[str, Set[str]]:
+        return self.channel_subscriptions if kind == "channel" else self.conversation_subscriptions
     
     async def connect(self, websocket: WebSocket, user_id: str):
         """Connecter un utilisateur"""
         await websocket.accept()
         
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = set()
-        
-        self.active_connections[user_id].add(websocket)
+        connection = _Connection(websocket, user_id, self.SEND_QUEUE_SIZE)
+        connection.task = asyncio.create_task(self._writer(connection))
+        self.connections[websocket] = connection
+        self.active_connections.setdefault(user_id, set()).add(connection)
         logger.info(f"Utilisateur {user_id} connecté au WebSocket")
     
     def disconnect(self, websocket: WebSocket, user_id: str):
-        """Déconnecter un utilisateur"""
-        if user_id in self.active_connections:
-            self.active_connections[user_id].discard(websocket)
+        """Déconnecter un utilisateur (idempotent)"""
+        connection = self.connections.pop(websocket, None)
+        if connection is None:
+            return
+        connection.close()
+        
+        connections = self.active_connections.get(user_id)
+        if connections is not None:
+            connections.discard(connection)
             
-            if not self.active_connections[user_id]:
+            if not connections:
                 del self.active_connections[user_id]
                 
-                # Nettoyer les souscriptions
-                for channel_id in list(self.channel_subscriptions.keys()):
-                    self.channel_subscriptions[channel_id].discard(user_id)
-                    if not self.channel_subscriptions[channel_id]:
-                        del self.channel_subscriptions[channel_id]
-                
-                for conv_id in list(self.conversation_subscriptions.keys()):
-                    self.conversation_subscriptions[conv_id].discard(user_id)
-                    if not self.conversation_subscriptions[conv_id]:
-                        del self.conversation_subscriptions[conv_id]
+                # Nettoyer les souscriptions de cet utilisateur uniquement
+                for kind, topic_id in self.user_subscriptions.pop(user_id, set()):
+                    self._remove_subscriber(kind, topic_id, user_id)
         
         logger.info(f"Utilisateur {user_id} déconnecté du WebSocket")
     
+    def _remove_subscriber(self, kind: str, topic_id: str, user_id: str):
+        index = self._index(kind)
+        subscribers = index.get(topic_id)
+        if subscribers is not None:
+            subscribers.discard(user_id)
+            if not subscribers:
+                del index[topic_id]
+    
+    def _subscribe(self, kind: str, topic_id: str, user_id: str):
+        self._index(kind).setdefault(topic_id, set()).add(user_id)
+        self.user_subscriptions.setdefault(user_id, set()).add((kind, topic_id))
+    
+    def _unsubscribe(self, kind: str, topic_id: str, user_id: str):
+        self._remove_subscriber(kind, topic_id, user_id)
+        topics = self.user_subscriptions.get(user_id)
+        if topics is not None:
+            topics.discard((kind, topic_id))
+            if not topics:
+                del self.user_subscriptions[user_id]
+    
     def subscribe_to_channel(self, user_id: str, channel_id: str):
         """S'abonner à un canal"""
-        if channel_id not in self.channel_subscriptions:
-            self.channel_subscriptions[channel_id] = set()
-        
-        self.channel_subscriptions[channel_id].add(user_id)
+        self._subscribe("channel", channel_id, user_id)
         logger.info(f"Utilisateur {user_id} abonné au canal {channel_id}")
     
     def unsubscribe_from_channel(self, user_id: str, channel_id: str):
         """Se désabonner d'un canal"""
-        if channel_id in self.channel_subscriptions:
-            self.channel_subscriptions[channel_id].discard(user_id)
-            
-            if not self.channel_subscriptions[channel_id]:
-                del self.channel_subscriptions[channel_id]
-        
+        self._unsubscribe("channel", channel_id, user_id)
         logger.info(f"Utilisateur {user_id} désabonné du canal {channel_id}")
     
     def subscribe_to_conversation(self, user_id: str, conversation_id: str):
         """S'abonner à une conversation"""
-        if conversation_id not in self.conversation_subscriptions:
-            self.conversation_subscriptions[conversation_id] = set()
-        
-        self.conversation_subscriptions[conversation_id].add(user_id)
+        self._subscribe("conversation", conversation_id, user_id)
         logger.info(f"Utilisateur {user_id} abonné à la conversation {conversation_id}")
     
     def unsubscribe_from_conversation(self, user_id: str, conversation_id: str):
         """Se désabonner d'une conversation"""
-        if conversation_id in self.conversation_subscriptions:
-            self.conversation_subscriptions[conversation_id].discard(user_id)
-            
-            if not self.conversation_subscriptions[conversation_id]:
-                del self.conversation_subscriptions[conversation_id]
-        
+        self._unsubscribe("conversation", conversation_id, user_id)
         logger.info(f"Utilisateur {user_id} désabonné de la conversation {conversation_id}")
     
+    # Envoi : dépôt non bloquant dans les files des connexions
+    
+    async def _writer(self, connection: _Connection):
+        """Tâche d'écriture d'une connexion"""
+        try:
+            while True:
+                frame = await connection.queue.get()
+                await asyncio.wait_for(connection.websocket.send_text(frame.text), timeout=self.SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"Envoi WebSocket à {connection.user_id} échoué: {e}")
+            self._evict(connection)
+    
+    def _enqueue(self, connection: _Connection, frame: Frame):
+        try:
+            connection.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            logger.warning(f"Client WebSocket trop lent ({connection.user_id}), déconnexion")
+            self._evict(connection)
+    
+    def _evict(self, connection: _Connection):
+        """Retirer une connexion lente ou morte et fermer la socket"""
+        if connection.websocket not in self.connections:
+            return
+        self.evicted += 1
+        self.disconnect(connection.websocket, connection.user_id)
+        asyncio.ensure_future(self._close(connection.websocket))
+    
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=self.SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+    
+    async def send(self, websocket: WebSocket, message: dict):
+        """Envoyer un message sur une connexion précise (réponses au client)"""
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            self._enqueue(connection, as_frame(message))
+    
     async def send_personal_message(self, message: dict, user_id: str):
         """Envoyer un message à un utilisateur spécifique"""
-        if user_id in self.active_connections:
-            disconnected = set()
-            
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"Erreur lors de l'envoi à {user_id}: {e}")
-                    disconnected.add(connection)
-            
-            # Nettoyer les connexions mortes
-            for conn in disconnected:
-                self.active_connections[user_id].discard(conn)
+        frame = as_frame(message)
+        for connection in list(self.active_connections.get(user_id, ())):
+            self._enqueue(connection, frame)
+    
+    def _send_to_users(self, message: dict, user_ids, exclude_user: str = None):
+        # Encodé une fois pour tous les destinataires
+        frame = as_frame(message)
+        for user_id in user_ids:
+            if user_id != exclude_user:
+                for connection in list(self.active_connections.get(user_id, ())):
+                    self._enqueue(connection, frame)
+    
+    # Diffusion : publiée sur le bus temps réel, chaque worker livre ensuite
+    # aux utilisateurs connectés chez lui (voir handle_event)
     
     async def broadcast_to_channel(self, message: dict, channel_id: str, exclude_user: str = None):
         """Diffuser un message à tous les membres d'un canal"""
-        if channel_id in self.channel_subscriptions:
-            for user_id in self.channel_subscriptions[channel_id]:
-                if user_id != exclude_user:
-                    await self.send_personal_message(message, user_id)
+        event_bus.publish(WS_TOPIC, {
+            "scope": "channel", "target": channel_id, "exclude": exclude_user, "message": message
+        })
     
     async def broadcast_to_conversation(self, message: dict, conversation_id: str, exclude_user: str = None):
         """Diffuser un message aux participants d'une conversation"""
-        if conversation_id in self.conversation_subscriptions:
-            for user_id in self.conversation_subscriptions[conversation_id]:
-                if user_id != exclude_user:
-                    await self.send_personal_message(message, user_id)
+        event_bus.publish(WS_TOPIC, {
+            "scope": "conversation", "target": conversation_id, "exclude": exclude_user, "message": message
+        })
     
-    async def broadcast_user_status(self, user_id: str, status: str):
-        """Diffuser le statut d'un utilisateur à tous ses contacts"""
+    async def broadcast_user_status(
+        self,
+        user_id: str,
+        status: str,
+        topics: Optional[Dict[str, List[str]]] = None
+    ):
+        """
+        Diffuser le statut d'un utilisateur aux utilisateurs avec qui il partage
+        un canal ou une conversation. `topics` ({"channels": [...],
+        "conversations": [...]}) vient de ses appartenances en base ; à défaut,
+        ses abonnements sur ce worker.
+        """
+        if topics is None:
+            subscriptions = self.user_subscriptions.get(user_id, set())
+            topics = {
+                "channels": [t for kind, t in subscriptions if kind == "channel"],
+                "conversations": [t for kind, t in subscriptions if kind == "conversation"]
+            }
+        if not topics["channels"] and not topics["conversations"]:
+            return
+        
         message = {
             "type": "user_status",
             "data": {
@@ -134,14 +241,32 @@ class ConnectionManager:
                 "timestamp": datetime.now().isoformat()
             }
         }
+        event_bus.publish(WS_TOPIC, {
+            "scope": "status", "target": topics, "exclude": user_id, "message": message
+        })
+    
+    def handle_event(self, event: dict):
+        """Handler du bus : livrer un événement aux connexions locales"""
+        scope = event["scope"]
+        target = event["target"]
+        if scope == "channel":
+            recipients = self.channel_subscriptions.get(target, ())
+        elif scope == "conversation":
+            recipients = self.conversation_subscriptions.get(target, ())
+        elif scope == "status":
+            recipients = set()
+            for channel_id in target["channels"]:
+                recipients.update(self.channel_subscriptions.get(channel_id, ()))
+            for conversation_id in target["conversations"]:
+                recipients.update(self.conversation_subscriptions.get(conversation_id, ()))
+        else:
+            return
         
-        # Envoyer à tous les utilisateurs connectés (simplifié)
-        for uid in list(self.active_connections.keys()):
-            if uid != user_id:
-                await self.send_personal_message(message, uid)
+        self._send_to_users(event["message"], list(recipients), event["exclude"])
 
 
 manager = ConnectionManager()
+event_bus.subscribe(WS_TOPIC, manager.handle_event)
 
 
 async def get_current_user_ws(
@@ -225,7 +350,9 @@ async def websocket_endpoint(
         
         # Mettre à jour le statut en ligne
         MessagingService.update_user_status(db, user.id, 'online')
-        await manager.broadcast_user_status(user_id, 'online')
+        # Canaux et conversations de l'utilisateur : destinataires de son statut
+        topics = MessagingService.get_user_topic_ids(db, user.id)
+        await manager.broadcast_user_status(user_id, 'online', topics)
         
         try:
             while True:
@@ -238,7 +365,7 @@ async def websocket_endpoint(
                     channel_id = data.get("channel_id")
                     if channel_id:
                         manager.subscribe_to_channel(user_id, channel_id)
-                        await websocket.send_json({
+                        await manager.send(websocket, {
                             "type": "subscribed",
                             "data": {"channel_id": channel_id}
                         })
@@ -248,7 +375,7 @@ async def websocket_endpoint(
                     channel_id = data.get("channel_id")
                     if channel_id:
                         manager.unsubscribe_from_channel(user_id, channel_id)
-                        await websocket.send_json({
+                        await manager.send(websocket, {
                             "type": "unsubscribed",
                             "data": {"channel_id": channel_id}
                         })
@@ -258,7 +385,7 @@ async def websocket_endpoint(
                     conversation_id = data.get("conversation_id")
                     if conversation_id:
                         manager.subscribe_to_conversation(user_id, conversation_id)
-                        await websocket.send_json({
+                        await manager.send(websocket, {
                             "type": "subscribed",
                             "data": {"conversation_id": conversation_id}
                         })
@@ -268,7 +395,7 @@ async def websocket_endpoint(
                     conversation_id = data.get("conversation_id")
                     if conversation_id:
                         manager.unsubscribe_from_conversation(user_id, conversation_id)
-                        await websocket.send_json({
+                        await manager.send(websocket, {
                             "type": "unsubscribed",
                             "data": {"conversation_id": conversation_id}
                         })
@@ -341,7 +468,7 @@ async def websocket_endpoint(
                 
                 elif message_type == "ping":
                     # Répondre au ping
-                    await websocket.send_json({
+                    await manager.send(websocket, {
                         "type": "pong",
                         "timestamp": datetime.now().isoformat()
                     })
@@ -353,7 +480,7 @@ async def websocket_endpoint(
             # Déconnecter et mettre à jour le statut
             manager.disconnect(websocket, user_id)
             MessagingService.update_user_status(db, user.id, 'offline')
-            await manager.broadcast_user_status(user_id, 'offline')
+            await manager.broadcast_user_status(user_id, 'offline', topics)
     
     except Exception as e:
         logger.error(f"Erreur WebSocket: {e}")
@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Literal
+from datetime import datetime, date
+from uuid import UUID
+
+class ExportJobCreate(BaseModel):
+    format: Literal["excel", "pdf"] = Field(..., description="Format du fichier: excel ou pdf")
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+    planter_id: Optional[UUID] = None
+    load: Optional[str] = None
+    unload: Optional[str] = None
+    quality: Optional[str] = None
+
+class ExportJobResponse(BaseModel):
+    id: UUID
+    format: str
+    status: str
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    cached: bool = False
+    download_url: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
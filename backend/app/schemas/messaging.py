@@ -136,6 +136,17 @@ class MessageReadCreate(BaseModel):
     message_id: UUID
 
 
+class MarkReadUpTo(BaseModel):
+    """Marquer comme lus les messages d'un canal ou d'une conversation jusqu'à une date"""
+    channel_id: Optional[UUID] = None
+    conversation_id: Optional[UUID] = None
+    up_to: Optional[datetime] = None  # Par défaut : jusqu'au dernier message
+
+
+class ReadWatermark(BaseModel):
+    last_read_at: Optional[datetime] = None
+
+
 class PinMessageCreate(BaseModel):
     message_id: UUID
     channel_id: UUID
@@ -171,13 +182,23 @@ class MessageSearchQuery(BaseModel):
     from_date: Optional[datetime] = None
     to_date: Optional[datetime] = None
     limit: int = Field(default=50, le=100)
-    offset: int = Field(default=0, ge=0)
+    # Pagination par clé : `next_cursor` de la page précédente
+    cursor: Optional[str] = None
+    # Compter le total (requête supplémentaire)
+    with_total: bool = False
+
+
+class MessageSearchHit(Message):
+    snippet: Optional[str] = None  # Extrait avec les termes trouvés entre <mark></mark>
+    rank: Optional[float] = None  # Pertinence (mode plein texte)
 
 
 class MessageSearchResult(BaseModel):
-    messages: List[Message]
-    total: int
+    messages: List[MessageSearchHit]
+    total: Optional[int] = None
     has_more: bool
+    next_cursor: Optional[str] = None
+    mode: str = "fulltext"  # "fulltext" ou "substring"
 
 
 # Schémas pour les statistiques
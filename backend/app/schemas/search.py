@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from uuid import UUID
+
+
+class SearchResultItem(BaseModel):
+    type: str
+    label: str
+    score: float
+    id: Optional[UUID] = None
+    detail: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SearchResponse(BaseModel):
+    query: str
+    planters: List[SearchResultItem] = []
+    fournisseurs: List[SearchResultItem] = []
+    cooperatives: List[SearchResultItem] = []
+    users: List[SearchResultItem] = []
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List, Dict, Any
 from uuid import UUID
 
@@ -29,10 +29,11 @@ class TraceabilityRecordResponse(BaseModel):
     id: UUID
     delivery_id: UUID
     qr_code: str
-    qr_code_image: Optional[str]
+    qr_code_image_url: str
     blockchain_hash: str
     previous_hash: Optional[str]
     block_number: int
+    hash_version: int
     trace_data: Dict[str, Any]
     created_at: datetime
     verified_at: Optional[datetime]
@@ -46,5 +47,13 @@ class BlockchainVerificationResponse(BaseModel):
     blockchain_hash: str
     block_number: int
     previous_hash: Optional[str]
+    hash_version: int
     message: str
     trace_data: Dict[str, Any]
+
+class LabelSheetRequest(BaseModel):
+    """Livraisons à étiqueter : liste d'identifiants et/ou période (date de livraison)"""
+    delivery_ids: Optional[List[UUID]] = None
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+    per_page: int = 12
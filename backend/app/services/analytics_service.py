@@ -1,19 +1,27 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, and_
 from typing import Optional
 from datetime import date
-from ..models import Delivery, Planter, ChefPlanteur
+from ..models import DeliveryDailyRollup, Planter, ChefPlanteur
+
+# Les synthèses lisent l'agrégat journalier (delivery_daily_rollup) maintenu par
+# delivery_service : le coût dépend du nombre de jours, pas du nombre de livraisons.
+Rollup = DeliveryDailyRollup
+
+def _filter_period(query, from_date: Optional[date], to_date: Optional[date]):
+    if from_date:
+        query = query.filter(Rollup.day >= from_date)
+    if to_date:
+        query = query.filter(Rollup.day <= to_date)
+    return query
 
 def get_summary_by_planter(db: Session, from_date: Optional[date] = None, to_date: Optional[date] = None):
     query = db.query(
         Planter.name,
-        func.sum(Delivery.quantity_kg).label("total_kg")
-    ).join(Delivery, Planter.id == Delivery.planter_id)
+        func.sum(Rollup.unloaded_kg).label("total_kg")
+    ).join(Rollup, Planter.id == Rollup.planter_id)
     
-    if from_date:
-        query = query.filter(Delivery.date >= from_date)
-    if to_date:
-        query = query.filter(Delivery.date <= to_date)
+    query = _filter_period(query, from_date, to_date)
     
     results = query.group_by(Planter.name).all()
     total_general = sum(r.total_kg for r in results)
@@ -33,34 +41,28 @@ def get_summary_by_zones(
     # Synthèse détaillée par planteur et zone de chargement
     query_loaded = db.query(
         Planter.name.label("planter"),
-        Delivery.load_location.label("location"),
-        func.sum(Delivery.quantity_kg).label("total_kg")
-    ).join(Delivery, Planter.id == Delivery.planter_id)
+        Rollup.load_location.label("location"),
+        func.sum(Rollup.unloaded_kg).label("total_kg")
+    ).join(Rollup, Planter.id == Rollup.planter_id)
     
-    if from_date:
-        query_loaded = query_loaded.filter(Delivery.date >= from_date)
-    if to_date:
-        query_loaded = query_loaded.filter(Delivery.date <= to_date)
+    query_loaded = _filter_period(query_loaded, from_date, to_date)
     if load:
-        query_loaded = query_loaded.filter(Delivery.load_location.ilike(f"%{load}%"))
+        query_loaded = query_loaded.filter(Rollup.load_location.ilike(f"%{load}%"))
     
-    loaded_results = query_loaded.group_by(Planter.name, Delivery.load_location).all()
+    loaded_results = query_loaded.group_by(Planter.name, Rollup.load_location).all()
     
     # Synthèse détaillée par planteur et zone de déchargement
     query_unloaded = db.query(
         Planter.name.label("planter"),
-        Delivery.unload_location.label("location"),
-        func.sum(Delivery.quantity_kg).label("total_kg")
-    ).join(Delivery, Planter.id == Delivery.planter_id)
+        Rollup.unload_location.label("location"),
+        func.sum(Rollup.unloaded_kg).label("total_kg")
+    ).join(Rollup, Planter.id == Rollup.planter_id)
     
-    if from_date:
-        query_unloaded = query_unloaded.filter(Delivery.date >= from_date)
-    if to_date:
-        query_unloaded = query_unloaded.filter(Delivery.date <= to_date)
+    query_unloaded = _filter_period(query_unloaded, from_date, to_date)
     if unload:
-        query_unloaded = query_unloaded.filter(Delivery.unload_location.ilike(f"%{unload}%"))
+        query_unloaded = query_unloaded.filter(Rollup.unload_location.ilike(f"%{unload}%"))
     
-    unloaded_results = query_unloaded.group_by(Planter.name, Delivery.unload_location).all()
+    unloaded_results = query_unloaded.group_by(Planter.name, Rollup.unload_location).all()
     
     # Créer des dictionnaires pour les lieux de chargement et déchargement
     loaded_by_planter_location = {}
@@ -99,19 +101,16 @@ def get_summary_by_quality(
     quality: Optional[str] = None
 ):
     query = db.query(
-        Delivery.quality,
+        Rollup.quality,
         Planter.name,
-        func.sum(Delivery.quantity_kg).label("total_unloaded_kg")
-    ).join(Planter, Delivery.planter_id == Planter.id)
+        func.sum(Rollup.unloaded_kg).label("total_unloaded_kg")
+    ).join(Planter, Rollup.planter_id == Planter.id)
     
-    if from_date:
-        query = query.filter(Delivery.date >= from_date)
-    if to_date:
-        query = query.filter(Delivery.date <= to_date)
+    query = _filter_period(query, from_date, to_date)
     if quality:
-        query = query.filter(Delivery.quality.ilike(f"%{quality}%"))
+        query = query.filter(Rollup.quality.ilike(f"%{quality}%"))
     
-    results = query.group_by(Delivery.quality, Planter.name).order_by(Delivery.quality, Planter.name).all()
+    results = query.group_by(Rollup.quality, Planter.name).order_by(Rollup.quality, Planter.name).all()
     total = sum(r.total_unloaded_kg for r in results)
     
     return {
@@ -125,50 +124,31 @@ def get_summary_by_fournisseur(db: Session, from_date: Optional[date] = None, to
     - Total des livraisons de tous leurs planteurs
     - Quantité maximale déclarée
     - Pourcentage d'utilisation
+    
+    Une seule requête groupée (chef_planteurs -> planters -> agrégat journalier)
+    au lieu d'une requête par fournisseur. Les filtres de date sont placés dans
+    la condition de jointure pour conserver les fournisseurs sans livraison.
     """
-    # Récupérer tous les fournisseurs
-    all_fournisseurs = db.query(ChefPlanteur).all()
-    
-    # Pour chaque fournisseur, calculer les statistiques
-    results = []
-    for fournisseur in all_fournisseurs:
-        # Récupérer les IDs des planteurs de ce fournisseur
-        planter_ids = [p.id for p in fournisseur.planteurs]
-        
-        if not planter_ids:
-            # Pas de planteurs associés
-            results.append({
-                'id': fournisseur.id,
-                'name': fournisseur.name,
-                'quantite_max_kg': fournisseur.quantite_max_kg,
-                'total_loaded_kg': 0,
-                'total_unloaded_kg': 0,
-                'nombre_livraisons': 0
-            })
-            continue
-        
-        # Construire la requête pour les livraisons
-        delivery_query = db.query(
-            func.coalesce(func.sum(Delivery.quantity_loaded_kg), 0).label("total_loaded_kg"),
-            func.coalesce(func.sum(Delivery.quantity_kg), 0).label("total_unloaded_kg"),
-            func.count(Delivery.id).label("nombre_livraisons")
-        ).filter(Delivery.planter_id.in_(planter_ids))
-        
-        if from_date:
-            delivery_query = delivery_query.filter(Delivery.date >= from_date)
-        if to_date:
-            delivery_query = delivery_query.filter(Delivery.date <= to_date)
-        
-        stats = delivery_query.first()
-        
-        results.append({
-            'id': fournisseur.id,
-            'name': fournisseur.name,
-            'quantite_max_kg': fournisseur.quantite_max_kg,
-            'total_loaded_kg': stats.total_loaded_kg if stats else 0,
-            'total_unloaded_kg': stats.total_unloaded_kg if stats else 0,
-            'nombre_livraisons': stats.nombre_livraisons if stats else 0
-        })
+    rollup_join = Rollup.planter_id == Planter.id
+    if from_date:
+        rollup_join = and_(rollup_join, Rollup.day >= from_date)
+    if to_date:
+        rollup_join = and_(rollup_join, Rollup.day <= to_date)
+    
+    results = db.query(
+        ChefPlanteur.id,
+        ChefPlanteur.name,
+        ChefPlanteur.quantite_max_kg,
+        func.coalesce(func.sum(Rollup.loaded_kg), 0).label("total_loaded_kg"),
+        func.coalesce(func.sum(Rollup.unloaded_kg), 0).label("total_unloaded_kg"),
+        func.coalesce(func.sum(Rollup.delivery_count), 0).label("nombre_livraisons")
+    ).outerjoin(
+        Planter, Planter.chef_planteur_id == ChefPlanteur.id
+    ).outerjoin(
+        Rollup, rollup_join
+    ).group_by(
+        ChefPlanteur.id, ChefPlanteur.name, ChefPlanteur.quantite_max_kg
+    ).order_by(ChefPlanteur.name).all()
     
     items = []
     total_loaded = 0
@@ -176,22 +156,22 @@ def get_summary_by_fournisseur(db: Session, from_date: Optional[date] = None, to
     total_max = 0
     
     for r in results:
-        loaded = float(r['total_loaded_kg'])
-        unloaded = float(r['total_unloaded_kg'])
-        max_kg = float(r['quantite_max_kg'])
+        loaded = float(r.total_loaded_kg)
+        unloaded = float(r.total_unloaded_kg)
+        max_kg = float(r.quantite_max_kg)
         pertes = loaded - unloaded if loaded > 0 else 0
         pct_pertes = (pertes / loaded * 100) if loaded > 0 else 0
         pct_utilisation = (loaded / max_kg * 100) if max_kg > 0 else 0
         
         items.append({
-            "fournisseur": r['name'],
+            "fournisseur": r.name,
             "total_loaded_kg": loaded,
             "total_unloaded_kg": unloaded,
             "pertes_kg": pertes,
             "pct_pertes": pct_pertes,
             "quantite_max_kg": max_kg,
             "pct_utilisation": pct_utilisation,
-            "nombre_livraisons": r['nombre_livraisons']
+            "nombre_livraisons": int(r.nombre_livraisons)
         })
         
         total_loaded += loaded
@@ -53,7 +53,6 @@ class AuditService:
             
             db.add(audit_log)
             db.commit()
-            db.refresh(audit_log)
             
             logger.info(f"Audit log created: {action} {entity_type} by {user.email if user else 'system'}")
             return audit_log
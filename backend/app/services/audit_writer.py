@@ -0,0 +1,227 @@
+"""
+Écriture asynchrone et groupée du journal d'audit
+
+Le middleware d'audit dépose les événements dans une file bornée ; une tâche
+de fond les insère par lots (dès `batch_size` événements ou toutes les
+`flush_interval` secondes) dans un thread, hors de la boucle d'événements.
+
+Contre-pression : si la file est pleine, l'appelant attend au plus
+`enqueue_timeout` secondes puis l'événement est abandonné (compté dans
+les métriques) plutôt que de bloquer les requêtes.
+Un lot refusé par la base (contrainte, valeur trop longue) est redécoupé
+par dichotomie : seuls les événements fautifs sont écartés et journalisés.
+À l'arrêt, la file est vidée avant de rendre la main.
+"""
+from sqlalchemy import insert
+from sqlalchemy.exc import InterfaceError, OperationalError, StatementError
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+import asyncio
+import logging
+import time
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+def audit_event(
+    action: str,
+    entity_type: str,
+    entity_id: Optional[str] = None,
+    user: Any = None,
+    changes: Optional[Dict[str, Any]] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+    reason: Optional[str] = None
+) -> dict:
+    """
+    Construire un événement d'audit (mêmes clés pour tous les événements,
+    requis par l'insertion groupée). L'horodatage est celui de l'action,
+    pas celui de l'écriture.
+    """
+    return {
+        "user_id": user.id if user else None,
+        "user_email": user.email if user else "system",
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": str(entity_id) if entity_id else None,
+        "changes": changes,
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+        "reason": reason,
+        "created_at": datetime.now(timezone.utc)
+    }
+
+
+class AuditWriter:
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        enqueue_timeout: float = 0.05,
+        session_factory=SessionLocal
+    ):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.session_factory = session_factory
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.metrics = {
+            "enqueued": 0,
+            "dropped": 0,
+            "written": 0,
+            "failed": 0,
+            "flushes": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        logger.info("Audit writer started")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Vider la file puis arrêter la tâche de fond"""
+        if not self.running:
+            return
+        self._stopping = True
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Audit writer drain timed out, {self.queue.qsize()} events lost")
+            self._task.cancel()
+        self._task = None
+        logger.info("Audit writer stopped")
+
+    async def enqueue(self, event: dict) -> bool:
+        """
+        Ajouter un événement (dict de colonnes AuditLog).
+        Retourne False si l'événement a été abandonné (file saturée).
+        """
+        if not self.running:
+            # Pas de tâche de fond (scripts, tests) : écriture directe
+            await asyncio.to_thread(self._write_batch, [event])
+            return True
+
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self.queue.put(event), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.metrics["dropped"] += 1
+                if self.metrics["dropped"] % 100 == 1:
+                    logger.warning(f"Audit queue full, {self.metrics['dropped']} events dropped so far")
+                return False
+        self.metrics["enqueued"] += 1
+        return True
+
+    async def _next_batch(self) -> List[dict]:
+        """Attendre un premier événement puis compléter le lot jusqu'à taille ou délai"""
+        batch: List[dict] = []
+        try:
+            batch.append(await asyncio.wait_for(self.queue.get(), timeout=self.flush_interval))
+        except asyncio.TimeoutError:
+            return batch
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stopping:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while not (self._stopping and self.queue.empty()):
+            batch = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: List[dict]) -> None:
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._write_batch, batch)
+        except Exception as e:
+            self.metrics["failed"] += len(batch)
+            logger.error(f"Audit batch of {len(batch)} events failed: {e}")
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.metrics["flushes"] += 1
+        self.metrics["last_flush_ms"] = round(elapsed_ms, 2)
+        self.metrics["max_flush_ms"] = round(max(self.metrics["max_flush_ms"], elapsed_ms), 2)
+        self.metrics["total_flush_ms"] += elapsed_ms
+
+    def _write_batch(self, batch: List[dict]) -> None:
+        """Insérer un lot ; si la base refuse une ligne, isoler les fautives par dichotomie"""
+        try:
+            self._write(batch)
+        except StatementError as e:
+            # Base injoignable : rien à isoler, le lot entier échoue
+            if isinstance(e, (OperationalError, InterfaceError)):
+                raise
+            if len(batch) == 1:
+                event = batch[0]
+                self.metrics["failed"] += 1
+                logger.error(
+                    f"Audit event rejected ({event['action']} {event['entity_type']} "
+                    f"{event['entity_id']}): {getattr(e, 'orig', None) or e}"
+                )
+                return
+            middle = len(batch) // 2
+            self._write_batch(batch[:middle])
+            self._write_batch(batch[middle:])
+
+    def _write(self, batch: List[dict]) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(insert(AuditLog), batch)
+            db.commit()
+            self.metrics["written"] += len(batch)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get_metrics(self) -> dict:
+        flushes = self.metrics["flushes"]
+        return {
+            **{k: v for k, v in self.metrics.items() if k != "total_flush_ms"},
+            "avg_flush_ms": round(self.metrics["total_flush_ms"] / flushes, 2) if flushes else 0.0,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "queue_maxsize": self.maxsize,
+            "running": self.running
+        }
+
+
+# Instance globale
+audit_writer = AuditWriter(
+    maxsize=settings.AUDIT_QUEUE_MAXSIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL
+)
@@ -0,0 +1,253 @@
+"""
+Cache de résolution de l'utilisateur authentifié (get_current_user)
+
+Sans cache, chaque requête authentifiée charge l'utilisateur, cherche sa
+session par préfixe de jeton et commite `last_activity` : deux requêtes et
+une écriture par appel d'API. Ici :
+- l'utilisateur (copie détachée, rattachée à la session SQLAlchemy de la
+  requête par `merge(load=False)`, sans requête) et la session sont gardés
+  `ttl` secondes, par empreinte SHA-256 du jeton ;
+- `last_activity` est noté en mémoire et écrit par lots toutes les
+  `flush_interval` secondes (une seule mise à jour par session, quel que
+  soit le nombre de requêtes) par une tâche de fond ;
+- les entrées sont invalidées explicitement (révocation de session,
+  changement de rôle, désactivation, suppression) sur tous les workers via
+  le bus d'événements. Sans bus partagé, le TTL borne la durée pendant
+  laquelle un autre worker peut servir une entrée périmée. Une entrée
+  chargée avant une invalidation n'est pas mise en cache (`generation()`
+  relevé avant le chargement, vérifié par `put`).
+Le jeton JWT reste décodé à chaque requête (signature et expiration).
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+
+from sqlalchemy import bindparam, inspect, update
+from sqlalchemy.orm import make_transient_to_detached
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import User
+from ..models.session import Session as SessionModel
+from .event_bus import event_bus
+
+logger = logging.getLogger(__name__)
+
+AUTH_INVALIDATION_TOPIC = "auth.invalidate"
+
+
+@dataclass
+class AuthEntry:
+    user: User
+    session_id: Optional[int]
+    session_expires_at: Optional[datetime]
+    expires_at: float
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _detached_copy(user: User) -> User:
+    """Copie des colonnes, détachée et « propre » (comme fraîchement chargée)"""
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+class AuthCache:
+    def __init__(
+        self,
+        ttl: float = 30.0,
+        flush_interval: float = 30.0,
+        maxsize: int = 10000,
+        session_factory=SessionLocal
+    ):
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.maxsize = maxsize
+        self.session_factory = session_factory
+        self._entries: Dict[str, AuthEntry] = {}
+        self._by_user: Dict[str, Set[str]] = {}
+        self._by_session: Dict[int, Set[str]] = {}
+        self._activity: Dict[int, datetime] = {}
+        # Incrémenté à chaque invalidation (locale ou reçue du bus)
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    # --- Utilisateur et session par jeton ---
+
+    def get(self, key: str) -> Optional[AuthEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry.expires_at > time.monotonic():
+            return entry
+        return None
+
+    def generation(self) -> int:
+        """À relever avant de charger l'utilisateur, puis à passer à `put`"""
+        with self._lock:
+            return self._generation
+
+    def put(
+        self,
+        key: str,
+        user: User,
+        session: Optional[SessionModel],
+        generation: Optional[int] = None
+    ) -> AuthEntry:
+        """
+        Mettre en cache l'utilisateur et la session du jeton. Si une
+        invalidation a eu lieu depuis `generation`, l'entrée est renvoyée
+        sans être gardée : le chargement a pu précéder l'écriture invalidée.
+        """
+        entry = AuthEntry(
+            user=_detached_copy(user),
+            session_id=session.id if session else None,
+            session_expires_at=session.expires_at if session else None,
+            expires_at=time.monotonic() + self.ttl
+        )
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return entry
+            self._discard(key)
+            while len(self._entries) >= self.maxsize:
+                self._discard(next(iter(self._entries)))
+            self._entries[key] = entry
+            self._by_user.setdefault(str(user.id), set()).add(key)
+            if entry.session_id is not None:
+                self._by_session.setdefault(entry.session_id, set()).add(key)
+        return entry
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_keys = self._by_user.get(str(entry.user.id))
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._by_user[str(entry.user.id)]
+        if entry.session_id is not None:
+            session_keys = self._by_session.get(entry.session_id)
+            if session_keys is not None:
+                session_keys.discard(key)
+                if not session_keys:
+                    del self._by_session[entry.session_id]
+
+    def _apply(self, event: dict) -> None:
+        with self._lock:
+            self._generation += 1
+            if event.get("all"):
+                self._entries.clear()
+                self._by_user.clear()
+                self._by_session.clear()
+                return
+            keys = set()
+            for user_id in event.get("user_ids") or ():
+                keys |= self._by_user.get(user_id, set())
+            for session_id in event.get("session_ids") or ():
+                keys |= self._by_session.get(session_id, set())
+            for key in keys:
+                self._discard(key)
+
+    def _invalidate(self, event: dict) -> None:
+        self._apply(event)
+        event_bus.publish(AUTH_INVALIDATION_TOPIC, event)
+
+    def invalidate_users(self, user_ids: Iterable) -> None:
+        """Rôle, statut ou suppression : l'utilisateur sera rechargé"""
+        self._invalidate({"user_ids": [str(uid) for uid in user_ids]})
+
+    def invalidate_sessions(self, session_ids: Iterable[int]) -> None:
+        """Session révoquée : la session sera recherchée à nouveau"""
+        self._invalidate({"session_ids": [int(sid) for sid in session_ids]})
+
+    def invalidate_all(self) -> None:
+        self._invalidate({"all": True})
+
+    # --- last_activity groupé ---
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def touch(self, session_id: int) -> None:
+        """Noter l'activité d'une session (écrite au prochain lot)"""
+        now = datetime.utcnow()
+        if not self.running:
+            # Pas de tâche de fond (scripts, tests) : écriture directe
+            self._write({session_id: now})
+            return
+        with self._lock:
+            self._activity[session_id] = now
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Auth cache activity flusher started")
+
+    async def stop(self) -> None:
+        """Arrêter la tâche de fond après un dernier lot"""
+        if not self.running:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+        logger.info("Auth cache activity flusher stopped")
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await asyncio.to_thread(self.flush)
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._activity = self._activity, {}
+        if not pending:
+            return 0
+        try:
+            self._write(pending)
+        except Exception as e:
+            logger.error(f"Session activity flush of {len(pending)} sessions failed: {e}")
+            return 0
+        return len(pending)
+
+    def _write(self, activity: Dict[int, datetime]) -> None:
+        table = SessionModel.__table__
+        # Une seule instruction préparée, exécutée pour tout le lot ; ne recule jamais
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("sid"))
+            .where(table.c.last_activity < bindparam("ts"))
+            .values(last_activity=bindparam("ts"))
+        )
+        db = self.session_factory()
+        try:
+            db.execute(statement, [{"sid": sid, "ts": ts} for sid, ts in activity.items()])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# Instance globale
+auth_cache = AuthCache(
+    ttl=settings.AUTH_CACHE_TTL,
+    flush_interval=settings.SESSION_ACTIVITY_FLUSH_INTERVAL
+)
+event_bus.subscribe(AUTH_INVALIDATION_TOPIC, auth_cache._apply)
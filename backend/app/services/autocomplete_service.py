@@ -0,0 +1,190 @@
+"""
+Dictionnaires d'autocomplétion en mémoire : lieux de chargement et de
+déchargement, noms de coopératives
+
+Chaque dictionnaire garde ses valeurs distinctes dans deux tableaux triés :
+l'un par valeur (liste complète renvoyée au formulaire), l'autre par forme
+repliée (minuscules, sans accents) pour la recherche par préfixe en
+O(log n) avec `bisect`. Aucune requête n'est faite tant que le dictionnaire
+est à jour :
+- une création ajoute ses valeurs sur place (`record`) ;
+- une modification ou suppression peut faire disparaître une valeur : le
+  dictionnaire est marqué périmé (`invalidate`) et rechargé à la lecture
+  suivante (deux SELECT DISTINCT) ;
+- par sécurité (écritures hors des services), rechargement complet toutes
+  les REFRESH_INTERVAL secondes.
+Les changements sont diffusés aux autres workers par le bus d'événements.
+
+L'ETag est une empreinte du contenu : identique d'un worker à l'autre pour
+un même état, il permet de répondre 304 sans renvoyer la liste.
+"""
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import threading
+import time
+import unicodedata
+
+from sqlalchemy.orm import Session
+
+from ..models import ChefPlanteur, Delivery, Planter
+from .event_bus import event_bus
+
+LOAD_LOCATIONS = "load_locations"
+UNLOAD_LOCATIONS = "unload_locations"
+COOPERATIVES = "cooperatives"
+REFRESH_INTERVAL = 900
+AUTOCOMPLETE_TOPIC = "autocomplete.values"
+
+
+def fold(value: str) -> str:
+    """Forme de comparaison : sans accents, sans casse"""
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+class ValueDictionary:
+    def __init__(self, name: str, loader: Callable[[Session], Iterable[str]]):
+        self.name = name
+        self._loader = loader
+        self._values: List[str] = []
+        self._index: List[Tuple[str, str]] = []
+        self._etag: Optional[str] = None
+        self._expires_at = 0.0
+        # Incrémenté par add/invalidate : un chargement commencé avant est périmé
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _ensure(self, db: Session) -> None:
+        if self._expires_at > time.monotonic():
+            return
+        with self._lock:
+            generation = self._generation
+        expires_at = time.monotonic() + REFRESH_INTERVAL
+        values = {v for v in self._loader(db) if v}
+        with self._lock:
+            if self._expires_at > time.monotonic():
+                # Un chargement concurrent plus récent est déjà installé
+                return
+            self._values = sorted(values)
+            self._index = sorted((fold(v), v) for v in values)
+            self._etag = None
+            # Modifié pendant le chargement : résultat servi une fois, rechargé à la lecture suivante
+            self._expires_at = expires_at if generation == self._generation else 0.0
+
+    def values(self, db: Session) -> List[str]:
+        self._ensure(db)
+        return self._values
+
+    def etag(self, db: Session) -> str:
+        self._ensure(db)
+        with self._lock:
+            if self._etag is None:
+                digest = hashlib.sha256("\x1f".join(self._values).encode()).hexdigest()
+                self._etag = digest[:16]
+            return self._etag
+
+    def prefix(self, db: Session, text: str, limit: int = 20) -> List[str]:
+        """Valeurs dont la forme repliée commence par celle de `text`, triées"""
+        self._ensure(db)
+        key = fold(text.strip())
+        index = self._index
+        results = []
+        i = bisect_left(index, (key, ""))
+        while i < len(index) and len(results) < limit and index[i][0].startswith(key):
+            results.append(index[i][1])
+            i += 1
+        return results
+
+    def add(self, values: Iterable[str]) -> None:
+        """Ajout incrémental (sans effet tant que le dictionnaire n'est pas chargé)"""
+        with self._lock:
+            self._generation += 1
+            if not self._expires_at:
+                return
+            for value in values:
+                if not value:
+                    continue
+                i = bisect_left(self._values, value)
+                if i < len(self._values) and self._values[i] == value:
+                    continue
+                # Copie : les lecteurs en cours gardent l'ancien tableau intact
+                self._values = self._values[:i] + [value] + self._values[i:]
+                index = list(self._index)
+                insort(index, (fold(value), value))
+                self._index = index
+                self._etag = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._expires_at = 0.0
+
+
+def _load_locations(db: Session) -> Iterable[str]:
+    rows = db.query(Delivery.load_location).distinct().filter(Delivery.load_location.isnot(None))
+    return (r[0] for r in rows)
+
+
+def _unload_locations(db: Session) -> Iterable[str]:
+    rows = db.query(Delivery.unload_location).distinct().filter(Delivery.unload_location.isnot(None))
+    return (r[0] for r in rows)
+
+
+def _cooperatives(db: Session) -> Iterable[str]:
+    rows = db.query(Planter.cooperative).filter(Planter.cooperative.isnot(None)).union(
+        db.query(ChefPlanteur.cooperative).filter(ChefPlanteur.cooperative.isnot(None))
+    )
+    return (r[0] for r in rows)
+
+
+DICTIONARIES: Dict[str, ValueDictionary] = {
+    LOAD_LOCATIONS: ValueDictionary(LOAD_LOCATIONS, _load_locations),
+    UNLOAD_LOCATIONS: ValueDictionary(UNLOAD_LOCATIONS, _unload_locations),
+    COOPERATIVES: ValueDictionary(COOPERATIVES, _cooperatives),
+}
+
+
+def get_values(db: Session, name: str) -> List[str]:
+    return DICTIONARIES[name].values(db)
+
+
+def complete(db: Session, name: str, text: str, limit: int = 20) -> List[str]:
+    return DICTIONARIES[name].prefix(db, text, limit)
+
+
+def get_etag(db: Session, *names: str) -> str:
+    """ETag (fort) de l'état courant des dictionnaires `names`"""
+    parts = [DICTIONARIES[name].etag(db) for name in names]
+    return '"' + "-".join(parts) + '"'
+
+
+def _apply(event: dict) -> None:
+    dictionary = DICTIONARIES.get(event["name"])
+    if dictionary is None:
+        return
+    if event.get("values") is None:
+        dictionary.invalidate()
+    else:
+        dictionary.add(event["values"])
+
+
+def record(name: str, values: Iterable[Optional[str]]) -> None:
+    """Ajouter des valeurs créées (ici et sur les autres workers)"""
+    values = [v for v in values if v]
+    if not values:
+        return
+    event = {"name": name, "values": values}
+    _apply(event)
+    event_bus.publish(AUTOCOMPLETE_TOPIC, event)
+
+
+def invalidate(*names: str) -> None:
+    """Marquer périmés (une valeur a pu disparaître) ici et sur les autres workers"""
+    events = [{"name": name, "values": None} for name in names]
+    for event in events:
+        _apply(event)
+    event_bus.publish_many(AUTOCOMPLETE_TOPIC, events)
+
+
+event_bus.subscribe(AUTOCOMPLETE_TOPIC, _apply)
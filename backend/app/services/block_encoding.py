@@ -0,0 +1,126 @@
+"""
+Encodage canonique et versionné des blocs de traçabilité
+
+Le hash d'un bloc doit pouvoir être recalculé à l'identique à partir des
+seules colonnes stockées : numéro, hash précédent, horodatage (created_at
+de l'enregistrement) et trace_data.
+
+Version 1 (historique) : JSON trié incluant `datetime.utcnow()` au moment du
+calcul, jamais stocké : non reproductible, ces blocs doivent être rescellés
+(`BlockchainService.reseal_legacy_blocks`).
+
+Version 2 : encodage binaire compact, sans ambiguïté, indépendant de
+l'ordre des clés et du formatage :
+    en-tête  b"CTB" + octet de version
+    bloc     entier(numéro) + texte(hash précédent ou "0")
+             + entier(horodatage en µs depuis l'époque UTC) + valeur(data)
+    valeurs  N (None), T/F (booléens), I + texte décimal (entiers),
+             D + IEEE 754 big-endian 8 octets (flottants, -0.0 ramené à 0.0),
+             S + longueur varint + UTF-8 (textes),
+             L + nombre + éléments (listes),
+             M + nombre + paires triées par clé encodée (objets).
+Module sans dépendance à la base : utilisable dans les processus d'audit.
+"""
+from datetime import datetime
+from typing import Any, Iterable, Optional, Tuple
+import hashlib
+import math
+import struct
+
+HASH_VERSION_LEGACY = 1
+HASH_VERSION_CANONICAL = 2
+CURRENT_HASH_VERSION = HASH_VERSION_CANONICAL
+
+_MAGIC = b"CTB"
+_EPOCH = datetime(1970, 1, 1)
+
+# (numéro, version, hash précédent, horodatage, data, hash stocké)
+BlockRow = Tuple[int, int, Optional[str], datetime, Any, str]
+
+
+class LegacyBlockError(ValueError):
+    """Bloc de version 1 : hash non reproductible"""
+
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _text(value: str) -> bytes:
+    raw = value.encode("utf-8")
+    return b"S" + _varint(len(raw)) + raw
+
+
+def encode_value(value: Any) -> bytes:
+    if value is None:
+        return b"N"
+    if value is True:
+        return b"T"
+    if value is False:
+        return b"F"
+    if isinstance(value, int):
+        return b"I" + _text(str(value))[1:]
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(f"Non-finite float in block data: {value}")
+        return b"D" + struct.pack(">d", value + 0.0)
+    if isinstance(value, str):
+        return _text(value)
+    if isinstance(value, (list, tuple)):
+        return b"L" + _varint(len(value)) + b"".join(encode_value(v) for v in value)
+    if isinstance(value, dict):
+        pairs = sorted((_text(str(k)), encode_value(v)) for k, v in value.items())
+        return b"M" + _varint(len(pairs)) + b"".join(k + v for k, v in pairs)
+    raise TypeError(f"Unsupported type in block data: {type(value).__name__}")
+
+
+def timestamp_micros(timestamp: datetime) -> int:
+    """Horodatage naïf UTC (colonne DateTime) en microsecondes depuis l'époque"""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.replace(tzinfo=None) - timestamp.utcoffset()
+    delta = timestamp - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def encode_block(block_number: int, previous_hash: Optional[str], timestamp: datetime, data: Any) -> bytes:
+    return (
+        _MAGIC + bytes([HASH_VERSION_CANONICAL])
+        + encode_value(block_number)
+        + _text(previous_hash or "0")
+        + encode_value(timestamp_micros(timestamp))
+        + encode_value(data)
+    )
+
+
+def block_hash(
+    version: int,
+    block_number: int,
+    previous_hash: Optional[str],
+    timestamp: datetime,
+    data: Any
+) -> str:
+    if version == HASH_VERSION_CANONICAL:
+        return hashlib.sha256(encode_block(block_number, previous_hash, timestamp, data)).hexdigest()
+    if version == HASH_VERSION_LEGACY:
+        raise LegacyBlockError(f"Block #{block_number} uses the non-reproducible v1 hash")
+    raise ValueError(f"Unknown block hash version: {version}")
+
+
+def first_invalid(rows: Iterable[BlockRow]) -> Optional[Tuple[int, str]]:
+    """(numéro, raison) du premier bloc dont le hash ne se recalcule pas, ou None.
+    Point d'entrée des processus d'audit (fonction de module, picklable)."""
+    for number, version, previous_hash, timestamp, data, stored_hash in rows:
+        try:
+            if block_hash(version, number, previous_hash, timestamp, data) != stored_hash:
+                return number, "hash mismatch"
+        except LegacyBlockError:
+            return number, "legacy hash (v1), reseal required"
+    return None
@@ -5,6 +5,7 @@ from typing import Optional
 from uuid import UUID
 from ..models import ChefPlanteur, Planter, Delivery
 from ..schemas import ChefPlanteurCreate, ChefPlanteurUpdate
+from . import autocomplete_service
 
 def get_chef_planteurs(db: Session, skip: int = 0, limit: int = 100):
     return db.query(ChefPlanteur).offset(skip).limit(limit).all()
@@ -36,6 +37,7 @@ def create_chef_planteur(db: Session, chef_data: ChefPlanteurCreate, current_use
     db.add(chef)
     db.commit()
     db.refresh(chef)
+    autocomplete_service.record(autocomplete_service.COOPERATIVES, [chef.cooperative])
     
     # Créer une notification
     if current_user_id:
@@ -94,11 +96,14 @@ def update_chef_planteur(db: Session, chef_id: UUID, chef_data: ChefPlanteurUpda
         if existing:
             raise HTTPException(status_code=400, detail="Un chef planteur avec ce nom existe déjà")
     
+    previous_cooperative = chef.cooperative
     for key, value in chef_data.model_dump().items():
         setattr(chef, key, value)
     
     db.commit()
     db.refresh(chef)
+    if chef.cooperative != previous_cooperative:
+        autocomplete_service.invalidate(autocomplete_service.COOPERATIVES)
     
     # Créer une notification
     if current_user_id:
@@ -112,8 +117,11 @@ def update_chef_planteur(db: Session, chef_id: UUID, chef_data: ChefPlanteurUpda
 def delete_chef_planteur(db: Session, chef_id: UUID, current_user_id: Optional[UUID] = None):
     chef = get_chef_planteur(db, chef_id)
     chef_name = chef.name
+    cooperative = chef.cooperative
     db.delete(chef)
     db.commit()
+    if cooperative:
+        autocomplete_service.invalidate(autocomplete_service.COOPERATIVES)
     
     # Créer une notification
     if current_user_id:
@@ -5,22 +5,22 @@ from uuid import UUID
 from datetime import date
 from ..models import Collecte, ChefPlanteur
 from ..schemas.collecte import CollecteCreate, CollecteUpdate
+from ..utils.pagination import keyset_paginate, estimate_count
+from .entity_resolver import resolve_chefs
+from . import search_service
 
-def get_collectes(
+def build_collectes_query(
     db: Session,
     search: Optional[str] = None,
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
-    chef_planteur_id: Optional[UUID] = None,
-    page: int = 1,
-    size: int = 50
-) -> tuple[List[dict], int]:
+    chef_planteur_id: Optional[UUID] = None
+):
+    """Construit la requête filtrée des collectes (sans tri ni pagination)"""
     query = db.query(Collecte)
     
     if search:
-        query = query.join(ChefPlanteur).filter(
-            ChefPlanteur.name.ilike(f"%{search}%")
-        )
+        query = search_service.search(query.join(ChefPlanteur), ChefPlanteur.name, search, ranked=False)
     
     if from_date:
         query = query.filter(Collecte.date_collecte >= from_date)
@@ -31,18 +31,20 @@ def get_collectes(
     if chef_planteur_id:
         query = query.filter(Collecte.chef_planteur_id == chef_planteur_id)
     
-    total = query.count()
-    collectes = query.order_by(Collecte.date_collecte.desc()).offset((page - 1) * size).limit(size).all()
-    
-    # Enrichir avec les informations du fournisseur
+    return query
+
+def _enrich_collectes(db: Session, collectes: List[Collecte]) -> List[dict]:
+    """Enrichir avec les informations du fournisseur (chargés en une requête)"""
+    chefs = resolve_chefs(db, (c.chef_planteur_id for c in collectes))
     result = []
     for collecte in collectes:
+        chef = chefs.get(collecte.chef_planteur_id)
         collecte_dict = {
             "id": collecte.id,
             "designation": collecte.designation,
             "chef_planteur_id": collecte.chef_planteur_id,
-            "chef_planteur_name": collecte.chef_planteur.name if collecte.chef_planteur else None,
-            "chef_planteur_cooperative": collecte.chef_planteur.cooperative if collecte.chef_planteur else None,
+            "chef_planteur_name": chef.name if chef else None,
+            "chef_planteur_cooperative": chef.cooperative if chef else None,
             "quantity_loaded_kg": float(collecte.quantity_loaded_kg),
             "load_date": collecte.load_date,
             "quantity_unloaded_kg": float(collecte.quantity_unloaded_kg),
@@ -55,8 +57,40 @@ def get_collectes(
             "updated_at": collecte.updated_at
         }
         result.append(collecte_dict)
+    return result
+
+def get_collectes(
+    db: Session,
+    search: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    chef_planteur_id: Optional[UUID] = None,
+    page: int = 1,
+    size: int = 50
+) -> tuple[List[dict], int]:
+    query = build_collectes_query(db, search, from_date, to_date, chef_planteur_id)
+    
+    total = query.count()
+    collectes = query.order_by(Collecte.date_collecte.desc()).offset((page - 1) * size).limit(size).all()
+    
+    return _enrich_collectes(db, collectes), total
+
+def get_collectes_keyset(
+    db: Session,
+    search: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    chef_planteur_id: Optional[UUID] = None,
+    size: int = 50,
+    cursor: Optional[str] = None,
+    with_total: bool = False
+) -> tuple[List[dict], Optional[str], Optional[int]]:
+    """Pagination par curseur : (collectes, curseur suivant, total estimé ou None)"""
+    query = build_collectes_query(db, search, from_date, to_date, chef_planteur_id)
+    total = estimate_count(query) if with_total else None
     
-    return result, total
+    collectes, next_cursor = keyset_paginate(query, [Collecte.date_collecte, Collecte.id], cursor, size)
+    return _enrich_collectes(db, collectes), next_cursor, total
 
 def get_collecte(db: Session, collecte_id: UUID) -> Collecte:
     collecte = db.query(Collecte).filter(Collecte.id == collecte_id).first()
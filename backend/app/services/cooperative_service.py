@@ -0,0 +1,92 @@
+"""
+Statistiques des coopératives
+
+Une seule requête ensembliste : planteurs groupés par coopérative joints aux
+totaux de livraison (agrégat journalier), en UNION avec le nombre de
+fournisseurs par coopérative. Le résultat est mis en cache quelques secondes
+et tant que la version des données ne change pas.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, literal, union_all
+from typing import List
+from ..models import Planter, ChefPlanteur, Delivery, DeliveryDailyRollup
+from ..utils.cache import VersionedCache
+from .data_version_service import get_data_version
+
+# Durée pendant laquelle la liste est servie sans interroger la base
+COOPERATIVES_CACHE_TTL = 30
+
+_cache = VersionedCache(ttl=COOPERATIVES_CACHE_TTL)
+
+def _has_cooperative(column):
+    return (column.isnot(None)) & (column != '')
+
+def compute_cooperatives_stats(db: Session) -> List[dict]:
+    """Liste des coopératives avec effectifs et totaux, en une requête"""
+    totals = select(
+        DeliveryDailyRollup.planter_id,
+        func.sum(DeliveryDailyRollup.loaded_kg).label('charge'),
+        func.sum(DeliveryDailyRollup.unloaded_kg).label('decharge')
+    ).group_by(DeliveryDailyRollup.planter_id).subquery()
+
+    planteurs = select(
+        Planter.cooperative.label('nom'),
+        func.count(Planter.id).label('nb_planteurs'),
+        literal(0).label('nb_fournisseurs'),
+        func.coalesce(func.sum(totals.c.charge), 0).label('charge'),
+        func.coalesce(func.sum(totals.c.decharge), 0).label('decharge')
+    ).outerjoin(
+        totals, totals.c.planter_id == Planter.id
+    ).where(
+        _has_cooperative(Planter.cooperative)
+    ).group_by(Planter.cooperative)
+
+    fournisseurs = select(
+        ChefPlanteur.cooperative.label('nom'),
+        literal(0).label('nb_planteurs'),
+        func.count(ChefPlanteur.id).label('nb_fournisseurs'),
+        literal(0).label('charge'),
+        literal(0).label('decharge')
+    ).where(
+        _has_cooperative(ChefPlanteur.cooperative)
+    ).group_by(ChefPlanteur.cooperative)
+
+    combined = union_all(planteurs, fournisseurs).subquery()
+    rows = db.execute(
+        select(
+            combined.c.nom,
+            func.sum(combined.c.nb_planteurs).label('nb_planteurs'),
+            func.sum(combined.c.nb_fournisseurs).label('nb_fournisseurs'),
+            func.sum(combined.c.charge).label('charge'),
+            func.sum(combined.c.decharge).label('decharge')
+        ).group_by(combined.c.nom)
+    ).all()
+
+    cooperatives = []
+    for row in rows:
+        total_charge = float(row.charge or 0)
+        total_decharge = float(row.decharge or 0)
+        pertes = total_charge - total_decharge
+        pourcentage_pertes = (pertes / total_charge * 100) if total_charge > 0 else 0
+        cooperatives.append({
+            'nom': row.nom,
+            'nb_planteurs': int(row.nb_planteurs),
+            'nb_fournisseurs': int(row.nb_fournisseurs),
+            'total_charge_kg': total_charge,
+            'total_decharge_kg': total_decharge,
+            'pertes_kg': pertes,
+            'pourcentage_pertes': round(pourcentage_pertes, 2)
+        })
+
+    return sorted(cooperatives, key=lambda x: x['nom'])
+
+def get_cooperatives_stats(db: Session) -> List[dict]:
+    """Version mise en cache de compute_cooperatives_stats"""
+    return _cache.get_or_compute(
+        'cooperatives',
+        lambda: get_data_version(db, (Delivery, Planter, ChefPlanteur)),
+        lambda: compute_cooperatives_stats(db)
+    )
+
+def invalidate_cache() -> None:
+    _cache.invalidate()
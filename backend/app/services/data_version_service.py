@@ -0,0 +1,25 @@
+"""
+Version des données métier, utilisée comme clé de cache
+
+La version est une empreinte (nombre de lignes + dernière mise à jour) des
+tables concernées : toute création, modification ou suppression la change.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import Iterable
+import hashlib
+from ..models import Delivery, Planter, ChefPlanteur, Collecte
+
+# Tables prises en compte par défaut (données des exports et synthèses)
+DEFAULT_MODELS = (Delivery, Planter, ChefPlanteur, Collecte)
+
+def get_data_version(db: Session, models: Iterable = DEFAULT_MODELS) -> str:
+    """Retourne une empreinte courte de l'état des tables données"""
+    parts = []
+    for model in models:
+        count, last_update = db.query(
+            func.count(model.id),
+            func.max(model.updated_at)
+        ).one()
+        parts.append(f"{model.__tablename__}:{count}:{last_update.isoformat() if last_update else '-'}")
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
@@ -7,8 +7,12 @@ from datetime import date
 from decimal import Decimal
 from ..models import Delivery, Planter
 from ..schemas import DeliveryCreate, DeliveryUpdate
+from ..utils.pagination import keyset_paginate, estimate_count
+from . import rollup_service, autocomplete_service
 
-def get_deliveries(
+LOCATION_DICTIONARIES = (autocomplete_service.LOAD_LOCATIONS, autocomplete_service.UNLOAD_LOCATIONS)
+
+def build_deliveries_query(
     db: Session,
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
@@ -17,11 +21,9 @@ def get_deliveries(
     unload: Optional[str] = None,
     quality: Optional[str] = None,
     min_qty: Optional[Decimal] = None,
-    max_qty: Optional[Decimal] = None,
-    page: int = 1,
-    size: int = 50,
-    sort: str = "date"
-) -> tuple[List[Delivery], int]:
+    max_qty: Optional[Decimal] = None
+):
+    """Construit la requête filtrée des livraisons (sans tri ni pagination)"""
     query = db.query(Delivery)
     
     if from_date:
@@ -35,12 +37,32 @@ def get_deliveries(
     if unload:
         query = query.filter(Delivery.unload_location.ilike(f"%{unload}%"))
     if quality:
-        query = query.filter(Delivery.cocoa_quality.ilike(f"%{quality}%"))
+        query = query.filter(Delivery.quality.ilike(f"%{quality}%"))
     if min_qty:
         query = query.filter(Delivery.quantity_kg >= min_qty)
     if max_qty:
         query = query.filter(Delivery.quantity_kg <= max_qty)
     
+    return query
+
+def get_deliveries(
+    db: Session,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    planter_id: Optional[UUID] = None,
+    load: Optional[str] = None,
+    unload: Optional[str] = None,
+    quality: Optional[str] = None,
+    min_qty: Optional[Decimal] = None,
+    max_qty: Optional[Decimal] = None,
+    page: int = 1,
+    size: int = 50,
+    sort: str = "date"
+) -> tuple[List[Delivery], int]:
+    query = build_deliveries_query(
+        db, from_date, to_date, planter_id, load, unload, quality, min_qty, max_qty
+    )
+    
     if sort == "date":
         query = query.order_by(Delivery.date.desc())
     elif sort == "quantity":
@@ -50,6 +72,35 @@ def get_deliveries(
     deliveries = query.offset((page - 1) * size).limit(size).all()
     return deliveries, total
 
+def get_deliveries_keyset(
+    db: Session,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    planter_id: Optional[UUID] = None,
+    load: Optional[str] = None,
+    unload: Optional[str] = None,
+    quality: Optional[str] = None,
+    min_qty: Optional[Decimal] = None,
+    max_qty: Optional[Decimal] = None,
+    size: int = 50,
+    sort: str = "date",
+    cursor: Optional[str] = None,
+    with_total: bool = False
+) -> tuple[List[Delivery], Optional[str], Optional[int]]:
+    """Pagination par curseur : (livraisons, curseur suivant, total estimé ou None)"""
+    query = build_deliveries_query(
+        db, from_date, to_date, planter_id, load, unload, quality, min_qty, max_qty
+    )
+    total = estimate_count(query) if with_total else None
+    
+    if sort == "quantity":
+        columns = [Delivery.quantity_kg, Delivery.id]
+    else:
+        columns = [Delivery.date, Delivery.id]
+    
+    deliveries, next_cursor = keyset_paginate(query, columns, cursor, size)
+    return deliveries, next_cursor, total
+
 def get_delivery(db: Session, delivery_id: UUID) -> Delivery:
     delivery = db.query(Delivery).filter(Delivery.id == delivery_id).first()
     if not delivery:
@@ -66,8 +117,12 @@ def create_delivery(db: Session, delivery_data: DeliveryCreate, current_user_id:
     
     delivery = Delivery(**delivery_data.model_dump())
     db.add(delivery)
+    db.flush()
+    rollup_service.apply_delivery(db, rollup_service.snapshot_delivery(delivery))
     db.commit()
     db.refresh(delivery)
+    autocomplete_service.record(autocomplete_service.LOAD_LOCATIONS, [delivery.load_location])
+    autocomplete_service.record(autocomplete_service.UNLOAD_LOCATIONS, [delivery.unload_location])
     
     # Générer automatiquement la traçabilité blockchain
     try:
@@ -115,23 +170,29 @@ def create_delivery(db: Session, delivery_data: DeliveryCreate, current_user_id:
 
 def update_delivery(db: Session, delivery_id: UUID, delivery_data: DeliveryUpdate) -> Delivery:
     delivery = get_delivery(db, delivery_id)
+    previous = rollup_service.snapshot_delivery(delivery)
     for key, value in delivery_data.model_dump().items():
         setattr(delivery, key, value)
+    db.flush()
+    rollup_service.replace_delivery(db, previous, delivery)
     db.commit()
     db.refresh(delivery)
+    autocomplete_service.invalidate(*LOCATION_DICTIONARIES)
     return delivery
 
 def delete_delivery(db: Session, delivery_id: UUID) -> None:
     delivery = get_delivery(db, delivery_id)
+    rollup_service.apply_delivery(db, rollup_service.snapshot_delivery(delivery), sign=-1)
     db.delete(delivery)
     db.commit()
+    autocomplete_service.invalidate(*LOCATION_DICTIONARIES)
 
-def get_unique_locations(db: Session) -> dict:
-    """Récupère tous les lieux uniques de chargement et déchargement"""
-    load_locations = db.query(Delivery.load_location).distinct().filter(Delivery.load_location.isnot(None)).all()
-    unload_locations = db.query(Delivery.unload_location).distinct().filter(Delivery.unload_location.isnot(None)).all()
-    
-    return {
-        "load_locations": sorted([loc[0] for loc in load_locations if loc[0]]),
-        "unload_locations": sorted([loc[0] for loc in unload_locations if loc[0]])
-    }
+def get_unique_locations(db: Session, search: Optional[str] = None, limit: int = 20) -> dict:
+    """Récupère les lieux uniques de chargement et déchargement (dictionnaires en mémoire),
+    filtrés par préfixe si `search` est fourni"""
+    if search:
+        return {name: autocomplete_service.complete(db, name, search, limit) for name in LOCATION_DICTIONARIES}
+    return {name: autocomplete_service.get_values(db, name) for name in LOCATION_DICTIONARIES}
+
+def get_locations_etag(db: Session) -> str:
+    return autocomplete_service.get_etag(db, *LOCATION_DICTIONARIES)
@@ -0,0 +1,55 @@
+"""
+Résolution groupée des entités parentes (planteurs, fournisseurs)
+
+Au lieu d'un `db.query(Planter)` par ligne, on collecte les identifiants
+puis on charge tout en une requête `IN (...)`. Le résultat est une table
+d'identité {id: entité} réutilisable pendant toute la requête HTTP.
+"""
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, Optional, Type, TypeVar
+from uuid import UUID
+from ..models import Planter, ChefPlanteur
+
+T = TypeVar("T")
+
+# Taille maximale d'une liste IN (limite raisonnable pour le planificateur)
+RESOLVE_CHUNK_SIZE = 1000
+
+class EntityResolver:
+    """Table d'identité par modèle, alimentée par lots"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._cache: Dict[type, Dict[UUID, object]] = {}
+
+    def get_many(self, model: Type[T], ids: Iterable[Optional[UUID]]) -> Dict[UUID, T]:
+        """Charge les entités manquantes en une requête par lot et retourne {id: entité}"""
+        cache = self._cache.setdefault(model, {})
+        wanted = {i for i in ids if i is not None}
+        missing = [i for i in wanted if i not in cache]
+
+        for start in range(0, len(missing), RESOLVE_CHUNK_SIZE):
+            chunk = missing[start:start + RESOLVE_CHUNK_SIZE]
+            for entity in self.db.query(model).filter(model.id.in_(chunk)).all():
+                cache[entity.id] = entity
+
+        return {i: cache[i] for i in wanted if i in cache}
+
+    def get(self, model: Type[T], entity_id: Optional[UUID]) -> Optional[T]:
+        if entity_id is None:
+            return None
+        return self.get_many(model, [entity_id]).get(entity_id)
+
+    def planters(self, ids: Iterable[Optional[UUID]]) -> Dict[UUID, Planter]:
+        return self.get_many(Planter, ids)
+
+    def chefs(self, ids: Iterable[Optional[UUID]]) -> Dict[UUID, ChefPlanteur]:
+        return self.get_many(ChefPlanteur, ids)
+
+def resolve_planters(db: Session, ids: Iterable[Optional[UUID]]) -> Dict[UUID, Planter]:
+    """Raccourci : {planter_id: Planter} en une requête"""
+    return EntityResolver(db).planters(ids)
+
+def resolve_chefs(db: Session, ids: Iterable[Optional[UUID]]) -> Dict[UUID, ChefPlanteur]:
+    """Raccourci : {chef_planteur_id: ChefPlanteur} en une requête"""
+    return EntityResolver(db).chefs(ids)
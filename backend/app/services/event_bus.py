@@ -0,0 +1,263 @@
+"""
+Bus d'événements temps réel (SSE et WebSocket)
+
+Les connexions SSE/WebSocket sont locales à un worker : les producteurs
+publient sur le bus, et chaque worker livre l'événement à ses propres
+connexions via les handlers abonnés au topic.
+
+- InProcessBus : livraison directe dans le processus (un seul worker,
+  développement, tests).
+- PostgresBus : NOTIFY sur un canal PostgreSQL, chaque worker écoute
+  (LISTEN) et dispatche localement ; la livraison tient entre workers
+  uvicorn/gunicorn et réplicas. Y compris pour le worker émetteur, qui
+  reçoit ses propres notifications comme les autres.
+
+`publish` est non bloquant et utilisable depuis la boucle d'événements
+comme depuis un thread du threadpool (endpoints synchrones) : les handlers
+sont toujours exécutés dans la boucle du worker. Un handler peut être
+une coroutine, elle est alors planifiée en tâche.
+
+Livraison « au plus une fois » : un événement publié pendant une
+reconnexion de l'écoute PostgreSQL est perdu (les notifications restent
+consultables via l'API).
+"""
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import inspect
+import json
+import logging
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Any], Any]
+
+
+class EventBus(ABC):
+    """Interface des backends"""
+
+    def __init__(self):
+        self.handlers: Dict[str, List[Handler]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: set = set()
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        self.handlers.setdefault(topic, []).append(handler)
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self) -> None:
+        self._loop = None
+
+    def publish(self, topic: str, message: Any) -> None:
+        self.publish_many(topic, [message])
+
+    @abstractmethod
+    def publish_many(self, topic: str, messages: List[Any]) -> None:
+        """Publier plusieurs messages sur un topic"""
+
+    def _loop_for_dispatch(self) -> Optional[asyncio.AbstractEventLoop]:
+        if self._loop is not None and not self._loop.is_closed():
+            return self._loop
+        # Bus non démarré (scripts, tests) : boucle courante s'il y en a une
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+    def _on_loop(self, loop: asyncio.AbstractEventLoop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+    def _dispatch(self, topic: str, messages: List[Any]) -> None:
+        """Exécuter les handlers locaux (dans la boucle d'événements)"""
+        for handler in self.handlers.get(topic, []):
+            for message in messages:
+                try:
+                    result = handler(message)
+                    if inspect.isawaitable(result):
+                        task = asyncio.ensure_future(result)
+                        self._tasks.add(task)
+                        task.add_done_callback(self._tasks.discard)
+                except Exception as e:
+                    logger.error(f"Erreur du handler temps réel '{topic}': {e}")
+
+    def _dispatch_threadsafe(self, topic: str, messages: List[Any]) -> None:
+        loop = self._loop_for_dispatch()
+        if loop is None or not self.handlers.get(topic):
+            return
+        if self._on_loop(loop):
+            self._dispatch(topic, messages)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, topic, messages)
+
+
+class InProcessBus(EventBus):
+    def publish_many(self, topic: str, messages: List[Any]) -> None:
+        if messages:
+            self._dispatch_threadsafe(topic, messages)
+
+
+class PostgresBus(EventBus):
+    """
+    Un seul canal PostgreSQL pour tous les topics, payload JSON
+    {"t": topic, "d": message}. PostgreSQL limite un payload à 8000 octets :
+    un message plus gros n'est livré qu'aux connexions du worker émetteur.
+    Les publications depuis la boucle passent par un unique thread d'envoi :
+    elles atteignent pg_notify dans l'ordre où elles ont été faites.
+    """
+    CHANNEL = "realtime_events"
+    MAX_PAYLOAD = 7900
+    RECONNECT_DELAY = 1.0
+    MAX_RECONNECT_DELAY = 30.0
+
+    def __init__(self, engine=None):
+        super().__init__()
+        if engine is None:
+            from ..database import engine as default_engine
+            engine = default_engine
+        self.engine = engine
+        self._listener = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._sender: Optional[ThreadPoolExecutor] = None
+
+    async def start(self) -> None:
+        await super().start()
+        try:
+            await self._connect()
+        except Exception as e:
+            logger.error(f"Écoute temps réel indisponible, nouvelle tentative: {e}")
+            self._reconnect_task = asyncio.ensure_future(self._reconnect())
+
+    async def stop(self) -> None:
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        self._close_listener()
+        if self._sender is not None:
+            # Envoyer les notifications encore en file
+            await asyncio.to_thread(self._sender.shutdown)
+            self._sender = None
+        await super().stop()
+
+    # -- Publication --------------------------------------------------------
+
+    def publish_many(self, topic: str, messages: List[Any]) -> None:
+        payloads, local = [], []
+        for message in messages:
+            payload = json.dumps({"t": topic, "d": message}, default=str)
+            if len(payload.encode("utf-8")) > self.MAX_PAYLOAD:
+                logger.warning(f"Événement '{topic}' trop volumineux pour NOTIFY, livraison locale")
+                local.append(message)
+            else:
+                payloads.append(payload)
+
+        if local:
+            self._dispatch_threadsafe(topic, local)
+        if not payloads:
+            return
+
+        loop = self._loop_for_dispatch()
+        if loop is not None and self._on_loop(loop):
+            # Ne pas bloquer la boucle d'événements sur l'aller-retour SQL ;
+            # un seul thread : l'ordre de publication est conservé
+            if self._sender is None:
+                self._sender = ThreadPoolExecutor(max_workers=1, thread_name_prefix="realtime-notify")
+            self._sender.submit(self._notify, payloads)
+        else:
+            self._notify(payloads)
+
+    def _notify(self, payloads: List[str]) -> None:
+        from sqlalchemy import text
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(
+                    text("SELECT pg_notify(:channel, p) FROM unnest(CAST(:payloads AS text[])) AS p"),
+                    {"channel": self.CHANNEL, "payloads": payloads}
+                )
+        except Exception as e:
+            logger.error(f"Échec de la publication de {len(payloads)} événements temps réel: {e}")
+
+    # -- Écoute -------------------------------------------------------------
+
+    async def _connect(self) -> None:
+        self._listener = await asyncio.to_thread(self._open_listener)
+        self._loop.add_reader(self._listener.fileno(), self._on_readable)
+        logger.info(f"Écoute du canal PostgreSQL '{self.CHANNEL}'")
+
+    def _open_listener(self):
+        # Connexion dédiée hors pool : elle reste en LISTEN toute la vie du worker
+        dialect = self.engine.dialect
+        cargs, cparams = dialect.create_connect_args(self.engine.url)
+        conn = dialect.connect(*cargs, **cparams)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.CHANNEL}")
+        return conn
+
+    def _close_listener(self) -> None:
+        if self._listener is None:
+            return
+        try:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.remove_reader(self._listener.fileno())
+        except Exception:
+            pass
+        try:
+            self._listener.close()
+        except Exception:
+            pass
+        self._listener = None
+
+    def _on_readable(self) -> None:
+        try:
+            self._listener.poll()
+        except Exception as e:
+            logger.error(f"Connexion d'écoute temps réel perdue: {e}")
+            self._close_listener()
+            if self._reconnect_task is None:
+                self._reconnect_task = asyncio.ensure_future(self._reconnect())
+            return
+
+        by_topic: Dict[str, List[Any]] = {}
+        while self._listener.notifies:
+            notification = self._listener.notifies.pop(0)
+            try:
+                event = json.loads(notification.payload)
+            except ValueError:
+                continue
+            by_topic.setdefault(event.get("t"), []).append(event.get("d"))
+        for topic, messages in by_topic.items():
+            self._dispatch(topic, messages)
+
+    async def _reconnect(self) -> None:
+        delay = self.RECONNECT_DELAY
+        try:
+            while self._loop is not None:
+                await asyncio.sleep(delay)
+                try:
+                    await self._connect()
+                    return
+                except Exception as e:
+                    logger.warning(f"Reconnexion de l'écoute temps réel échouée: {e}")
+                    delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+        finally:
+            self._reconnect_task = None
+
+
+def create_bus(name: str) -> EventBus:
+    if name == "postgres":
+        return PostgresBus()
+    if name != "memory":
+        logger.warning(f"Bus temps réel inconnu '{name}', utilisation du bus en mémoire")
+    return InProcessBus()
+
+
+# Instance globale
+event_bus = create_bus(settings.REALTIME_BUS_BACKEND)
@@ -0,0 +1,272 @@
+"""
+Exports en arrière-plan
+
+POST crée une tâche, un pool de processus génère le fichier sur disque
+(openpyxl/reportlab ne bloquent ni la boucle d'événements ni un slot du
+threadpool), GET suit l'avancement. Les fichiers terminés sont réutilisés
+tant que (format, filtres, version des données) ne change pas.
+
+Rétention : à chaque création, les tâches en cours depuis plus de
+STALE_JOB_MINUTES sont marquées en échec, et les tâches terminées plus
+anciennes que EXPORT_RETENTION_HOURS ou au-delà des EXPORT_MAX_FILES plus
+récentes sont supprimées avec leur fichier.
+
+Un processus du pool tué (OOM, signal) casse tout le pool
+(BrokenProcessPool) : il est alors abandonné et recréé à la soumission
+suivante, et la tâche touchée est marquée en échec.
+"""
+from sqlalchemy.orm import Session
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta
+from typing import Optional
+from uuid import UUID
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+
+from ..config import settings
+from ..models import ExportJob
+from ..schemas.export_job import ExportJobCreate
+from .data_version_service import get_data_version
+
+logger = logging.getLogger(__name__)
+
+FILTER_FIELDS = ["from_date", "to_date", "planter_id", "load", "unload", "quality"]
+EXTENSIONS = {"excel": "xlsx", "pdf": "pdf"}
+# Une tâche non terminée au-delà de ce délai est considérée perdue (redémarrage)
+STALE_JOB_MINUTES = 30
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ProcessPoolExecutor:
+    """Pool de processus (exports, planches d'étiquettes) créé à la première utilisation"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn : pas de fork d'un processus uvicorn multi-thread ni de son pool SQL
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.EXPORT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+def _discard_executor(broken: ProcessPoolExecutor) -> None:
+    """Abandonner un pool cassé ; le prochain get_executor en crée un neuf"""
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+def submit(fn, *args) -> Future:
+    """Soumettre au pool partagé ; un pool cassé est remplacé et la soumission retentée une fois"""
+    executor = get_executor()
+    try:
+        return executor.submit(fn, *args)
+    except BrokenProcessPool:
+        logger.warning("Export process pool broken, recreating it")
+        _discard_executor(executor)
+        return get_executor().submit(fn, *args)
+
+def shutdown() -> None:
+    """Arrêter le pool (appelé à l'arrêt de l'application)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+def _serialize_filters(job_data: ExportJobCreate) -> dict:
+    filters = job_data.model_dump(include=set(FILTER_FIELDS))
+    return {
+        key: (value.isoformat() if isinstance(value, date) else str(value) if isinstance(value, UUID) else value)
+        for key, value in filters.items()
+    }
+
+def compute_cache_key(export_format: str, filters: dict, data_version: str) -> str:
+    payload = json.dumps({"format": export_format, "filters": filters, "version": data_version}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _delete_job(db: Session, job: ExportJob) -> None:
+    if job.file_path:
+        try:
+            os.remove(job.file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # Fichier indisponible : la ligne est conservée pour un prochain passage
+            logger.warning(f"Export file {job.file_path} could not be removed: {e}")
+            return
+    db.delete(job)
+
+def cleanup_jobs(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Marque en échec les tâches perdues et supprime les exports expirés
+    (fichier et ligne). Retourne le nombre de tâches supprimées.
+    """
+    now = now or datetime.utcnow()
+    stale = db.query(ExportJob).filter(
+        ExportJob.status.in_(["pending", "running"]),
+        ExportJob.created_at < now - timedelta(minutes=STALE_JOB_MINUTES)
+    ).all()
+    for job in stale:
+        job.status = "failed"
+        job.error = "Export interrompu (délai dépassé)"
+        job.completed_at = now
+
+    finished = db.query(ExportJob).filter(
+        ExportJob.status.in_(["completed", "failed"])
+    ).order_by(ExportJob.created_at.desc()).all()
+    expired = [
+        job for rank, job in enumerate(j for j in finished if j.status == "completed")
+        if rank >= settings.EXPORT_MAX_FILES
+    ]
+    cutoff = now - timedelta(hours=settings.EXPORT_RETENTION_HOURS)
+    expired += [job for job in finished if job.created_at < cutoff and job not in expired]
+    for job in expired:
+        _delete_job(db, job)
+    db.commit()
+    if stale or expired:
+        logger.info(f"Export cleanup: {len(stale)} stale jobs failed, {len(expired)} expired jobs removed")
+    return len(expired)
+
+def create_job(db: Session, job_data: ExportJobCreate, user_id: Optional[UUID] = None) -> tuple[ExportJob, bool]:
+    """
+    Crée une tâche d'export, ou réutilise une tâche identique.
+    Retourne (job, cached) ; cached=True si le fichier existe déjà.
+    """
+    cleanup_jobs(db)
+    filters = _serialize_filters(job_data)
+    cache_key = compute_cache_key(job_data.format, filters, get_data_version(db))
+
+    existing = db.query(ExportJob).filter(
+        ExportJob.cache_key == cache_key,
+        ExportJob.status.in_(["pending", "running", "completed"])
+    ).order_by(ExportJob.created_at.desc()).first()
+
+    if existing:
+        # Les tâches perdues viennent d'être marquées en échec par cleanup_jobs
+        if existing.status != "completed":
+            return existing, False
+        if existing.file_path and os.path.exists(existing.file_path):
+            return existing, True
+        # Fichier disparu : la tâche ne peut plus servir
+        db.delete(existing)
+        db.commit()
+
+    # La ligne doit être commitée avant la soumission : le processus la relit
+    job = ExportJob(
+        format=job_data.format,
+        filters=filters,
+        cache_key=cache_key,
+        status="pending",
+        created_by=user_id
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    os.makedirs(settings.EXPORT_DIR, exist_ok=True)
+    file_path = os.path.join(settings.EXPORT_DIR, f"{job.id}.{EXTENSIONS[job.format]}")
+    try:
+        future = submit(run_export_job, str(job.id), job.format, filters, file_path)
+    except BrokenProcessPool as e:
+        # Pas de tâche "pending" orpheline : les demandes identiques en recréeront une
+        logger.error(f"Export job {job.id} could not be submitted: {e}")
+        job.status = "failed"
+        job.error = "Pool d'export indisponible"
+        job.completed_at = datetime.utcnow()
+        db.commit()
+        return job, False
+    future.add_done_callback(lambda f, job_id=str(job.id): _log_failure(job_id, f))
+
+    return job, False
+
+def _log_failure(job_id: str, future) -> None:
+    exc = future.exception() if not future.cancelled() else None
+    if exc:
+        logger.error(f"Export job {job_id} crashed: {exc}")
+    if isinstance(exc, BrokenProcessPool):
+        # Processus tué avant d'avoir pu enregistrer l'échec
+        _mark_failed(job_id, "Processus d'export interrompu")
+
+def _mark_failed(job_id: str, error: str) -> None:
+    from ..database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.query(ExportJob).filter(
+            ExportJob.id == job_id,
+            ExportJob.status.in_(["pending", "running"])
+        ).update({"status": "failed", "error": error, "completed_at": datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        logger.error(f"Export job {job_id} could not be marked failed: {e}")
+    finally:
+        db.close()
+
+def get_job(db: Session, job_id: UUID) -> Optional[ExportJob]:
+    return db.query(ExportJob).filter(ExportJob.id == job_id).first()
+
+def run_export_job(job_id: str, export_format: str, filters: dict, file_path: str) -> Optional[str]:
+    """
+    Point d'entrée exécuté dans un processus du pool.
+    Ouvre sa propre session et met à jour le statut de la tâche.
+    """
+    from ..database import SessionLocal
+    from . import export_service
+
+    db = SessionLocal()
+    tmp_path = f"{file_path}.part"
+    try:
+        job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
+        if job is None:
+            # Tâche supprimée entre-temps (rétention) : rien à produire
+            logger.warning(f"Export job {job_id} no longer exists, skipped")
+            return None
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        db.commit()
+
+        args = dict(
+            from_date=date.fromisoformat(filters["from_date"]) if filters.get("from_date") else None,
+            to_date=date.fromisoformat(filters["to_date"]) if filters.get("to_date") else None,
+            load=filters.get("load"),
+            unload=filters.get("unload"),
+            quality=filters.get("quality")
+        )
+
+        with open(tmp_path, "wb") as output:
+            if export_format == "excel":
+                planter_id = UUID(filters["planter_id"]) if filters.get("planter_id") else None
+                for chunk in export_service.export_excel_stream(db, planter_id=planter_id, **args):
+                    output.write(chunk)
+            else:
+                output.write(export_service.export_pdf(db, **args).getvalue())
+        os.replace(tmp_path, file_path)
+
+        job.status = "completed"
+        job.file_path = file_path
+        job.file_size = os.path.getsize(file_path)
+        job.completed_at = datetime.utcnow()
+        db.commit()
+        return file_path
+    except Exception as e:
+        logger.error(f"Export job {job_id} failed: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        db.rollback()
+        job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
+        if job:
+            job.status = "failed"
+            job.error = str(e)[:1000]
+            job.completed_at = datetime.utcnow()
+            db.commit()
+        raise
+    finally:
+        db.close()
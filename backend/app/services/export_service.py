@@ -1,17 +1,24 @@
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, Iterator
 from datetime import date, datetime
 from uuid import UUID
 from decimal import Decimal
 import pandas as pd
+import tempfile
 from io import BytesIO
+from openpyxl import Workbook
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from .delivery_service import get_deliveries
+from .delivery_service import get_deliveries, build_deliveries_query
 from .analytics_service import get_summary_by_planter, get_summary_by_zones, get_summary_by_quality
-from ..models import Planter
+from .entity_resolver import resolve_planters, resolve_chefs
+from ..models import Planter, Delivery
+
+# Export Excel en flux : lignes lues par lots via un curseur serveur
+EXCEL_STREAM_BATCH_SIZE = 1000
+EXCEL_STREAM_CHUNK_SIZE = 64 * 1024
 
 def export_excel(
     db: Session,
@@ -27,9 +34,10 @@ def export_excel(
     with pd.ExcelWriter(output, engine='openpyxl') as writer:
         # Feuille 1: Données filtrées
         deliveries, _ = get_deliveries(db, from_date, to_date, planter_id, load, unload, quality, page=1, size=10000)
+        planters = resolve_planters(db, (d.planter_id for d in deliveries))
         data = []
         for d in deliveries:
-            planter = db.query(Planter).filter(Planter.id == d.planter_id).first()
+            planter = planters.get(d.planter_id)
             pertes = float(d.quantity_loaded_kg) - float(d.quantity_kg)
             pct_pertes = (pertes / float(d.quantity_loaded_kg) * 100) if d.quantity_loaded_kg > 0 else 0
             data.append({
@@ -43,7 +51,7 @@ def export_excel(
                 "% Pertes": round(pct_pertes, 2),
                 "Lieu chargement": d.load_location,
                 "Lieu déchargement": d.unload_location,
-                "Qualité": d.cocoa_quality,
+                "Qualité": d.quality,
                 "Notes": d.notes or ""
             })
         df_data = pd.DataFrame(data)
@@ -78,13 +86,15 @@ def export_excel(
         if to_date:
             collectes_query = collectes_query.filter(Collecte.date_collecte <= to_date)
         collectes = collectes_query.all()
+        chefs = resolve_chefs(db, (c.chef_planteur_id for c in collectes))
         
         collectes_data = []
         for c in collectes:
+            chef = chefs.get(c.chef_planteur_id)
             collectes_data.append({
                 "Désignation": c.designation,
-                "Fournisseur": c.chef_planteur.name if c.chef_planteur else "",
-                "Coopérative": c.chef_planteur.cooperative if c.chef_planteur and c.chef_planteur.cooperative else "",
+                "Fournisseur": chef.name if chef else "",
+                "Coopérative": chef.cooperative if chef and chef.cooperative else "",
                 "Date collecte": c.date_collecte,
                 "Quantité chargée (kg)": float(c.quantity_loaded_kg),
                 "Date chargement": c.load_date,
@@ -100,6 +110,128 @@ def export_excel(
     output.seek(0)
     return output
 
+def _append_summary_sheet(workbook: Workbook, title: str, items: list) -> None:
+    """Ajoute une feuille de synthèse (liste de dicts) à un classeur write-only"""
+    sheet = workbook.create_sheet(title)
+    if not items:
+        return
+    sheet.append(list(items[0].keys()))
+    for item in items:
+        sheet.append(list(item.values()))
+
+def export_excel_stream(
+    db: Session,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    planter_id: Optional[UUID] = None,
+    load: Optional[str] = None,
+    unload: Optional[str] = None,
+    quality: Optional[str] = None
+) -> Iterator[bytes]:
+    """
+    Export Excel à mémoire constante, sans limite de lignes.
+    
+    Les livraisons sont lues par lots (curseur serveur) avec les données du
+    planteur jointes dans la requête, puis écrites dans un classeur openpyxl
+    write-only. Le fichier .xlsx (archive zip) ne peut être écrit qu'à la
+    fin : il est finalisé dans un fichier temporaire, et rien n'est envoyé
+    au client avant que tout le classeur soit généré. Seule la mémoire est
+    constante ; le premier octet arrive après la génération complète.
+    """
+    from ..models import Collecte, ChefPlanteur
+    from .analytics_service import get_summary_by_fournisseur
+    
+    workbook = Workbook(write_only=True)
+    
+    # Feuille 1: Données filtrées
+    sheet = workbook.create_sheet("Livraisons")
+    sheet.append([
+        "Planteur", "CNI", "Coopérative", "Date", "Quantité chargée (kg)",
+        "Quantité déchargée (kg)", "Pertes (kg)", "% Pertes", "Lieu chargement",
+        "Lieu déchargement", "Qualité", "Notes"
+    ])
+    rows = build_deliveries_query(
+        db, from_date, to_date, planter_id, load, unload, quality
+    ).outerjoin(
+        Planter, Planter.id == Delivery.planter_id
+    ).with_entities(
+        Delivery.date, Delivery.quantity_loaded_kg, Delivery.quantity_kg,
+        Delivery.load_location, Delivery.unload_location, Delivery.quality, Delivery.notes,
+        Planter.name, Planter.cni, Planter.cooperative
+    ).order_by(Delivery.date.desc(), Delivery.id).execution_options(
+        stream_results=True
+    ).yield_per(EXCEL_STREAM_BATCH_SIZE)
+    
+    for row in rows:
+        loaded = float(row.quantity_loaded_kg)
+        unloaded = float(row.quantity_kg)
+        pertes = loaded - unloaded
+        pct_pertes = (pertes / loaded * 100) if loaded > 0 else 0
+        sheet.append([
+            row.name or "",
+            row.cni or "",
+            row.cooperative or "",
+            row.date,
+            loaded,
+            unloaded,
+            pertes,
+            round(pct_pertes, 2),
+            row.load_location,
+            row.unload_location,
+            row.quality,
+            row.notes or ""
+        ])
+    
+    # Feuilles 2 à 5: Synthèses (issues de l'agrégat journalier)
+    _append_summary_sheet(workbook, "Synthèse Planteur", get_summary_by_planter(db, from_date, to_date)["items"])
+    _append_summary_sheet(workbook, "Synthèse Zones", get_summary_by_zones(db, from_date, to_date, load, unload)["items"])
+    _append_summary_sheet(workbook, "Synthèse Qualité", get_summary_by_quality(db, from_date, to_date, quality)["items"])
+    _append_summary_sheet(workbook, "Synthèse Fournisseurs", get_summary_by_fournisseur(db, from_date, to_date)["items"])
+    
+    # Feuille 6: Collectes
+    sheet = workbook.create_sheet("Collectes")
+    sheet.append([
+        "Désignation", "Fournisseur", "Coopérative", "Date collecte", "Quantité chargée (kg)",
+        "Date chargement", "Quantité déchargée (kg)", "Date déchargement", "Pertes (kg)",
+        "% Pertes", "Suivi"
+    ])
+    collectes = db.query(
+        Collecte.designation, Collecte.date_collecte, Collecte.quantity_loaded_kg,
+        Collecte.load_date, Collecte.quantity_unloaded_kg, Collecte.unload_date, Collecte.suivi,
+        ChefPlanteur.name, ChefPlanteur.cooperative
+    ).outerjoin(ChefPlanteur, ChefPlanteur.id == Collecte.chef_planteur_id)
+    if from_date:
+        collectes = collectes.filter(Collecte.date_collecte >= from_date)
+    if to_date:
+        collectes = collectes.filter(Collecte.date_collecte <= to_date)
+    
+    for c in collectes.execution_options(stream_results=True).yield_per(EXCEL_STREAM_BATCH_SIZE):
+        loaded = float(c.quantity_loaded_kg)
+        unloaded = float(c.quantity_unloaded_kg)
+        pertes = loaded - unloaded
+        sheet.append([
+            c.designation,
+            c.name or "",
+            c.cooperative or "",
+            c.date_collecte,
+            loaded,
+            c.load_date,
+            unloaded,
+            c.unload_date,
+            pertes,
+            round((pertes / loaded * 100) if loaded > 0 else 0, 2),
+            c.suivi or ""
+        ])
+    
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            chunk = output.read(EXCEL_STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
 def export_pdf(
     db: Session,
     from_date: Optional[date] = None,
@@ -0,0 +1,190 @@
+"""
+Planches d'étiquettes QR imprimables (A4, N étiquettes par page)
+
+Les étiquettes (une par livraison tracée) sont sélectionnées par liste de
+livraisons ou par période. Les images déjà en cache (qr_image_service) sont
+réutilisées ; les autres sont rendues page par page dans le pool de
+processus des exports, toutes les pages étant soumises d'avance : pendant
+que la page k est dessinée, les suivantes se rendent en parallèle. Les
+images rendues alimentent le cache.
+
+reportlab n'écrit le PDF qu'à la fin (table des objets) : comme pour
+l'export Excel en flux, le document est finalisé dans un fichier
+temporaire puis renvoyé par morceaux.
+"""
+from dataclasses import dataclass
+from datetime import date
+from io import BytesIO
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+import tempfile
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+from sqlalchemy.orm import Session
+
+from ..models import Delivery, Planter, TraceabilityRecord
+from . import export_job_service, qr_image_service
+from .traceability_service import QRCodeService
+
+# Étiquettes par page : (colonnes, lignes)
+LAYOUTS: Dict[int, Tuple[int, int]] = {
+    4: (2, 2),
+    8: (2, 4),
+    12: (3, 4),
+    21: (3, 7),
+    24: (3, 8),
+}
+DEFAULT_PER_PAGE = 12
+MAX_LABELS = 2000
+MARGIN = 1 * cm
+FONT_SIZE = 7
+LINE_HEIGHT = FONT_SIZE + 2
+TEXT_LINES = 3
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class Label:
+    qr_code: str
+    payload: str
+    planter_name: Optional[str]
+    delivery_date: date
+    quantity_kg: float
+
+
+def fetch_labels(
+    db: Session,
+    delivery_ids: Optional[Sequence[UUID]] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None
+) -> List[Label]:
+    """Étiquettes des livraisons tracées, par date puis numéro de bloc"""
+    if not delivery_ids and not from_date and not to_date:
+        raise ValueError("Indiquer des livraisons ou une période")
+
+    query = db.query(
+        TraceabilityRecord.qr_code,
+        TraceabilityRecord.delivery_id,
+        TraceabilityRecord.blockchain_hash,
+        Planter.name,
+        Delivery.date,
+        Delivery.quantity_kg
+    ).join(
+        Delivery, Delivery.id == TraceabilityRecord.delivery_id
+    ).outerjoin(
+        Planter, Planter.id == Delivery.planter_id
+    )
+    if delivery_ids:
+        query = query.filter(TraceabilityRecord.delivery_id.in_(delivery_ids))
+    if from_date:
+        query = query.filter(Delivery.date >= from_date)
+    if to_date:
+        query = query.filter(Delivery.date <= to_date)
+
+    rows = query.order_by(Delivery.date, TraceabilityRecord.block_number).limit(MAX_LABELS + 1).all()
+    if len(rows) > MAX_LABELS:
+        raise ValueError(f"Trop d'étiquettes (maximum {MAX_LABELS}) : réduire la période")
+    return [
+        Label(
+            qr_code=r.qr_code,
+            payload=QRCodeService.payload(r.qr_code, r.delivery_id, r.blockchain_hash),
+            planter_name=r.name,
+            delivery_date=r.date,
+            quantity_kg=float(r.quantity_kg)
+        )
+        for r in rows
+    ]
+
+
+def render_images(payloads: List[str]) -> List[bytes]:
+    """Point d'entrée exécuté dans un processus du pool : PNG d'une page"""
+    return [QRCodeService.render(payload, "png") for payload in payloads]
+
+
+def _fit(c: canvas.Canvas, text: str, width: float) -> str:
+    """Tronquer `text` à la largeur disponible"""
+    if c.stringWidth(text, "Helvetica", FONT_SIZE) <= width:
+        return text
+    while text and c.stringWidth(text + "…", "Helvetica", FONT_SIZE) > width:
+        text = text[:-1]
+    return text + "…"
+
+
+def _draw_page(c: canvas.Canvas, labels: List[Label], images: List[bytes], per_page: int) -> None:
+    columns, rows = LAYOUTS[per_page]
+    page_width, page_height = A4
+    cell_width = (page_width - 2 * MARGIN) / columns
+    cell_height = (page_height - 2 * MARGIN) / rows
+    qr_size = min(cell_width, cell_height - TEXT_LINES * LINE_HEIGHT) - 0.4 * cm
+
+    for i, (label, image) in enumerate(zip(labels, images)):
+        x = MARGIN + (i % columns) * cell_width
+        y = page_height - MARGIN - (i // columns + 1) * cell_height
+
+        # Repères de découpe
+        c.setStrokeColor(colors.lightgrey)
+        c.setDash(2, 2)
+        c.rect(x, y, cell_width, cell_height)
+
+        c.drawImage(
+            ImageReader(BytesIO(image)),
+            x + (cell_width - qr_size) / 2,
+            y + TEXT_LINES * LINE_HEIGHT + 0.2 * cm,
+            qr_size,
+            qr_size
+        )
+        c.setFillColor(colors.black)
+        c.setFont("Helvetica", FONT_SIZE)
+        text_width = cell_width - 0.4 * cm
+        lines = [
+            label.planter_name or "-",
+            f"{label.delivery_date.strftime('%d/%m/%Y')} - {label.quantity_kg:,.0f} kg".replace(",", " "),
+            label.qr_code,
+        ]
+        for n, line in enumerate(lines):
+            c.drawCentredString(
+                x + cell_width / 2,
+                y + (TEXT_LINES - n) * LINE_HEIGHT - FONT_SIZE,
+                _fit(c, line, text_width)
+            )
+
+
+def label_sheet_stream(labels: List[Label], per_page: int = DEFAULT_PER_PAGE) -> Iterator[bytes]:
+    """PDF des étiquettes, renvoyé par morceaux"""
+    if per_page not in LAYOUTS:
+        raise ValueError(f"Étiquettes par page : {', '.join(map(str, LAYOUTS))}")
+    pages = [labels[i:i + per_page] for i in range(0, len(labels), per_page)]
+
+    # Images en cache lues tout de suite ; les manquantes soumises au pool, page par page
+    cached = [[qr_image_service.cached_image(label.payload, "png") for label in page] for page in pages]
+    futures = []
+    for page, images in zip(pages, cached):
+        missing = [label.payload for label, image in zip(page, images) if image is None]
+        futures.append(export_job_service.submit(render_images, missing) if missing else None)
+
+    with tempfile.TemporaryFile() as output:
+        try:
+            c = canvas.Canvas(output, pagesize=A4)
+            c.setTitle("Étiquettes de traçabilité")
+            for page, images, future in zip(pages, cached, futures):
+                if future is not None:
+                    rendered = iter(future.result())
+                    for i, label in enumerate(page):
+                        if images[i] is None:
+                            images[i] = next(rendered)
+                            qr_image_service.store_image(label.payload, "png", images[i])
+                _draw_page(c, page, images, per_page)
+                c.showPage()
+            c.save()
+        finally:
+            for future in futures:
+                if future is not None:
+                    future.cancel()
+
+        output.seek(0)
+        while chunk := output.read(STREAM_CHUNK_SIZE):
+            yield chunk
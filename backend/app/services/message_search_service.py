@@ -0,0 +1,218 @@
+"""
+Recherche plein texte dans les messages
+
+Deux modes, tous deux indexés :
+- "fulltext" : `to_tsvector('french_unaccent', content)` (index GIN
+  d'expression), requête `websearch_to_tsquery` (guillemets, OR, -mot),
+  insensible aux accents et à la flexion (configuration française +
+  unaccent), tri par pertinence `ts_rank_cd` puis date, extraits
+  `ts_headline`.
+- "substring" : `content ILIKE '%q%'` servi par l'index trigramme, pour les
+  requêtes courtes, composées uniquement de mots vides, ou quand la
+  recherche plein texte ne trouve rien (fragment de mot : « livr »).
+
+Pagination par clé (pas d'OFFSET ni de count()) : le curseur est préfixé
+par le mode pour que les pages suivantes restent dans le même mode.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+import html
+import re
+
+from fastapi import HTTPException
+from sqlalchemy import Float, and_, cast, func, literal_column, or_, select, tuple_
+from sqlalchemy.orm import Session, joinedload
+
+from ..models import ChannelMember, DirectConversation, Message
+from ..utils.pagination import decode_cursor, encode_cursor
+
+SEARCH_CONFIG = "french_unaccent"
+# En dessous, une requête est traitée en sous-chaîne (trigrammes)
+MIN_FULLTEXT_LENGTH = 3
+SNIPPET_CONTEXT = 60
+# Délimiteurs internes de ts_headline, remplacés par <mark> après échappement HTML
+_START, _STOP = "\x02", "\x03"
+HEADLINE_OPTIONS = (
+    f'StartSel="{_START}", StopSel="{_STOP}", MaxWords=30, MinWords=12, '
+    'MaxFragments=2, FragmentDelimiter=" … "'
+)
+
+_config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+
+
+@dataclass
+class SearchHit:
+    message: Message
+    snippet: str
+    rank: Optional[float] = None
+
+
+@dataclass
+class SearchPage:
+    hits: List[SearchHit] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    mode: str = "fulltext"
+
+
+def message_document():
+    """Expression indexée (doit rester identique à celle de l'index GIN)"""
+    return func.to_tsvector(_config, Message.content)
+
+
+def _mark(snippet: str) -> str:
+    return html.escape(snippet).replace(_START, "<mark>").replace(_STOP, "</mark>")
+
+
+def _substring_snippet(content: str, text: str) -> str:
+    match = re.search(re.escape(text), content, re.IGNORECASE)
+    if not match:
+        return html.escape(content[:2 * SNIPPET_CONTEXT])
+    start = max(0, match.start() - SNIPPET_CONTEXT)
+    end = min(len(content), match.end() + SNIPPET_CONTEXT)
+    return (
+        ("…" if start else "")
+        + html.escape(content[start:match.start()])
+        + "<mark>" + html.escape(match.group(0)) + "</mark>"
+        + html.escape(content[match.end():end])
+        + ("…" if end < len(content) else "")
+    )
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _base_query(
+    db: Session,
+    user_id: UUID,
+    channel_id: Optional[UUID],
+    conversation_id: Optional[UUID],
+    sender_id: Optional[UUID],
+    from_date: Optional[datetime],
+    to_date: Optional[datetime]
+):
+    """Messages visibles par l'utilisateur (ses canaux et conversations)"""
+    user_channels = select(ChannelMember.channel_id).where(ChannelMember.user_id == user_id)
+    user_conversations = select(DirectConversation.id).where(or_(
+        DirectConversation.user1_id == user_id,
+        DirectConversation.user2_id == user_id
+    ))
+    filters = [
+        Message.deleted_at.is_(None),
+        or_(
+            Message.channel_id.in_(user_channels),
+            Message.conversation_id.in_(user_conversations)
+        )
+    ]
+    if channel_id:
+        filters.append(Message.channel_id == channel_id)
+    if conversation_id:
+        filters.append(Message.conversation_id == conversation_id)
+    if sender_id:
+        filters.append(Message.sender_id == sender_id)
+    if from_date:
+        filters.append(Message.created_at >= from_date)
+    if to_date:
+        filters.append(Message.created_at <= to_date)
+    return db.query(Message).filter(and_(*filters))
+
+
+def _page(query, columns, cursor: Optional[str], limit: int):
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        query = query.filter(tuple_(*columns) < tuple_(*values))
+    rows = query.order_by(*[c.desc() for c in columns]).limit(limit + 1).all()
+    more = len(rows) > limit
+    return rows[:limit], more
+
+
+def _fulltext(base, text: str, cursor: Optional[str], limit: int) -> SearchPage:
+    tsquery = func.websearch_to_tsquery(_config, text)
+    document = message_document()
+    # float8 : valeur exacte, comparable sans perte à celle du curseur
+    rank = cast(func.ts_rank_cd(document, tsquery, 32), Float)
+    columns = [rank, Message.created_at, Message.id]
+
+    query = base.add_columns(
+        rank.label("rank"),
+        func.ts_headline(_config, Message.content, tsquery, HEADLINE_OPTIONS).label("snippet")
+    ).filter(document.op("@@")(tsquery))
+    rows, more = _page(query, columns, cursor, limit)
+
+    page = SearchPage(mode="fulltext")
+    page.hits = [SearchHit(message=m, snippet=_mark(snippet), rank=r) for m, r, snippet in rows]
+    if more:
+        last = rows[-1]
+        page.next_cursor = "f." + encode_cursor([last.rank, last.Message.created_at, last.Message.id])
+    return page
+
+
+def _substring(base, text: str, cursor: Optional[str], limit: int) -> SearchPage:
+    columns = [Message.created_at, Message.id]
+    query = base.filter(Message.content.ilike(f"%{_escape_like(text)}%", escape="\\"))
+    messages, more = _page(query, columns, cursor, limit)
+
+    page = SearchPage(mode="substring")
+    page.hits = [SearchHit(message=m, snippet=_substring_snippet(m.content, text)) for m in messages]
+    if more:
+        last = messages[-1]
+        page.next_cursor = "s." + encode_cursor([last.created_at, last.id])
+    return page
+
+
+def search_messages(
+    db: Session,
+    user_id: UUID,
+    text: str,
+    channel_id: Optional[UUID] = None,
+    conversation_id: Optional[UUID] = None,
+    sender_id: Optional[UUID] = None,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> SearchPage:
+    """Rechercher dans les messages visibles par l'utilisateur, par pages de `limit`"""
+    text = text.strip()
+    base = _base_query(db, user_id, channel_id, conversation_id, sender_id, from_date, to_date)
+    base = base.options(joinedload(Message.sender))
+
+    if cursor:
+        mode, _, cursor = cursor.partition(".")
+        if mode not in ("f", "s") or not cursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if mode == "f":
+            return _fulltext(base, text, cursor, limit)
+        return _substring(base, text, cursor, limit)
+
+    fulltext_possible = len(text) >= MIN_FULLTEXT_LENGTH and db.query(
+        func.numnode(func.websearch_to_tsquery(_config, text))
+    ).scalar() > 0
+    if fulltext_possible:
+        page = _fulltext(base, text, None, limit)
+        if page.hits:
+            return page
+    return _substring(base, text, None, limit)
+
+
+def count_matches(
+    db: Session,
+    user_id: UUID,
+    text: str,
+    mode: str,
+    channel_id: Optional[UUID] = None,
+    conversation_id: Optional[UUID] = None,
+    sender_id: Optional[UUID] = None,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None
+) -> int:
+    """Nombre total de résultats dans le mode de la recherche (une requête de plus)"""
+    text = text.strip()
+    base = _base_query(db, user_id, channel_id, conversation_id, sender_id, from_date, to_date)
+    if mode == "fulltext":
+        query = base.filter(message_document().op("@@")(func.websearch_to_tsquery(_config, text)))
+    else:
+        query = base.filter(Message.content.ilike(f"%{_escape_like(text)}%", escape="\\"))
+    return query.order_by(None).count()
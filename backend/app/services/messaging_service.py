@@ -1,21 +1,41 @@
 """Service pour le système de messagerie interne"""
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, func
+from sqlalchemy.orm import Session, joinedload, aliased
+from sqlalchemy import and_, or_, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from ..models import (
-    Channel, ChannelMember, DirectConversation, Message, MessageRead, 
+    Channel, ChannelMember, DirectConversation, Message, MessageReadWatermark,
     PinnedMessage, UserStatus, User
 )
 from ..schemas.messaging import (
     ChannelCreate, MessageCreate, DirectConversationCreate,
     MessageSearchQuery
 )
-from typing import List, Optional, Dict, Any
+from typing import Iterable, List, Optional, Dict, Any
 from uuid import UUID
 from datetime import datetime
 import logging
 
+from ..utils.cache import TTLCache
+from .entity_resolver import EntityResolver
+from .event_bus import event_bus
+from . import message_search_service
+
 logger = logging.getLogger(__name__)
 
+# Compteurs de non-lus par utilisateur : invalidés à l'envoi et à la lecture,
+# y compris sur les autres workers via le bus temps réel
+UNREAD_CACHE_TTL = 30
+UNREAD_TOPIC = "messaging.unread"
+UNREAD_INVALIDATION_CHUNK = 100
+_unread_cache = TTLCache(ttl=UNREAD_CACHE_TTL)
+
+
+def _on_unread_invalidation(event: dict) -> None:
+    _unread_cache.invalidate(event["user_ids"])
+
+
+event_bus.subscribe(UNREAD_TOPIC, _on_unread_invalidation)
+
 
 class MessagingService:
     """Service pour gérer la messagerie interne"""
@@ -80,6 +100,7 @@ class MessagingService:
         db.add(member)
         db.commit()
         db.refresh(member)
+        MessagingService.invalidate_unread_counts([user_id])
         
         # logger.info(f"Utilisateur {user_id} a rejoint le canal {channel_id}")
         return member
@@ -97,6 +118,7 @@ class MessagingService:
         if member:
             db.delete(member)
             db.commit()
+            MessagingService.invalidate_unread_counts([user_id])
             # logger.info(f"Utilisateur {user_id} a quitté le canal {channel_id}")
             return True
         
@@ -141,17 +163,15 @@ class MessagingService:
         sender_id: UUID
     ) -> Message:
         """Envoyer un message"""
-        # Vérifier les permissions
+        # Vérifier les permissions (et relever les destinataires pour le cache des non-lus)
         if message_data.channel_id:
-            is_member = db.query(ChannelMember).filter(
-                and_(
-                    ChannelMember.channel_id == message_data.channel_id,
-                    ChannelMember.user_id == sender_id
-                )
-            ).first()
+            member_ids = [row[0] for row in db.query(ChannelMember.user_id).filter(
+                ChannelMember.channel_id == message_data.channel_id
+            ).all()]
             
-            if not is_member:
+            if sender_id not in member_ids:
                 raise ValueError("Vous n'êtes pas membre de ce canal")
+            recipient_ids = member_ids
         
         elif message_data.conversation_id:
             conversation = db.query(DirectConversation).filter(
@@ -164,6 +184,10 @@ class MessagingService:
             
             if not conversation:
                 raise ValueError("Conversation non trouvée")
+            recipient_ids = [conversation.user1_id, conversation.user2_id]
+        
+        else:
+            recipient_ids = []
         
         message = Message(
             **message_data.dict(),
@@ -172,6 +196,9 @@ class MessagingService:
         db.add(message)
         db.commit()
         db.refresh(message)
+        MessagingService.invalidate_unread_counts(
+            [uid for uid in recipient_ids if uid != sender_id]
+        )
         
         # logger.info(f"Message envoyé par {sender_id}")
         return message
@@ -223,75 +250,275 @@ class MessagingService:
         ).all()
     
     @staticmethod
-    def mark_message_as_read(db: Session, message_id: UUID, user_id: UUID) -> MessageRead:
-        """Marquer un message comme lu"""
-        # Vérifier si déjà lu
-        existing = db.query(MessageRead).filter(
-            and_(
-                MessageRead.message_id == message_id,
-                MessageRead.user_id == user_id
+    def get_channel_listing(db: Session, user_id: UUID, public_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        Canaux de l'utilisateur (ou canaux publics) avec nombre de membres et
+        non-lus : une requête groupée + les compteurs de non-lus (en cache).
+        """
+        member_counts = db.query(
+            ChannelMember.channel_id.label("channel_id"),
+            func.count(ChannelMember.id).label("member_count")
+        ).group_by(ChannelMember.channel_id).subquery()
+        mine = aliased(ChannelMember)
+        membership = and_(mine.channel_id == Channel.id, mine.user_id == user_id)
+        
+        query = db.query(
+            Channel,
+            func.coalesce(member_counts.c.member_count, 0),
+            mine.id.isnot(None)
+        ).outerjoin(member_counts, member_counts.c.channel_id == Channel.id)
+        if public_only:
+            query = query.outerjoin(mine, membership).filter(Channel.type == 'public')
+        else:
+            query = query.join(mine, membership)
+        rows = query.order_by(Channel.name).all()
+        
+        unread = MessagingService.get_unread_counts(db, user_id)['channels']
+        return [
+            {
+                "id": channel.id,
+                "name": channel.name,
+                "display_name": channel.display_name,
+                "description": channel.description,
+                "type": channel.type,
+                "created_by": channel.created_by,
+                "created_at": channel.created_at,
+                "member_count": member_count,
+                "is_member": is_member,
+                "unread_count": unread.get(str(channel.id), 0) if is_member else 0
+            }
+            for channel, member_count, is_member in rows
+        ]
+    
+    @staticmethod
+    def get_conversation_listing(db: Session, user_id: UUID) -> List[Dict[str, Any]]:
+        """
+        Conversations de l'utilisateur avec interlocuteur, dernier message et
+        non-lus, en un nombre de requêtes fixe : conversations, interlocuteurs
+        (IN), derniers messages (fenêtre par conversation), non-lus (en cache).
+        """
+        conversations = MessagingService.get_user_conversations(db, user_id)
+        if not conversations:
+            return []
+        
+        other_ids = {
+            conv.user2_id if conv.user1_id == user_id else conv.user1_id
+            for conv in conversations
+        }
+        users = EntityResolver(db).get_many(User, other_ids)
+        
+        ranked = db.query(
+            Message.conversation_id.label("conversation_id"),
+            Message.content.label("content"),
+            Message.created_at.label("created_at"),
+            func.row_number().over(
+                partition_by=Message.conversation_id,
+                order_by=Message.created_at.desc()
+            ).label("rank")
+        ).filter(
+            Message.conversation_id.in_([conv.id for conv in conversations]),
+            Message.deleted_at.is_(None)
+        ).subquery()
+        last_messages = {
+            row.conversation_id: row
+            for row in db.query(ranked).filter(ranked.c.rank == 1).all()
+        }
+        
+        unread = MessagingService.get_unread_counts(db, user_id)['conversations']
+        result = []
+        for conv in conversations:
+            other_user = users.get(conv.user2_id if conv.user1_id == user_id else conv.user1_id)
+            last_message = last_messages.get(conv.id)
+            content = last_message.content if last_message else None
+            result.append({
+                "id": conv.id,
+                "user1_id": conv.user1_id,
+                "user2_id": conv.user2_id,
+                "created_at": conv.created_at,
+                "other_user": {
+                    "id": other_user.id,
+                    "email": other_user.email,
+                    "role": other_user.role
+                } if other_user else None,
+                "unread_count": unread.get(str(conv.id), 0),
+                "last_message": content[:50] + "..." if content and len(content) > 50 else content,
+                "last_message_at": last_message.created_at if last_message else None
+            })
+        return result
+    
+    @staticmethod
+    def get_user_topic_ids(db: Session, user_id: UUID) -> Dict[str, List[str]]:
+        """Identifiants des canaux et conversations d'un utilisateur (sans charger les objets)"""
+        channel_ids = db.query(ChannelMember.channel_id).filter(
+            ChannelMember.user_id == user_id
+        ).all()
+        conversation_ids = db.query(DirectConversation.id).filter(
+            or_(
+                DirectConversation.user1_id == user_id,
+                DirectConversation.user2_id == user_id
             )
-        ).first()
+        ).all()
+        return {
+            "channels": [str(row[0]) for row in channel_ids],
+            "conversations": [str(row[0]) for row in conversation_ids]
+        }
+
+    @staticmethod
+    def mark_read_up_to(
+        db: Session,
+        user_id: UUID,
+        channel_id: Optional[UUID] = None,
+        conversation_id: Optional[UUID] = None,
+        up_to: Optional[datetime] = None
+    ) -> Optional[datetime]:
+        """
+        Marquer comme lus tous les messages d'un canal ou d'une conversation
+        jusqu'à `up_to` inclus (par défaut : le dernier message). Le filigrane
+        n'avance jamais en arrière. Retourne le filigrane résultant.
+        """
+        if (channel_id is None) == (conversation_id is None):
+            raise ValueError("Préciser un canal ou une conversation")
+        
+        if channel_id is not None:
+            allowed = db.query(ChannelMember.id).filter(
+                ChannelMember.channel_id == channel_id,
+                ChannelMember.user_id == user_id
+            ).first()
+            if not allowed:
+                raise ValueError("Vous n'êtes pas membre de ce canal")
+            target, target_id = MessageReadWatermark.channel_id, channel_id
+        else:
+            allowed = db.query(DirectConversation.id).filter(
+                DirectConversation.id == conversation_id,
+                or_(
+                    DirectConversation.user1_id == user_id,
+                    DirectConversation.user2_id == user_id
+                )
+            ).first()
+            if not allowed:
+                raise ValueError("Conversation non trouvée")
+            target, target_id = MessageReadWatermark.conversation_id, conversation_id
         
-        if existing:
-            return existing
+        if up_to is None:
+            message_target = Message.channel_id if channel_id is not None else Message.conversation_id
+            up_to = db.query(func.max(Message.created_at)).filter(message_target == target_id).scalar()
+            if up_to is None:
+                return None
         
-        read = MessageRead(
-            message_id=message_id,
-            user_id=user_id
+        stmt = pg_insert(MessageReadWatermark).values(
+            user_id=user_id,
+            channel_id=channel_id,
+            conversation_id=conversation_id,
+            last_read_at=up_to
         )
-        db.add(read)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MessageReadWatermark.user_id, target],
+            index_where=target.isnot(None),
+            set_={
+                "last_read_at": func.greatest(MessageReadWatermark.last_read_at, stmt.excluded.last_read_at),
+                "updated_at": func.now()
+            }
+        ).returning(MessageReadWatermark.last_read_at)
+        last_read_at = db.execute(stmt).scalar()
         db.commit()
-        db.refresh(read)
+        MessagingService.invalidate_unread_counts([user_id])
         
-        return read
+        return last_read_at
+    
+    @staticmethod
+    def mark_message_as_read(db: Session, message_id: UUID, user_id: UUID) -> Optional[datetime]:
+        """Marquer un message comme lu (et tous les précédents du même fil)"""
+        message = db.query(
+            Message.channel_id, Message.conversation_id, Message.created_at
+        ).filter(Message.id == message_id).first()
+        
+        if not message:
+            return None
+        
+        return MessagingService.mark_read_up_to(
+            db, user_id,
+            channel_id=message.channel_id,
+            conversation_id=message.conversation_id if message.channel_id is None else None,
+            up_to=message.created_at
+        )
     
     @staticmethod
     def get_unread_counts(db: Session, user_id: UUID) -> Dict[str, Any]:
-        """Obtenir le nombre de messages non lus"""
+        """Obtenir le nombre de messages non lus (cache par utilisateur)"""
+        return _unread_cache.get_or_compute(
+            str(user_id), lambda: MessagingService._compute_unread_counts(db, user_id)
+        )
+    
+    @staticmethod
+    def invalidate_unread_counts(user_ids: Optional[Iterable[UUID]] = None) -> None:
+        """Invalider les compteurs de non-lus (tous si `user_ids` est None), sur tous les workers"""
+        if user_ids is None:
+            _unread_cache.invalidate()
+            event_bus.publish(UNREAD_TOPIC, {"user_ids": None})
+            return
+        keys = [str(uid) for uid in user_ids]
+        if not keys:
+            return
+        # Localement tout de suite, puis pour les autres workers
+        _unread_cache.invalidate(keys)
+        event_bus.publish_many(UNREAD_TOPIC, [
+            {"user_ids": keys[i:i + UNREAD_INVALIDATION_CHUNK]}
+            for i in range(0, len(keys), UNREAD_INVALIDATION_CHUNK)
+        ])
+    
+    @staticmethod
+    def _compute_unread_counts(db: Session, user_id: UUID) -> Dict[str, Any]:
+        """
+        Non-lus groupés par canal et par conversation (deux requêtes) : messages
+        postérieurs au filigrane de lecture, soit un parcours de plage sur
+        (channel_id, created_at) / (conversation_id, created_at). Voir
+        MessageReadWatermark pour la tolérance de la comparaison sur created_at.
+        """
+        Watermark = MessageReadWatermark
+        
         # Messages non lus dans les canaux
         channel_unreads = db.query(
             Message.channel_id,
             func.count(Message.id).label('count')
-        ).outerjoin(
-            MessageRead,
-            and_(
-                MessageRead.message_id == Message.id,
-                MessageRead.user_id == user_id
-            )
         ).join(
             ChannelMember,
             and_(
                 ChannelMember.channel_id == Message.channel_id,
                 ChannelMember.user_id == user_id
             )
+        ).outerjoin(
+            Watermark,
+            and_(
+                Watermark.user_id == user_id,
+                Watermark.channel_id == Message.channel_id
+            )
         ).filter(
             Message.sender_id != user_id,
-            MessageRead.id.is_(None),
-            Message.deleted_at.is_(None)
+            Message.deleted_at.is_(None),
+            or_(Watermark.last_read_at.is_(None), Message.created_at > Watermark.last_read_at)
         ).group_by(Message.channel_id).all()
         
         # Messages non lus dans les conversations
         conversation_unreads = db.query(
             Message.conversation_id,
             func.count(Message.id).label('count')
-        ).outerjoin(
-            MessageRead,
-            and_(
-                MessageRead.message_id == Message.id,
-                MessageRead.user_id == user_id
-            )
         ).join(
             DirectConversation,
             DirectConversation.id == Message.conversation_id
+        ).outerjoin(
+            Watermark,
+            and_(
+                Watermark.user_id == user_id,
+                Watermark.conversation_id == Message.conversation_id
+            )
         ).filter(
             or_(
                 DirectConversation.user1_id == user_id,
                 DirectConversation.user2_id == user_id
             ),
             Message.sender_id != user_id,
-            MessageRead.id.is_(None),
-            Message.deleted_at.is_(None)
+            Message.deleted_at.is_(None),
+            or_(Watermark.last_read_at.is_(None), Message.created_at > Watermark.last_read_at)
         ).group_by(Message.conversation_id).all()
         
         return {
@@ -333,57 +560,32 @@ class MessagingService:
         user_id: UUID,
         query: MessageSearchQuery
     ) -> Dict[str, Any]:
-        """Rechercher des messages"""
-        base_query = db.query(Message).filter(
-            Message.deleted_at.is_(None),
-            Message.content.ilike(f'%{query.query}%')
+        """Rechercher des messages (plein texte indexé, voir message_search_service)"""
+        filters = dict(
+            channel_id=query.channel_id,
+            conversation_id=query.conversation_id,
+            sender_id=query.sender_id,
+            from_date=query.from_date,
+            to_date=query.to_date
+        )
+        page = message_search_service.search_messages(
+            db, user_id, query.query, limit=query.limit, cursor=query.cursor, **filters
         )
         
-        # Filtrer par canal (si l'utilisateur est membre)
-        if query.channel_id:
-            base_query = base_query.join(
-                ChannelMember,
-                and_(
-                    ChannelMember.channel_id == query.channel_id,
-                    ChannelMember.user_id == user_id
-                )
-            ).filter(Message.channel_id == query.channel_id)
-        
-        # Filtrer par conversation
-        if query.conversation_id:
-            base_query = base_query.join(
-                DirectConversation,
-                DirectConversation.id == query.conversation_id
-            ).filter(
-                Message.conversation_id == query.conversation_id,
-                or_(
-                    DirectConversation.user1_id == user_id,
-                    DirectConversation.user2_id == user_id
-                )
-            )
-        
-        # Filtrer par expéditeur
-        if query.sender_id:
-            base_query = base_query.filter(Message.sender_id == query.sender_id)
-        
-        # Filtrer par date
-        if query.from_date:
-            base_query = base_query.filter(Message.created_at >= query.from_date)
-        if query.to_date:
-            base_query = base_query.filter(Message.created_at <= query.to_date)
-        
-        # Compter le total
-        total = base_query.count()
+        total = None
+        if query.with_total:
+            total = message_search_service.count_matches(db, user_id, query.query, page.mode, **filters)
         
-        # Récupérer les messages
-        messages = base_query.options(
-            joinedload(Message.sender)
-        ).order_by(
-            desc(Message.created_at)
-        ).limit(query.limit).offset(query.offset).all()
+        messages = []
+        for hit in page.hits:
+            hit.message.snippet = hit.snippet
+            hit.message.rank = hit.rank
+            messages.append(hit.message)
         
         return {
             'messages': messages,
             'total': total,
-            'has_more': total > (query.offset + query.limit)
+            'has_more': page.next_cursor is not None,
+            'next_cursor': page.next_cursor,
+            'mode': page.mode
         }
@@ -1,9 +1,8 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, insert
 from datetime import datetime
-from uuid import UUID
+from uuid import UUID, uuid4
 from typing import List, Optional
-import asyncio
 from ..models.notification import Notification
 from ..models.user import User
 from ..schemas.notification import NotificationCreate, NotificationResponse, NotificationStats
@@ -16,6 +15,49 @@ def create_notification(db: Session, notification_data: NotificationCreate) -> N
     db.refresh(notification)
     return notification
 
+def create_bulk_notifications(
+    db: Session,
+    recipient_ids: List[UUID],
+    notification_type: str,
+    title: str,
+    message: str,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[UUID] = None,
+    action_by: Optional[UUID] = None,
+    actor_email: Optional[str] = None
+) -> int:
+    """
+    Créer la même notification pour plusieurs destinataires :
+    un INSERT multi-lignes, un commit, un seul envoi SSE groupé.
+    Retourne le nombre de notifications créées.
+    """
+    if not recipient_ids:
+        return 0
+    
+    now = datetime.utcnow()
+    rows = [
+        {
+            'id': uuid4(),
+            'user_id': user_id,
+            'type': notification_type,
+            'title': title,
+            'message': message,
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'action_by': action_by,
+            'is_read': False,
+            'created_at': now
+        }
+        for user_id in recipient_ids
+    ]
+    db.execute(insert(Notification), rows)
+    db.commit()
+    
+    _send_sse_notifications([
+        (row['user_id'], _sse_payload(row, actor_email)) for row in rows
+    ])
+    return len(rows)
+
 def create_action_notification(
     db: Session,
     action: str,
@@ -24,14 +66,13 @@ def create_action_notification(
     entity_id: UUID,
     action_by_id: UUID,
     target_roles: List[str] = None
-):
+) -> int:
     """Créer une notification d'action pour les rôles spécifiés"""
     if target_roles is None:
         target_roles = ['admin']
     
-    # Récupérer l'utilisateur qui a fait l'action
-    actor = db.query(User).filter(User.id == action_by_id).first()
-    actor_email = actor.email if actor else "Utilisateur"
+    # Récupérer l'email de l'utilisateur qui a fait l'action (une seule fois)
+    actor_email = db.query(User.email).filter(User.id == action_by_id).scalar() or "Utilisateur"
     
     # Messages selon l'action
     action_messages = {
@@ -44,23 +85,16 @@ def create_action_notification(
     title = f"Nouvelle action: {action}"
     message = f"{actor_email} {action_messages.get(action, f'a effectué une action sur {entity_type} {entity_name}')}"
     
-    # Créer une notification pour chaque utilisateur avec le rôle approprié
-    users = db.query(User).filter(User.role.in_(target_roles), User.id != action_by_id).all()
-    
-    for user in users:
-        notification_data = NotificationCreate(
-            user_id=user.id,
-            type='action',
-            title=title,
-            message=message,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            action_by=action_by_id
-        )
-        notif = create_notification(db, notification_data)
-        
-        # Envoyer en temps réel via SSE
-        _send_sse_notification(user.id, notif, actor_email)
+    # Une notification pour chaque utilisateur avec le rôle approprié
+    recipient_ids = [
+        row.id for row in db.query(User.id).filter(User.role.in_(target_roles), User.id != action_by_id)
+    ]
+    
+    return create_bulk_notifications(
+        db, recipient_ids, 'action', title, message,
+        entity_type=entity_type, entity_id=entity_id,
+        action_by=action_by_id, actor_email=actor_email
+    )
 
 def create_alert_notification(
     db: Session,
@@ -69,26 +103,17 @@ def create_alert_notification(
     entity_type: str,
     entity_id: UUID,
     target_roles: List[str] = None
-):
+) -> int:
     """Créer une notification d'alerte (limite atteinte, etc.)"""
     if target_roles is None:
         target_roles = ['admin', 'manager']
     
-    users = db.query(User).filter(User.role.in_(target_roles)).all()
-    
-    for user in users:
-        notification_data = NotificationCreate(
-            user_id=user.id,
-            type='alert',
-            title=title,
-            message=message,
-            entity_type=entity_type,
-            entity_id=entity_id
-        )
-        notif = create_notification(db, notification_data)
-        
-        # Envoyer en temps réel via SSE
-        _send_sse_notification(user.id, notif, None)
+    recipient_ids = [row.id for row in db.query(User.id).filter(User.role.in_(target_roles))]
+    
+    return create_bulk_notifications(
+        db, recipient_ids, 'alert', title, message,
+        entity_type=entity_type, entity_id=entity_id
+    )
 
 def get_user_notifications(
     db: Session,
@@ -166,32 +191,25 @@ def delete_notification(db: Session, notification_id: UUID, user_id: UUID) -> bo
         return True
     return False
 
-def _send_sse_notification(user_id: UUID, notification: Notification, actor_email: Optional[str]):
-    """Envoyer une notification via SSE (non-bloquant)"""
+def _sse_payload(row: dict, actor_email: Optional[str]) -> dict:
+    """Payload SSE d'une notification insérée"""
+    return {
+        'id': str(row['id']),
+        'type': row['type'],
+        'title': row['title'],
+        'message': row['message'],
+        'entity_type': row['entity_type'],
+        'entity_id': str(row['entity_id']) if row['entity_id'] else None,
+        'actor_email': actor_email,
+        'is_read': row['is_read'],
+        'created_at': row['created_at'].isoformat()
+    }
+
+def _send_sse_notifications(batch: List[tuple]):
+    """Remettre un lot de (user_id, payload) au flux SSE (non-bloquant)"""
     try:
-        from ..routers.sse import broadcast_notification
-        
-        notification_data = {
-            'id': str(notification.id),
-            'type': notification.type,
-            'title': notification.title,
-            'message': notification.message,
-            'entity_type': notification.entity_type,
-            'entity_id': str(notification.entity_id) if notification.entity_id else None,
-            'actor_email': actor_email,
-            'is_read': notification.is_read,
-            'created_at': notification.created_at.isoformat()
-        }
-        
-        # Créer une tâche asyncio pour envoyer la notification
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            # Si pas de loop, on ne peut pas envoyer en temps réel
-            return
-        
-        if loop.is_running():
-            asyncio.create_task(broadcast_notification(str(user_id), notification_data))
+        from ..routers.sse import broadcast_notifications
+        broadcast_notifications([(str(user_id), payload) for user_id, payload in batch])
     except Exception as e:
         # Ne pas bloquer si l'envoi SSE échoue
         print(f"Erreur lors de l'envoi SSE: {e}")
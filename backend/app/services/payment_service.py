@@ -0,0 +1,87 @@
+"""
+Soldes des planteurs calculés par agrégats SQL
+
+Livraisons (depuis l'agrégat journalier) et paiements sont agrégés par
+planteur dans deux sous-requêtes, jointes aux planteurs dans une seule
+requête : tri et pagination sont faits par PostgreSQL.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import List, Optional
+from uuid import UUID
+from ..models import Planter, Payment, DeliveryDailyRollup
+from ..schemas.payment import PlanterBalance
+
+BALANCE_SORTS = {
+    "total_livraisons_kg", "total_paiements", "nombre_livraisons", "nombre_paiements",
+    "derniere_livraison", "dernier_paiement", "planter_name"
+}
+
+def _balances_query(db: Session):
+    deliveries = db.query(
+        DeliveryDailyRollup.planter_id.label("planter_id"),
+        func.sum(DeliveryDailyRollup.unloaded_kg).label("total_kg"),
+        func.sum(DeliveryDailyRollup.delivery_count).label("nombre"),
+        func.max(DeliveryDailyRollup.day).label("derniere")
+    ).group_by(DeliveryDailyRollup.planter_id).subquery()
+
+    payments = db.query(
+        Payment.planter_id.label("planter_id"),
+        func.sum(Payment.montant).label("total"),
+        func.count(Payment.id).label("nombre"),
+        func.max(Payment.date_paiement).label("dernier")
+    ).group_by(Payment.planter_id).subquery()
+
+    columns = {
+        "planter_name": Planter.name,
+        "total_livraisons_kg": func.coalesce(deliveries.c.total_kg, 0),
+        "total_paiements": func.coalesce(payments.c.total, 0),
+        "nombre_livraisons": func.coalesce(deliveries.c.nombre, 0),
+        "nombre_paiements": func.coalesce(payments.c.nombre, 0),
+        "derniere_livraison": deliveries.c.derniere,
+        "dernier_paiement": payments.c.dernier
+    }
+    query = db.query(
+        Planter.id.label("planter_id"),
+        *[column.label(name) for name, column in columns.items()]
+    ).outerjoin(
+        deliveries, deliveries.c.planter_id == Planter.id
+    ).outerjoin(
+        payments, payments.c.planter_id == Planter.id
+    )
+    return query, columns
+
+def _to_balance(row) -> PlanterBalance:
+    return PlanterBalance(
+        planter_id=row.planter_id,
+        planter_name=row.planter_name,
+        total_livraisons_kg=float(row.total_livraisons_kg),
+        total_paiements=float(row.total_paiements),
+        solde=0,  # À calculer avec les prix réels
+        nombre_livraisons=int(row.nombre_livraisons),
+        nombre_paiements=int(row.nombre_paiements),
+        derniere_livraison=row.derniere_livraison,
+        dernier_paiement=row.dernier_paiement
+    )
+
+def get_balances(
+    db: Session,
+    sort: str = "total_livraisons_kg",
+    descending: bool = True,
+    skip: int = 0,
+    limit: Optional[int] = None
+) -> List[PlanterBalance]:
+    """Soldes de tous les planteurs, triés et paginés côté base"""
+    query, columns = _balances_query(db)
+    column = columns.get(sort, columns["total_livraisons_kg"])
+    order = column.desc().nulls_last() if descending else column.asc().nulls_last()
+    # Départage stable pour une pagination cohérente
+    query = query.order_by(order, Planter.id).offset(skip)
+    if limit:
+        query = query.limit(limit)
+    return [_to_balance(row) for row in query.all()]
+
+def get_planter_balance(db: Session, planter_id: UUID) -> Optional[PlanterBalance]:
+    query, _ = _balances_query(db)
+    row = query.filter(Planter.id == planter_id).first()
+    return _to_balance(row) if row else None
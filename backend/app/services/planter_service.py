@@ -5,16 +5,32 @@ from typing import List, Optional
 from uuid import UUID
 from ..models import Planter, Delivery
 from ..schemas import PlanterCreate, PlanterUpdate
+from ..utils.pagination import keyset_paginate, estimate_count
+from . import search_service, autocomplete_service
 
 def get_planters(db: Session, search: Optional[str] = None, page: int = 1, size: int = 50) -> tuple[List[Planter], int]:
-    query = db.query(Planter)
-    if search:
-        query = query.filter(Planter.name.ilike(f"%{search}%"))
+    # Avec une recherche : résultats approchés triés par pertinence
+    query = search_service.search(db.query(Planter), Planter.name, search)
     
     total = query.count()
     planters = query.offset((page - 1) * size).limit(size).all()
     return planters, total
 
+def get_planters_keyset(
+    db: Session,
+    search: Optional[str] = None,
+    size: int = 50,
+    cursor: Optional[str] = None,
+    with_total: bool = False
+) -> tuple[List[Planter], Optional[str], Optional[int]]:
+    """Pagination par curseur sur le nom (unique) : (planteurs, curseur suivant, total estimé ou None)"""
+    # Le tri reste celui de la clé (nom) : filtre seul, sans classement
+    query = search_service.search(db.query(Planter), Planter.name, search, ranked=False)
+    
+    total = estimate_count(query) if with_total else None
+    planters, next_cursor = keyset_paginate(query, [Planter.name], cursor, size, descending=False)
+    return planters, next_cursor, total
+
 def get_planter(db: Session, planter_id: UUID) -> Planter:
     planter = db.query(Planter).filter(Planter.id == planter_id).first()
     if not planter:
@@ -30,6 +46,7 @@ def create_planter(db: Session, planter_data: PlanterCreate, current_user_id: Op
     db.add(planter)
     db.commit()
     db.refresh(planter)
+    autocomplete_service.record(autocomplete_service.COOPERATIVES, [planter.cooperative])
     
     # Créer une notification
     if current_user_id:
@@ -42,11 +59,14 @@ def create_planter(db: Session, planter_data: PlanterCreate, current_user_id: Op
 
 def update_planter(db: Session, planter_id: UUID, planter_data: PlanterUpdate, current_user_id: Optional[UUID] = None) -> Planter:
     planter = get_planter(db, planter_id)
+    previous_cooperative = planter.cooperative
     # Mise à jour partielle : ne mettre à jour que les champs fournis
     for key, value in planter_data.model_dump(exclude_unset=True).items():
         setattr(planter, key, value)
     db.commit()
     db.refresh(planter)
+    if planter.cooperative != previous_cooperative:
+        autocomplete_service.invalidate(autocomplete_service.COOPERATIVES)
     
     # Créer une notification
     if current_user_id:
@@ -60,8 +80,11 @@ def update_planter(db: Session, planter_id: UUID, planter_data: PlanterUpdate, c
 def delete_planter(db: Session, planter_id: UUID, current_user_id: Optional[UUID] = None) -> None:
     planter = get_planter(db, planter_id)
     planter_name = planter.name
+    cooperative = planter.cooperative
     db.delete(planter)
     db.commit()
+    if cooperative:
+        autocomplete_service.invalidate(autocomplete_service.COOPERATIVES)
     
     # Créer une notification
     if current_user_id:
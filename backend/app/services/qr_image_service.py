@@ -0,0 +1,180 @@
+"""
+Images de QR code rendues à la demande
+
+Le contenu d'un QR code se déduit des colonnes du bloc (qr_code, livraison,
+hash) : l'image n'est plus stockée en base64 dans chaque enregistrement.
+Elle est rendue à la première demande puis gardée, adressée par l'empreinte
+de (paramètres de rendu, format, contenu) :
+- en mémoire, LRU borné à QR_MEMORY_CACHE_BYTES octets (par worker) ;
+- sur disque dans QR_CACHE_DIR, partagé entre workers et redémarrages,
+  borné à QR_DISK_CACHE_BYTES : une lecture rafraîchit la date de
+  modification du fichier, et au plus toutes les QR_CACHE_PRUNE_INTERVAL
+  secondes une écriture supprime les fichiers les moins récents au-delà
+  du budget (LRU approché).
+La même empreinte sert d'ETag fort : un 304 ne demande ni rendu ni lecture.
+"""
+from typing import Optional
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.traceability import TraceabilityRecord
+from ..utils.cache import LRUCache
+from .traceability_service import QRCodeService
+
+logger = logging.getLogger(__name__)
+
+STRIP_BATCH_SIZE = 1000
+
+_memory = LRUCache(max_bytes=settings.QR_MEMORY_CACHE_BYTES)
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def record_payload(record: TraceabilityRecord) -> str:
+    return QRCodeService.payload(record.qr_code, record.delivery_id, record.blockchain_hash)
+
+
+def image_key(payload: str, image_format: str) -> str:
+    raw = f"{QRCodeService.RENDER_VERSION}|{image_format}|{payload}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def etag(payload: str, image_format: str) -> str:
+    return f'"{image_key(payload, image_format)[:32]}"'
+
+
+def _disk_path(key: str, image_format: str) -> str:
+    return os.path.join(settings.QR_CACHE_DIR, key[:2], f"{key}.{image_format}")
+
+
+def _read_disk(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+        # Récence pour l'éviction (atime n'est pas fiable : montages noatime)
+        os.utime(path)
+        return content
+    except FileNotFoundError:
+        return None
+
+
+def prune_disk_cache(max_bytes: Optional[int] = None) -> int:
+    """Supprimer les images les moins récemment utilisées au-delà de `max_bytes`.
+    Retourne le nombre de fichiers supprimés."""
+    max_bytes = settings.QR_DISK_CACHE_BYTES if max_bytes is None else max_bytes
+    files = []
+    total = 0
+    for root, _, names in os.walk(settings.QR_CACHE_DIR):
+        for name in names:
+            if name.endswith(".tmp"):
+                # Écriture en cours
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    removed = 0
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    if removed:
+        logger.info(f"QR image cache pruned: {removed} files removed")
+    return removed
+
+
+def _maybe_prune() -> None:
+    global _last_prune
+    with _prune_lock:
+        if time.monotonic() - _last_prune < settings.QR_CACHE_PRUNE_INTERVAL:
+            return
+        _last_prune = time.monotonic()
+    try:
+        prune_disk_cache()
+    except OSError as e:
+        logger.warning(f"QR image cache prune failed: {e}")
+
+
+def _write_disk(path: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Écriture atomique : un lecteur concurrent ne voit jamais un fichier partiel
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def cached_image(payload: str, image_format: str) -> Optional[bytes]:
+    """Image déjà rendue (mémoire puis disque), ou None"""
+    key = image_key(payload, image_format)
+    content = _memory.get(key)
+    if content is None:
+        content = _read_disk(_disk_path(key, image_format))
+        if content is not None:
+            _memory.put(key, content)
+    return content
+
+
+def store_image(payload: str, image_format: str, content: bytes) -> None:
+    key = image_key(payload, image_format)
+    path = _disk_path(key, image_format)
+    try:
+        _write_disk(path, content)
+    except OSError as e:
+        # Disque indisponible : l'image reste servie depuis la mémoire
+        logger.warning(f"QR image cache write failed ({path}): {e}")
+    else:
+        _maybe_prune()
+    _memory.put(key, content)
+
+
+def get_image(payload: str, image_format: str = "png") -> bytes:
+    """Image (octets bruts) du QR code : mémoire, puis disque, puis rendu"""
+    if image_format not in QRCodeService.FORMATS:
+        raise ValueError(f"Format d'image non supporté : {image_format}")
+    content = cached_image(payload, image_format)
+    if content is None:
+        content = QRCodeService.render(payload, image_format)
+        store_image(payload, image_format, content)
+    return content
+
+
+def strip_stored_images(db: Session, batch_size: int = STRIP_BATCH_SIZE) -> int:
+    """
+    Vide la colonne historique qr_code_image, par lots commités séparément
+    (verrous de ligne courts, pas de transaction géante). Retourne le nombre
+    d'enregistrements vidés.
+    """
+    table = TraceabilityRecord.__table__
+    stripped = 0
+    while True:
+        ids = select(table.c.id).where(table.c.qr_code_image.isnot(None)).limit(batch_size).scalar_subquery()
+        count = db.execute(update(table).where(table.c.id.in_(ids)).values(qr_code_image=None)).rowcount
+        db.commit()
+        stripped += count
+        if count < batch_size:
+            break
+    if stripped:
+        logger.info(f"Stripped {stripped} stored QR code images")
+    return stripped
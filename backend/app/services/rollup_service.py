@@ -0,0 +1,99 @@
+"""
+Maintenance incrémentale de la table delivery_daily_rollup
+
+Chaque écriture sur une livraison ajoute (ou retire) sa contribution à la
+ligne agrégée correspondante, dans la même transaction que la livraison.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional
+from ..models import Delivery, DeliveryDailyRollup
+
+ROLLUP_KEY = ["day", "planter_id", "load_location", "unload_location", "quality"]
+# Échelle des colonnes Numeric(12, 2) des quantités
+KG_QUANTUM = Decimal("0.01")
+
+def _kg(value) -> Decimal:
+    """Quantité en Decimal à 2 décimales, comme stockée (avant rechargement, l'attribut peut être un float)"""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(KG_QUANTUM, rounding=ROUND_HALF_UP)
+
+def snapshot_delivery(delivery: Delivery) -> dict:
+    """Capture la clé et les quantités d'une livraison (avant modification)"""
+    return {
+        "day": delivery.date,
+        "planter_id": delivery.planter_id,
+        "load_location": delivery.load_location,
+        "unload_location": delivery.unload_location,
+        "quality": delivery.quality,
+        "loaded_kg": _kg(delivery.quantity_loaded_kg),
+        "unloaded_kg": _kg(delivery.quantity_kg)
+    }
+
+def apply_delivery(db: Session, snapshot: dict, sign: int = 1) -> None:
+    """Ajoute (sign=1) ou retire (sign=-1) une livraison de l'agrégat journalier"""
+    values = {key: snapshot[key] for key in ROLLUP_KEY}
+    values["loaded_kg"] = sign * _kg(snapshot["loaded_kg"])
+    values["unloaded_kg"] = sign * _kg(snapshot["unloaded_kg"])
+    values["delivery_count"] = sign
+
+    stmt = insert(DeliveryDailyRollup).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=ROLLUP_KEY,
+        set_={
+            "loaded_kg": DeliveryDailyRollup.loaded_kg + stmt.excluded.loaded_kg,
+            "unloaded_kg": DeliveryDailyRollup.unloaded_kg + stmt.excluded.unloaded_kg,
+            "delivery_count": DeliveryDailyRollup.delivery_count + stmt.excluded.delivery_count
+        }
+    )
+    db.execute(stmt)
+
+    if sign < 0:
+        # Supprimer les lignes vides pour garder la table compacte
+        db.query(DeliveryDailyRollup).filter(
+            *[getattr(DeliveryDailyRollup, key) == snapshot[key] for key in ROLLUP_KEY],
+            DeliveryDailyRollup.delivery_count <= 0
+        ).delete(synchronize_session=False)
+
+def replace_delivery(db: Session, old_snapshot: dict, delivery: Delivery) -> None:
+    """Met à jour l'agrégat après modification d'une livraison"""
+    apply_delivery(db, old_snapshot, sign=-1)
+    apply_delivery(db, snapshot_delivery(delivery), sign=1)
+
+def rebuild_rollup(db: Session, planter_id: Optional[str] = None) -> int:
+    """
+    Reconstruit l'agrégat depuis la table deliveries (backfill ou réparation).
+    Retourne le nombre de lignes agrégées.
+    """
+    delete_query = db.query(DeliveryDailyRollup)
+    if planter_id:
+        delete_query = delete_query.filter(DeliveryDailyRollup.planter_id == planter_id)
+    delete_query.delete(synchronize_session=False)
+
+    source = db.query(
+        Delivery.date,
+        Delivery.planter_id,
+        Delivery.load_location,
+        Delivery.unload_location,
+        Delivery.quality,
+        func.sum(Delivery.quantity_loaded_kg),
+        func.sum(Delivery.quantity_kg),
+        func.count(Delivery.id)
+    )
+    if planter_id:
+        source = source.filter(Delivery.planter_id == planter_id)
+    source = source.group_by(
+        Delivery.date, Delivery.planter_id, Delivery.load_location, Delivery.unload_location, Delivery.quality
+    )
+
+    result = db.execute(
+        insert(DeliveryDailyRollup).from_select(
+            ROLLUP_KEY + ["loaded_kg", "unloaded_kg", "delivery_count"],
+            source.statement
+        )
+    )
+    db.commit()
+    return result.rowcount
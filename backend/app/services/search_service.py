@@ -0,0 +1,174 @@
+"""
+Recherche approchée (pg_trgm) sur les noms : planteurs, fournisseurs,
+coopératives, utilisateurs
+
+Les colonnes sont comparées sous forme « repliée » `lower(f_unaccent(col))`,
+insensible à la casse et aux accents (« Kouamé » = « KOUAME »). Chaque
+colonne recherchée a un index GIN trigramme sur cette expression exacte
+(migration 023), qui sert les deux prédicats :
+- sous-chaîne : `LIKE '%q%'` (remplace les anciens `ILIKE '%q%'`, que les
+  index btree ne pouvaient pas servir) ;
+- approché : `q <% col` (word_similarity au-dessus de
+  `pg_trgm.word_similarity_threshold`, 0.6 par défaut), qui tolère les
+  fautes de frappe (« kouasi » trouve « Kouassi »).
+
+Tri par pertinence : correspondance exacte, puis préfixe, puis sous-chaîne,
+puis similarité décroissante.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import case, func, literal, union_all
+from sqlalchemy.orm import Session
+
+from ..core.permissions import Permission, Role, has_permission
+from ..models import ChefPlanteur, Planter, User
+
+# Fonction IMMUTABLE créée par la migration (unaccent seul ne l'est pas et
+# ne peut donc pas servir dans un index d'expression)
+FOLD_FUNCTION = "f_unaccent"
+SEARCH_TYPES = ("planters", "fournisseurs", "cooperatives", "users")
+DEFAULT_LIMIT = 10
+
+
+@dataclass
+class SearchResult:
+    type: str
+    label: str
+    score: float
+    id: Optional[UUID] = None
+    detail: Optional[str] = None
+
+
+def fold(expr):
+    """Forme repliée (minuscules, sans accents) d'une colonne ou d'un texte"""
+    return func.lower(getattr(func, FOLD_FUNCTION)(expr))
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _needle(text: str):
+    return fold(literal(text.strip()))
+
+
+def _pattern(text: str, prefix: bool = False):
+    needle = fold(literal(_escape_like(text.strip())))
+    return needle.concat("%") if prefix else literal("%").concat(needle).concat("%")
+
+
+def matches(column, text: str):
+    """Prédicat indexé : sous-chaîne ou similarité approchée, sans accents ni casse"""
+    folded = fold(column)
+    return folded.like(_pattern(text), escape="\\") | _needle(text).op("<%")(folded)
+
+
+def rank(column, text: str):
+    """Score de pertinence (plus grand = meilleur) à trier en DESC"""
+    folded = fold(column)
+    needle = _needle(text)
+    bonus = case(
+        (folded == needle, 3.0),
+        (folded.like(_pattern(text, prefix=True), escape="\\"), 2.0),
+        (folded.like(_pattern(text), escape="\\"), 1.0),
+        else_=0.0
+    )
+    return bonus + func.word_similarity(needle, folded)
+
+
+def search(query, column, text: Optional[str], ranked: bool = True):
+    """Filtre `query` sur `column` ; avec `ranked`, trie aussi par pertinence"""
+    if not text or not text.strip():
+        return query
+    query = query.filter(matches(column, text))
+    if ranked:
+        query = query.order_by(rank(column, text).desc(), column)
+    return query
+
+
+def search_planters(db: Session, text: str, limit: int = DEFAULT_LIMIT) -> List[SearchResult]:
+    score = rank(Planter.name, text).label("score")
+    rows = (
+        db.query(Planter.id, Planter.name, Planter.cooperative, score)
+        .filter(matches(Planter.name, text))
+        .order_by(score.desc(), Planter.name)
+        .limit(limit)
+        .all()
+    )
+    return [SearchResult("planters", r.name, float(r.score), r.id, r.cooperative) for r in rows]
+
+
+def search_fournisseurs(db: Session, text: str, limit: int = DEFAULT_LIMIT) -> List[SearchResult]:
+    score = rank(ChefPlanteur.name, text).label("score")
+    rows = (
+        db.query(ChefPlanteur.id, ChefPlanteur.name, ChefPlanteur.cooperative, score)
+        .filter(matches(ChefPlanteur.name, text))
+        .order_by(score.desc(), ChefPlanteur.name)
+        .limit(limit)
+        .all()
+    )
+    return [SearchResult("fournisseurs", r.name, float(r.score), r.id, r.cooperative) for r in rows]
+
+
+def search_cooperatives(db: Session, text: str, limit: int = DEFAULT_LIMIT) -> List[SearchResult]:
+    """Noms de coopératives (distincts) des planteurs et des fournisseurs"""
+    names = union_all(
+        db.query(Planter.cooperative.label("name")).filter(matches(Planter.cooperative, text)),
+        db.query(ChefPlanteur.cooperative.label("name")).filter(matches(ChefPlanteur.cooperative, text))
+    ).subquery()
+    score = func.max(rank(names.c.name, text)).label("score")
+    rows = (
+        db.query(names.c.name, score)
+        .filter(names.c.name != "")
+        .group_by(names.c.name)
+        .order_by(score.desc(), names.c.name)
+        .limit(limit)
+        .all()
+    )
+    return [SearchResult("cooperatives", r.name, float(r.score)) for r in rows]
+
+
+def visible_users(db: Session, current_user: User):
+    """Utilisateurs visibles : ceux de sa zone si l'utilisateur n'est pas admin+"""
+    query = db.query(User)
+    if current_user.role not in [Role.ADMIN.value, Role.SUPERADMIN.value]:
+        if current_user.zone:
+            query = query.filter(User.zone == current_user.zone)
+    return query
+
+
+def search_users(db: Session, text: str, current_user: User, limit: int = DEFAULT_LIMIT) -> List[SearchResult]:
+    score = rank(User.email, text).label("score")
+    rows = (
+        visible_users(db, current_user)
+        .with_entities(User.id, User.email, User.role, score)
+        .filter(matches(User.email, text))
+        .order_by(score.desc(), User.email)
+        .limit(limit)
+        .all()
+    )
+    return [SearchResult("users", r.email, float(r.score), r.id, r.role) for r in rows]
+
+
+def search_all(
+    db: Session,
+    text: str,
+    current_user: User,
+    types: Optional[Iterable[str]] = None,
+    limit: int = DEFAULT_LIMIT
+) -> Dict[str, List[SearchResult]]:
+    """Recherche unifiée : résultats par type, chacun trié par pertinence"""
+    types = [t for t in (types or SEARCH_TYPES) if t in SEARCH_TYPES]
+    results: Dict[str, List[SearchResult]] = {}
+    for kind in types:
+        if kind == "planters":
+            results[kind] = search_planters(db, text, limit)
+        elif kind == "fournisseurs":
+            results[kind] = search_fournisseurs(db, text, limit)
+        elif kind == "cooperatives":
+            results[kind] = search_cooperatives(db, text, limit)
+        elif kind == "users" and has_permission(current_user.role, Permission.USERS_VIEW):
+            results[kind] = search_users(db, text, current_user, limit)
+    return results
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from ..models.session import Session as SessionModel
 from ..models.user import User
+from .auth_cache import auth_cache
 import secrets
 
 
@@ -63,6 +64,7 @@ class SessionService:
         if session:
             session.is_active = False
             db.commit()
+            auth_cache.invalidate_sessions([session.id])
     
     @staticmethod
     def revoke_all_user_sessions(db: Session, user_id: str):
@@ -72,6 +74,7 @@ class SessionService:
             SessionModel.is_active == True
         ).update({"is_active": False})
         db.commit()
+        auth_cache.invalidate_users([user_id])
     
     @staticmethod
     def get_user_sessions(db: Session, user_id: str):
@@ -1,138 +1,505 @@
-import hashlib
 import json
+import logging
 import qrcode
+import qrcode.image.svg
 import io
-import base64
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import bindparam, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
-from ..models.traceability import TraceabilityRecord, TraceabilityScan
+from ..models.traceability import TraceabilityRecord, TraceabilityScan, ChainCheckpoint, ChainHead
 from ..models.delivery import Delivery
+from ..config import settings
+from . import block_encoding
+from .block_encoding import CURRENT_HASH_VERSION, HASH_VERSION_LEGACY, LegacyBlockError
+from .entity_resolver import EntityResolver
+
+logger = logging.getLogger(__name__)
+
+CHAIN_NAME = "traceability"
+# Blocs lus par aller-retour du curseur serveur pendant la vérification
+VERIFY_BATCH_SIZE = 1000
+# En dessous, le démarrage du pool coûte plus que le recalcul des hash
+PARALLEL_MIN_BLOCKS = 20000
+
+_audit_executor: Optional[ProcessPoolExecutor] = None
+_audit_executor_lock = threading.Lock()
+
+
+def _audit_workers() -> int:
+    return settings.CHAIN_AUDIT_WORKERS or os.cpu_count() or 1
+
+
+def _get_audit_executor() -> ProcessPoolExecutor:
+    """Pool de processus de l'audit complet, créé à la première utilisation"""
+    global _audit_executor
+    with _audit_executor_lock:
+        if _audit_executor is None:
+            # spawn : pas de fork d'un processus uvicorn multi-thread ni de son pool SQL
+            _audit_executor = ProcessPoolExecutor(
+                max_workers=_audit_workers(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _audit_executor
+
+
+def _discard_audit_executor(broken: ProcessPoolExecutor) -> None:
+    """Abandonner un pool cassé (processus tué) ; le suivant est recréé à la demande"""
+    global _audit_executor
+    with _audit_executor_lock:
+        if _audit_executor is broken:
+            _audit_executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit_audit(fn, *args) -> Future:
+    """Soumettre au pool d'audit ; un pool cassé est remplacé et la soumission retentée une fois"""
+    executor = _get_audit_executor()
+    try:
+        return executor.submit(fn, *args)
+    except BrokenProcessPool:
+        logger.warning("Chain audit process pool broken, recreating it")
+        _discard_audit_executor(executor)
+        return _get_audit_executor().submit(fn, *args)
+
+
+def shutdown() -> None:
+    """Arrêter le pool d'audit (appelé à l'arrêt de l'application)"""
+    global _audit_executor
+    with _audit_executor_lock:
+        if _audit_executor is not None:
+            _audit_executor.shutdown(wait=False, cancel_futures=True)
+            _audit_executor = None
+
+
+def _lock_chain_head(db: Session) -> ChainHead:
+    """Verrouiller la tête de chaîne jusqu'à la fin de la transaction (créée au premier ajout)"""
+    head = db.query(ChainHead).filter(ChainHead.chain == CHAIN_NAME).with_for_update().populate_existing().first()
+    if head is None:
+        last = db.query(TraceabilityRecord.block_number, TraceabilityRecord.blockchain_hash).order_by(
+            TraceabilityRecord.block_number.desc()
+        ).first()
+        # Deux premiers ajouts simultanés : une seule insertion gagne, l'autre attend le verrou
+        db.execute(insert(ChainHead).values(
+            chain=CHAIN_NAME,
+            block_number=last.block_number if last else 0,
+            block_hash=last.blockchain_hash if last else None,
+            updated_at=datetime.utcnow()
+        ).on_conflict_do_nothing(index_elements=[ChainHead.chain]))
+        head = db.query(ChainHead).filter(ChainHead.chain == CHAIN_NAME).with_for_update().populate_existing().one()
+    return head
+
+
+@dataclass
+class ChainVerification:
+    """Résultat d'une vérification de la chaîne (incrémentale ou audit complet)"""
+    is_valid: bool
+    mode: str
+    from_block: int
+    to_block: int
+    blocks_checked: int
+    elapsed_s: float
+    first_invalid_block: Optional[int] = None
+    reason: Optional[str] = None
+
+    @property
+    def blocks_per_second(self) -> float:
+        return round(self.blocks_checked / self.elapsed_s, 1) if self.elapsed_s > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'is_valid': self.is_valid,
+            'mode': self.mode,
+            'from_block': self.from_block,
+            'to_block': self.to_block,
+            'blocks_checked': self.blocks_checked,
+            'elapsed_ms': round(self.elapsed_s * 1000, 2),
+            'blocks_per_second': self.blocks_per_second,
+            'first_invalid_block': self.first_invalid_block,
+            'reason': self.reason
+        }
+
 
 class BlockchainService:
     """Service pour gérer la blockchain de traçabilité"""
     
     @staticmethod
-    def calculate_hash(data: dict, previous_hash: str = None, block_number: int = 0) -> str:
-        """Calcule le hash SHA-256 d'un bloc"""
-        block_data = {
-            'block_number': block_number,
-            'previous_hash': previous_hash or '0',
-            'timestamp': datetime.utcnow().isoformat(),
-            'data': data
-        }
-        block_string = json.dumps(block_data, sort_keys=True)
-        return hashlib.sha256(block_string.encode()).hexdigest()
+    def calculate_hash(
+        data: dict,
+        previous_hash: str = None,
+        block_number: int = 0,
+        timestamp: datetime = None,
+        version: int = CURRENT_HASH_VERSION
+    ) -> str:
+        """Calcule le hash SHA-256 d'un bloc (encodage canonique versionné, horodatage stocké)"""
+        return block_encoding.block_hash(version, block_number, previous_hash, timestamp, data)
     
     @staticmethod
-    def verify_chain(db: Session) -> bool:
-        """Vérifie l'intégrité de la blockchain"""
-        records = db.query(TraceabilityRecord).order_by(TraceabilityRecord.block_number).all()
+    def verify_chain(
+        db: Session,
+        full: bool = False,
+        batch_size: int = VERIFY_BATCH_SIZE,
+        parallel: Optional[bool] = None
+    ) -> ChainVerification:
+        """
+        Vérifie l'intégrité de la blockchain.
         
-        for i, record in enumerate(records):
-            # Vérifier le hash
-            calculated_hash = BlockchainService.calculate_hash(
-                record.trace_data,
-                record.previous_hash,
-                record.block_number
+        Mode incrémental (par défaut) : seuls les blocs postérieurs au point
+        de contrôle sont relus, après avoir vérifié que le bloc du point de
+        contrôle n'a pas changé. Mode `full` : audit de toute la chaîne
+        depuis le bloc 1. Les blocs sont lus en flux (curseur serveur, par
+        lots de `batch_size`) sans l'image du QR code. Les liens sont
+        vérifiés au fil de la lecture ; le recalcul des hash (pur, bloc par
+        bloc) est réparti sur un pool de processus lorsque `parallel` est
+        vrai (par défaut : audit complet d'au moins PARALLEL_MIN_BLOCKS
+        blocs). Le point de contrôle avance jusqu'au dernier bloc valide.
+        """
+        mode = 'full' if full else 'incremental'
+        start = time.perf_counter()
+        start_number, start_hash = 0, None
+        
+        checkpoint = None if full else db.get(ChainCheckpoint, CHAIN_NAME)
+        if checkpoint:
+            head_hash = db.query(TraceabilityRecord.blockchain_hash).filter(
+                TraceabilityRecord.block_number == checkpoint.block_number
+            ).scalar()
+            if head_hash != checkpoint.block_hash:
+                return ChainVerification(
+                    False, mode, checkpoint.block_number, checkpoint.block_number, 0,
+                    time.perf_counter() - start, checkpoint.block_number, 'checkpoint block altered'
+                )
+            start_number, start_hash = checkpoint.block_number, checkpoint.block_hash
+        
+        if parallel is None:
+            head = db.query(func.max(TraceabilityRecord.block_number)).scalar() or 0
+            parallel = full and head - start_number >= PARALLEL_MIN_BLOCKS
+        executor = _get_audit_executor() if parallel else None
+        # Lots en attente bornés : la lecture ne prend pas trop d'avance sur le calcul
+        max_in_flight = 2 * _audit_workers()
+        
+        last_number, last_hash = start_number, start_hash
+        hash_failure = None
+        link_failure = None
+        pending = deque()
+        
+        def check(batch):
+            nonlocal hash_failure
+            if executor is None:
+                hash_failure = block_encoding.first_invalid(batch)
+                return
+            pending.append(_submit_audit(block_encoding.first_invalid, batch))
+            # Résultats lus dans l'ordre des lots : le premier échec est le plus ancien bloc
+            while pending and (len(pending) >= max_in_flight or pending[0].done()):
+                failure = pending.popleft().result()
+                if failure:
+                    hash_failure = failure
+                    return
+        
+        result = db.execute(
+            select(
+                TraceabilityRecord.block_number,
+                TraceabilityRecord.hash_version,
+                TraceabilityRecord.previous_hash,
+                TraceabilityRecord.created_at,
+                TraceabilityRecord.trace_data,
+                TraceabilityRecord.blockchain_hash
             )
-            
-            if calculated_hash != record.blockchain_hash:
-                return False
-            
-            # Vérifier le lien avec le bloc précédent
-            if i > 0:
-                if record.previous_hash != records[i-1].blockchain_hash:
-                    return False
+            .where(TraceabilityRecord.block_number > start_number)
+            .order_by(TraceabilityRecord.block_number)
+            .execution_options(yield_per=batch_size)
+        )
+        batch = []
+        try:
+            for row in result:
+                number, _, previous_hash, _, _, blockchain_hash = row
+                if number != last_number + 1:
+                    reason = 'duplicate block number' if number == last_number else 'missing block'
+                    link_failure = (number, reason)
+                    break
+                if last_number and previous_hash != last_hash:
+                    # Vérifier le lien avec le bloc précédent
+                    link_failure = (number, 'broken link')
+                    break
+                batch.append(tuple(row))
+                last_number, last_hash = number, blockchain_hash
+                if len(batch) >= batch_size:
+                    check(batch)
+                    batch = []
+                    if hash_failure:
+                        break
+            if batch and not hash_failure:
+                check(batch)
+            while pending and not hash_failure:
+                hash_failure = pending.popleft().result()
+        except BrokenProcessPool:
+            # Processus tué en cours d'audit : le pool est recréé au prochain audit
+            _discard_audit_executor(executor)
+            raise
+        finally:
+            result.close()
+            for future in pending:
+                future.cancel()
+        
+        # Un échec de hash est toujours antérieur au premier défaut de lien (lots déjà lus)
+        failure = hash_failure or link_failure
+        if hash_failure:
+            # Les blocs qui précèdent sont consécutifs : le dernier valide est le numéro précédent
+            last_number = hash_failure[0] - 1
+            last_hash = start_hash if last_number == start_number else db.query(
+                TraceabilityRecord.blockchain_hash
+            ).filter(TraceabilityRecord.block_number == last_number).scalar()
+        
+        elapsed = time.perf_counter() - start
+        verification = ChainVerification(
+            failure is None, mode, start_number + 1, last_number, last_number - start_number, elapsed,
+            failure[0] if failure else None, failure[1] if failure else None
+        )
+        logger.info(
+            f"Chain verification ({mode}{', parallel' if executor else ''}): "
+            f"{verification.blocks_checked} blocks from #{start_number + 1} in {elapsed:.3f}s "
+            f"({verification.blocks_per_second} blocks/s), valid={verification.is_valid}"
+        )
+        
+        if full:
+            # L'audit complet fait foi : le point de contrôle revient au dernier bloc valide
+            BlockchainService._save_checkpoint(db, last_number, last_hash, full=True)
+        elif last_number > start_number:
+            BlockchainService._save_checkpoint(db, last_number, last_hash)
+        return verification
+    
+    @staticmethod
+    def _save_checkpoint(db: Session, block_number: int, block_hash: Optional[str], full: bool = False) -> None:
+        if not block_number:
+            db.query(ChainCheckpoint).filter(ChainCheckpoint.chain == CHAIN_NAME).delete()
+            db.commit()
+            return
+        now = datetime.utcnow()
+        stmt = insert(ChainCheckpoint).values(
+            chain=CHAIN_NAME,
+            block_number=block_number,
+            block_hash=block_hash,
+            verified_at=now,
+            last_full_audit_at=now if full else None
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ChainCheckpoint.chain],
+            set_={
+                'block_number': stmt.excluded.block_number,
+                'block_hash': stmt.excluded.block_hash,
+                'verified_at': stmt.excluded.verified_at,
+                'last_full_audit_at': func.coalesce(stmt.excluded.last_full_audit_at, ChainCheckpoint.last_full_audit_at)
+            },
+            # Deux vérifications concurrentes : le point de contrôle ne recule pas (sauf audit complet)
+            where=None if full else ChainCheckpoint.block_number < stmt.excluded.block_number
+        )
+        db.execute(stmt)
+        db.commit()
+    
+    @staticmethod
+    def reseal_legacy_blocks(db: Session, batch_size: int = VERIFY_BATCH_SIZE) -> int:
+        """
+        Migration des blocs v1 (hash non reproductible) vers l'encodage canonique.
+        
+        À partir du premier bloc v1, chaque bloc est rehaché en v2 avec son
+        horodatage stocké et chaîné au nouveau hash du précédent (les blocs
+        suivants changent donc aussi). Le hash d'origine est conservé dans
+        `legacy_hash` ; le code QR (identifiant imprimé) ne change pas.
+        Une seule transaction, écritures de blocs bloquées pendant l'opération.
+        Retourne le nombre de blocs rescellés.
+        """
+        first_legacy = db.query(func.min(TraceabilityRecord.block_number)).filter(
+            TraceabilityRecord.hash_version == HASH_VERSION_LEGACY
+        ).scalar()
+        if first_legacy is None:
+            return 0
+        
+        # Même ordre que les ajouts (tête puis table) : pas d'interblocage
+        head = _lock_chain_head(db)
+        db.execute(text("LOCK TABLE traceability_records IN SHARE ROW EXCLUSIVE MODE"))
+        previous_hash = db.query(TraceabilityRecord.blockchain_hash).filter(
+            TraceabilityRecord.block_number == first_legacy - 1
+        ).scalar()
         
-        return True
+        table = TraceabilityRecord.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam('rid'))
+            .values(
+                blockchain_hash=bindparam('new_hash'),
+                previous_hash=bindparam('new_previous'),
+                hash_version=CURRENT_HASH_VERSION,
+                legacy_hash=func.coalesce(table.c.legacy_hash, bindparam('old_hash'))
+            )
+        )
+        # Lecture en flux (curseur serveur) : au plus `batch_size` blocs en mémoire
+        result = db.execute(
+            select(
+                TraceabilityRecord.id,
+                TraceabilityRecord.block_number,
+                TraceabilityRecord.blockchain_hash,
+                TraceabilityRecord.created_at,
+                TraceabilityRecord.trace_data
+            )
+            .where(TraceabilityRecord.block_number >= first_legacy)
+            .order_by(TraceabilityRecord.block_number)
+            .execution_options(yield_per=batch_size)
+        )
+        
+        resealed = 0
+        try:
+            for rows in result.partitions(batch_size):
+                params = []
+                for record_id, number, old_hash, created_at, trace_data in rows:
+                    new_hash = BlockchainService.calculate_hash(trace_data, previous_hash, number, created_at)
+                    params.append({'rid': record_id, 'new_hash': new_hash, 'new_previous': previous_hash, 'old_hash': old_hash})
+                    previous_hash = new_hash
+                db.execute(statement, params)
+                resealed += len(params)
+        finally:
+            result.close()
+        
+        head.block_hash = previous_hash
+        head.updated_at = datetime.utcnow()
+        # Les hash ont changé : le prochain contrôle repart du bloc 1
+        db.query(ChainCheckpoint).filter(ChainCheckpoint.chain == CHAIN_NAME).delete()
+        db.commit()
+        logger.info(f"Resealed {resealed} traceability blocks from #{first_legacy} with hash v{CURRENT_HASH_VERSION}")
+        return resealed
+
 
 class QRCodeService:
     """Service pour générer et gérer les QR codes"""
     
+    # Paramètres de rendu (changer l'un d'eux change l'image : incrémenter RENDER_VERSION)
+    ERROR_CORRECTION = qrcode.constants.ERROR_CORRECT_H
+    BOX_SIZE = 10
+    BORDER = 4
+    RENDER_VERSION = 1
+    FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+    
     @staticmethod
-    def generate_qr_code(data: str) -> str:
-        """Génère un QR code et retourne l'image en base64"""
+    def payload(qr_code: str, delivery_id, blockchain_hash: str) -> str:
+        """Contenu encodé dans le QR code d'un bloc"""
+        return json.dumps({
+            'qr_code': qr_code,
+            'delivery_id': str(delivery_id),
+            'blockchain_hash': blockchain_hash,
+            'verify_url': f'/api/v1/traceability/verify/{qr_code}'
+        })
+    
+    @staticmethod
+    def render(data: str, image_format: str = "png") -> bytes:
+        """Rend le QR code en PNG ou SVG (octets bruts)"""
         qr = qrcode.QRCode(
             version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=10,
-            border=4,
+            error_correction=QRCodeService.ERROR_CORRECTION,
+            box_size=QRCodeService.BOX_SIZE,
+            border=QRCodeService.BORDER,
         )
         qr.add_data(data)
         qr.make(fit=True)
         
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convertir en base64
         buffer = io.BytesIO()
-        img.save(buffer, format='PNG')
-        img_str = base64.b64encode(buffer.getvalue()).decode()
-        
-        return f"data:image/png;base64,{img_str}"
+        if image_format == "svg":
+            qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+        else:
+            qr.make_image(fill_color="black", back_color="white").save(buffer, format='PNG')
+        return buffer.getvalue()
 
 class TraceabilityService:
     """Service principal de traçabilité"""
     
     @staticmethod
-    def create_traceability_record(db: Session, delivery: Delivery) -> TraceabilityRecord:
+    def create_traceability_record(
+        db: Session,
+        delivery: Delivery,
+        resolver: Optional[EntityResolver] = None
+    ) -> TraceabilityRecord:
         """Crée un enregistrement de traçabilité pour une livraison"""
+        return TraceabilityService.create_traceability_records(db, [delivery], resolver)[0]
+    
+    @staticmethod
+    def create_traceability_records(
+        db: Session,
+        deliveries: List[Delivery],
+        resolver: Optional[EntityResolver] = None
+    ) -> List[TraceabilityRecord]:
+        """
+        Ajoute un bloc par livraison, dans l'ordre, en une seule transaction.
         
-        # Obtenir le dernier bloc
-        last_record = db.query(TraceabilityRecord).order_by(
-            TraceabilityRecord.block_number.desc()
-        ).first()
-        
-        block_number = (last_record.block_number + 1) if last_record else 1
-        previous_hash = last_record.blockchain_hash if last_record else None
+        Séquencement : la tête de chaîne (chain_heads) est verrouillée par
+        SELECT ... FOR UPDATE le temps de numéroter, hacher et insérer les
+        blocs puis de l'avancer. Les écrivains concurrents attendent ce verrou
+        de ligne au lieu de lire MAX(block_number) en même temps : ni numéro
+        en double ni fourche. Ce qui ne dépend pas du bloc précédent est
+        préparé avant le verrou.
+        """
+        if not deliveries:
+            return []
+        planters = (resolver or EntityResolver(db)).planters(d.planter_id for d in deliveries)
         
         # Préparer les données de traçabilité
-        trace_data = {
-            'delivery_id': str(delivery.id),
-            'planter_id': str(delivery.planter_id),
-            'planter_name': delivery.planter.nom if delivery.planter else None,
-            'date': delivery.date.isoformat(),
-            'quantity_kg': float(delivery.quantity_kg),
-            'quality': delivery.quality,
-            'load_location': delivery.load_location,
-            'unload_location': delivery.unload_location,
-            'vehicle': delivery.vehicle,
-            'created_at': datetime.utcnow().isoformat()
-        }
-        
-        # Calculer le hash blockchain
-        blockchain_hash = BlockchainService.calculate_hash(
-            trace_data,
-            previous_hash,
-            block_number
-        )
-        
-        # Générer le code QR unique
-        qr_code = f"COCOA-{delivery.id}-{blockchain_hash[:8]}"
-        qr_data = json.dumps({
-            'qr_code': qr_code,
-            'delivery_id': str(delivery.id),
-            'blockchain_hash': blockchain_hash,
-            'verify_url': f'/api/v1/traceability/verify/{qr_code}'
-        })
-        
-        qr_code_image = QRCodeService.generate_qr_code(qr_data)
+        prepared = []
+        for delivery in deliveries:
+            planter = planters.get(delivery.planter_id)
+            prepared.append((delivery, {
+                'delivery_id': str(delivery.id),
+                'planter_id': str(delivery.planter_id),
+                'planter_name': planter.name if planter else None,
+                'date': delivery.date.isoformat(),
+                'quantity_kg': float(delivery.quantity_kg),
+                'quality': delivery.quality,
+                'load_location': delivery.load_location,
+                'unload_location': delivery.unload_location,
+                'vehicle': delivery.vehicle
+            }))
         
-        # Créer l'enregistrement
-        record = TraceabilityRecord(
-            delivery_id=delivery.id,
-            qr_code=qr_code,
-            qr_code_image=qr_code_image,
-            blockchain_hash=blockchain_hash,
-            previous_hash=previous_hash,
-            block_number=block_number,
-            trace_data=trace_data
-        )
+        head = _lock_chain_head(db)
+        block_number, previous_hash = head.block_number, head.block_hash
+        # Horodatage stocké (created_at) et haché : le hash reste recalculable
+        now = datetime.utcnow()
+        records = []
+        for delivery, trace_data in prepared:
+            block_number += 1
+            trace_data['created_at'] = now.isoformat()
+            
+            # Calculer le hash blockchain
+            blockchain_hash = BlockchainService.calculate_hash(
+                trace_data,
+                previous_hash,
+                block_number,
+                now
+            )
+            
+            # Générer le code QR unique (image rendue à la demande, voir qr_image_service)
+            qr_code = f"COCOA-{delivery.id}-{blockchain_hash[:8]}"
+            
+            records.append(TraceabilityRecord(
+                delivery_id=delivery.id,
+                qr_code=qr_code,
+                blockchain_hash=blockchain_hash,
+                previous_hash=previous_hash,
+                block_number=block_number,
+                hash_version=CURRENT_HASH_VERSION,
+                trace_data=trace_data,
+                created_at=now
+            ))
+            previous_hash = blockchain_hash
         
-        db.add(record)
+        db.add_all(records)
+        head.block_number, head.block_hash, head.updated_at = block_number, previous_hash, now
         db.commit()
-        db.refresh(record)
         
-        return record
+        return records
     
     @staticmethod
     def scan_qr_code(
@@ -185,20 +552,27 @@ class TraceabilityService:
             }
         
         # Recalculer le hash pour vérifier l'intégrité
-        calculated_hash = BlockchainService.calculate_hash(
-            record.trace_data,
-            record.previous_hash,
-            record.block_number
-        )
-        
-        is_valid = calculated_hash == record.blockchain_hash
+        try:
+            calculated_hash = BlockchainService.calculate_hash(
+                record.trace_data,
+                record.previous_hash,
+                record.block_number,
+                record.created_at,
+                record.hash_version
+            )
+            is_valid = calculated_hash == record.blockchain_hash
+            message = 'Livraison authentique et vérifiée' if is_valid else 'Données altérées - Non authentique'
+        except LegacyBlockError:
+            is_valid = False
+            message = 'Bloc antérieur au hachage reproductible - Rescellement requis'
         
         return {
             'is_valid': is_valid,
             'blockchain_hash': record.blockchain_hash,
             'block_number': record.block_number,
             'previous_hash': record.previous_hash,
-            'message': 'Livraison authentique et vérifiée' if is_valid else 'Données altérées - Non authentique',
+            'hash_version': record.hash_version,
+            'message': message,
             'trace_data': record.trace_data,
             'scans_count': len(record.scans),
             'created_at': record.created_at.isoformat()
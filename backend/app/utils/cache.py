@@ -0,0 +1,133 @@
+"""
+Cache mémoire à durée de vie courte, invalidé par version des données
+
+Pendant `ttl` secondes la valeur est servie sans aucune requête. Ensuite la
+version est recalculée (requête peu coûteuse) : si elle n'a pas changé,
+la valeur est reconduite ; sinon elle est recalculée.
+Le cache est local au processus (chaque worker uvicorn a le sien).
+
+TTLCache : variante sans version, pour les valeurs dont les écritures
+connues invalident explicitement les entrées concernées.
+
+LRUCache : octets adressés par leur contenu (jamais périmés), bornés en
+taille totale ; les moins récemment lus sortent.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+import threading
+import time
+
+
+class VersionedCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Hashable, Tuple[str, float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        get_version: Callable[[], str],
+        compute: Callable[[], Any]
+    ) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+        # Âge comparé au TTL courant à la lecture : un changement de `ttl` vaut aussi pour les entrées existantes
+        if entry and time.monotonic() - entry[1] < self.ttl:
+            return entry[2]
+
+        version = get_version()
+        if entry and entry[0] == version:
+            value = entry[2]
+        else:
+            value = compute()
+        with self._lock:
+            self._entries[key] = (version, time.monotonic(), value)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+class TTLCache:
+    """
+    Cache clé -> valeur à durée de vie fixe, invalidé explicitement par les
+    écritures connues. Borné à `maxsize` entrées (les plus anciennes sortent).
+    Un calcul commencé avant une invalidation n'est pas installé : il a pu
+    lire l'état antérieur à l'écriture.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        # Incrémenté par invalidate (toutes clés confondues)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            generation = self._generation
+        if entry and entry[0] > now:
+            return entry[1]
+
+        value = compute()
+        with self._lock:
+            if generation != self._generation:
+                # Invalidé pendant le calcul : valeur servie une fois, pas mise en cache
+                return value
+            self._entries.pop(key, None)
+            while len(self._entries) >= self.maxsize:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+        return value
+
+    def invalidate(self, keys: Optional[Iterable[Hashable]] = None) -> None:
+        with self._lock:
+            self._generation += 1
+            if keys is None:
+                self._entries.clear()
+            else:
+                for key in keys:
+                    self._entries.pop(key, None)
+
+
+class LRUCache:
+    """Cache clé -> bytes borné à `max_bytes` octets au total"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            while self._entries and self._size + len(value) > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+            self._entries[key] = value
+            self._size += len(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
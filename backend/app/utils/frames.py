@@ -0,0 +1,46 @@
+"""
+Trames temps réel sérialisées une seule fois
+
+Une diffusion construit une `Frame` par message et l'envoie telle quelle à
+toutes les connexions (WebSocket : texte, SSE : ligne `data:`), au lieu de
+ré-encoder le même dict en JSON pour chaque destinataire.
+orjson est utilisé s'il est installé (optionnel), sinon json.
+"""
+from typing import Any, Optional
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+
+
+def _default(o: Any) -> str:
+    # Dates au format ISO 8601, comme orjson les sérialise nativement
+    return o.isoformat() if hasattr(o, "isoformat") else str(o)
+
+
+def dumps(message: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(message, default=_default).decode("utf-8")
+    return json.dumps(message, default=_default, ensure_ascii=False, separators=(",", ":"))
+
+
+class Frame:
+    """Message pré-encodé, partagé entre toutes les connexions destinataires"""
+    __slots__ = ("message", "text", "_sse")
+
+    def __init__(self, message: Any):
+        self.message = message
+        self.text = dumps(message)
+        self._sse: Optional[str] = None
+
+    def sse(self) -> str:
+        """Événement SSE complet (encodé au premier appel)"""
+        if self._sse is None:
+            self._sse = f"data: {self.text}\n\n"
+        return self._sse
+
+
+def as_frame(message: Any) -> Frame:
+    return message if isinstance(message, Frame) else Frame(message)
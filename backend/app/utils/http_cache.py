@@ -0,0 +1,30 @@
+"""
+Requêtes conditionnelles (ETag / If-None-Match)
+
+Les listes servies avec un ETag sont revalidées par le navigateur
+(`Cache-Control: private, no-cache`) : si rien n'a changé, la réponse est un
+304 sans corps.
+"""
+from fastapi import Request, Response
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Comparaison faible (RFC 9110) : W/ ignoré, le proxy gzip peut l'ajouter
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -1,5 +1,14 @@
-from typing import TypeVar, Generic, List
+from typing import TypeVar, Generic, List, Optional, Sequence, Tuple, Any
 from pydantic import BaseModel
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+import base64
+import json
 
 T = TypeVar('T')
 
@@ -7,7 +16,91 @@ class PaginatedResponse(BaseModel, Generic[T]):
     items: List[T]
     page: int
     size: int
-    total: int
-    
+    total: Optional[int] = None
+    # Mode curseur : curseur opaque de la page suivante (None en fin de liste)
+    next_cursor: Optional[str] = None
+    # True si `total` est une estimation du planificateur PostgreSQL
+    total_is_estimate: bool = False
+
     class Config:
         from_attributes = True
+
+
+# --- Pagination par clé (keyset) ---
+#
+# Le curseur encode les valeurs de la clé de tri du dernier élément (id en
+# dernier pour départager). La page suivante est lue avec
+# `(col1, ..., id) < (v1, ..., id)` : le coût ne dépend pas de la profondeur,
+# contrairement à OFFSET.
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else str(v) if isinstance(v, (UUID, Decimal)) else v for v in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def _coerce(column, value):
+    """Reconvertir une valeur du curseur vers le type Python de la colonne"""
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+def decode_cursor(cursor: str, columns: Sequence) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor length mismatch")
+        return [_coerce(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_paginate(
+    query,
+    columns: Sequence,
+    cursor: Optional[str],
+    size: int,
+    descending: bool = True
+) -> Tuple[list, Optional[str]]:
+    """
+    Pagine `query` par clé sur `columns` (la dernière doit être unique, ex. id).
+    Retourne (éléments, curseur suivant).
+    """
+    if cursor:
+        key = tuple_(*columns)
+        values = tuple_(*decode_cursor(cursor, columns))
+        query = query.filter(key < values if descending else key > values)
+
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    rows = query.limit(size + 1).all()
+
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+    return rows, next_cursor
+
+
+class _Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+def estimate_count(query) -> int:
+    """
+    Nombre de lignes estimé par le planificateur (EXPLAIN, sans exécuter la
+    requête). Précis à quelques % près quand les statistiques sont à jour.
+    """
+    plan = query.session.execute(_Explain(query.order_by(None).statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,53 @@
+"""
+Comptage des requêtes SQL par requête HTTP
+
+Un écouteur `before_cursor_execute` incrémente le compteur du contexte
+courant (contextvars : propagé aux threads du threadpool de Starlette).
+Hors contexte de suivi, l'écouteur ne fait rien.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCounter:
+    """Compteur mutable partagé entre la requête et ses threads"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __int__(self) -> int:
+        return self.count
+
+
+_current: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _current.get()
+    if counter is not None:
+        counter.count += 1
+
+
+def install(engine: Engine) -> None:
+    """Brancher le compteur sur un moteur (idempotent)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryCounter]:
+    """Compter les requêtes émises dans le bloc"""
+    counter = QueryCounter()
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
+
+
+def current_count() -> Optional[int]:
+    counter = _current.get()
+    return counter.count if counter is not None else None
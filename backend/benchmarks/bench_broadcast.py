@@ -0,0 +1,84 @@
+"""
+Micro-benchmark du coût CPU d'une diffusion temps réel
+
+    python -m benchmarks.bench_broadcast [--members 300] [--messages 2000]
+
+Compare, pour un canal de N membres, l'encodage JSON par destinataire
+(ancien `send_json` / `json.dumps` par file SSE) à une `Frame` encodée une
+seule fois, avec json puis orjson s'il est installé.
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+
+from app.utils import frames
+from app.utils.frames import Frame
+
+
+def _message(i: int) -> dict:
+    return {
+        "type": "new_message",
+        "data": {
+            "id": f"5b0c6a6e-3f1d-4c55-9d7e-{i:012d}",
+            "channel_id": "0f8e2c1a-9b7d-4e6f-8a5c-3d2b1a0f9e8d",
+            "sender_id": "a1b2c3d4-e5f6-4a7b-8c9d-0e1f2a3b4c5d",
+            "sender_email": "chef.zone.a@cooperative.ci",
+            "content": "Livraison de 1 250 kg reçue au magasin de Soubré, qualité grade 1. " * 3,
+            "message_type": "text",
+            "mentions": ["a1b2c3d4-e5f6-4a7b-8c9d-0e1f2a3b4c5d"],
+            "entity_references": [{"type": "livraison", "id": str(i)}],
+            "attachments": [],
+            "created_at": datetime(2025, 1, 10, 8, 30).isoformat()
+        }
+    }
+
+
+def legacy(messages, members: int) -> None:
+    for message in messages:
+        for _ in range(members):
+            # Starlette send_json : json.dumps par socket
+            json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def framed(messages, members: int) -> None:
+    for message in messages:
+        frame = Frame(message)
+        for _ in range(members):
+            frame.text
+
+
+def _report(name: str, elapsed: float, count: int) -> None:
+    print(f"{name:<14} {elapsed * 1e6 / count:10.1f} µs CPU/message")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--members", type=int, default=300)
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    messages = [_message(i) for i in range(args.messages)]
+    print(f"Canal de {args.members} membres, {args.messages} messages")
+
+    start = time.process_time()
+    legacy(messages, args.members)
+    _report("par socket", time.process_time() - start, len(messages))
+
+    orjson = frames.orjson
+    frames.orjson = None
+    start = time.process_time()
+    framed(messages, args.members)
+    _report("frame json", time.process_time() - start, len(messages))
+    frames.orjson = orjson
+
+    if orjson is not None:
+        start = time.process_time()
+        framed(messages, args.members)
+        _report("frame orjson", time.process_time() - start, len(messages))
+    else:
+        print("orjson non installé")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark de la diffusion d'une notification à N destinataires
+
+    python -m benchmarks.bench_notifications [--recipients 500]
+
+Compare l'ancien chemin (une création + commit + refresh par destinataire)
+à l'insertion groupée de notification_service. Nécessite la base
+(DATABASE_URL) ; les utilisateurs de test sont supprimés à la fin.
+"""
+import argparse
+import time
+import uuid
+
+from app.database import SessionLocal
+from app.models import User, Notification
+from app.schemas.notification import NotificationCreate
+from app.services import notification_service
+from app.utils import query_counter
+from app.database import engine
+
+
+def legacy_fan_out(db, role: str, actor_id) -> None:
+    """Chemin historique : une notification commitée et rafraîchie par utilisateur"""
+    users = db.query(User).filter(User.role == role, User.id != actor_id).all()
+    for user in users:
+        notification_service.create_notification(db, NotificationCreate(
+            user_id=user.id,
+            type='action',
+            title="Nouvelle action: delivery",
+            message="bench",
+            entity_type='planteur',
+            entity_id=actor_id,
+            action_by=actor_id
+        ))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipients", type=int, default=500)
+    args = parser.parse_args()
+
+    query_counter.install(engine)
+    role = f"bench_{uuid.uuid4().hex[:8]}"
+    db = SessionLocal()
+    try:
+        users = [
+            User(email=f"{role}_{i}@bench.local", password_hash="-", role=role)
+            for i in range(args.recipients + 1)
+        ]
+        db.add_all(users)
+        db.commit()
+        actor_id = users[0].id
+
+        for name, run in (
+            ("legacy", lambda: legacy_fan_out(db, role, actor_id)),
+            ("bulk", lambda: notification_service.create_action_notification(
+                db, 'delivery', 'planteur', 'bench', actor_id, actor_id, [role]
+            )),
+        ):
+            with query_counter.track_queries() as queries:
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+            print(f"{name:<8} {elapsed * 1000:9.1f} ms  {queries.count:5d} requêtes  ({args.recipients} destinataires)")
+    finally:
+        db.rollback()
+        user_ids = db.query(User.id).filter(User.role == role)
+        db.query(Notification).filter(Notification.user_id.in_(user_ids)).delete(synchronize_session=False)
+        db.query(User).filter(User.role == role).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
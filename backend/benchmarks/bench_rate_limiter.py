@@ -0,0 +1,98 @@
+"""
+Micro-benchmark du coût par requête du rate limiter
+
+    python -m benchmarks.bench_rate_limiter [--clients 500] [--requests 200000] [--postgres]
+
+Compare l'ancien stockage (liste de (datetime, path) reconstruite et
+reclassée à chaque requête) au backend mémoire O(1). --postgres mesure
+aussi le backend partagé (nécessite DATABASE_URL et les tables).
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from app.middleware.rate_limit_backends import InMemoryBackend
+
+CONFIG = {"requests": 200, "window": 60, "block_duration": 30}
+PATHS = ["/api/v1/deliveries", "/api/v1/planters", "/api/v1/analytics/summary", "/api/v1/notifications"]
+
+
+def _classify(path: str, method: str) -> str:
+    path_lower = path.lower()
+    if "/auth/" in path_lower or "/login" in path_lower or "/register" in path_lower:
+        return "auth"
+    if "/upload" in path_lower or "/files" in path_lower:
+        return "upload"
+    if "/ws" in path_lower:
+        return "websocket"
+    if method in ["POST", "PUT", "PATCH", "DELETE"]:
+        return "write"
+    return "read"
+
+
+def legacy_hit(requests: dict, client_key: str, path: str) -> bool:
+    """Algorithme historique, sans verrou ni blocage (borne basse de son coût)"""
+    now = datetime.now()
+    endpoint_type = _classify(path, "GET")
+    window_start = now - timedelta(seconds=CONFIG["window"])
+    requests[client_key] = [(ts, ep) for ts, ep in requests[client_key] if ts > window_start]
+    count = len([1 for ts, ep in requests[client_key] if _classify(ep, "GET") == endpoint_type])
+    if count >= CONFIG["requests"]:
+        return False
+    requests[client_key].append((now, path))
+    return True
+
+
+def _workload(clients: int, total: int):
+    rng = random.Random(42)
+    return [(f"client{rng.randrange(clients)}", rng.choice(PATHS)) for _ in range(total)]
+
+
+def _report(name: str, elapsed: float, total: int) -> None:
+    print(f"{name:<12} {elapsed * 1e6 / total:8.2f} µs/requête  ({total / elapsed:,.0f} req/s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--postgres", action="store_true")
+    args = parser.parse_args()
+
+    workload = _workload(args.clients, args.requests)
+
+    requests = defaultdict(list)
+    start = time.perf_counter()
+    for client_key, path in workload:
+        legacy_hit(requests, client_key, path)
+    _report("legacy", time.perf_counter() - start, len(workload))
+
+    backend = InMemoryBackend()
+    start = time.perf_counter()
+    for client_key, path in workload:
+        backend.hit_sync(client_key, _classify(path, "GET"), CONFIG)
+    _report("memory", time.perf_counter() - start, len(workload))
+
+    if args.postgres:
+        from app.middleware.rate_limit_backends import PostgresBackend
+        backend = PostgresBackend()
+        sample = workload[:2000]
+        start = time.perf_counter()
+        for client_key, path in sample:
+            backend.hit_sync(client_key, _classify(path, "GET"), CONFIG)
+        _report("postgres", time.perf_counter() - start, len(sample))
+
+        async def concurrent():
+            await asyncio.gather(*[
+                backend.hit(client_key, _classify(path, "GET"), CONFIG) for client_key, path in sample
+            ])
+        start = time.perf_counter()
+        asyncio.run(concurrent())
+        _report("postgres//", time.perf_counter() - start, len(sample))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark de la recherche de planteurs par nom
+
+    python -m benchmarks.bench_search [--planters 100000] [--runs 20]
+
+Compare l'ancien filtre `name ILIKE '%q%'` (parcours séquentiel : les index
+btree ne servent pas un joker en tête) à search_service (index GIN
+trigramme sur le nom replié, classement par pertinence), sur la première
+page de `planter_service.get_planters`. Nécessite la base (DATABASE_URL) et
+la migration 023 ; les planteurs de test sont supprimés à la fin.
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import insert, text
+
+from app.database import SessionLocal
+from app.models import Planter
+from app.services import planter_service
+
+FIRST = ["Kouamé", "Kouassi", "Konan", "Yao", "N'Guessan", "Koffi", "Adjoua", "Aya", "Amenan", "Séraphin",
+         "Bamba", "Traoré", "Ouattara", "Coulibaly", "Koné", "Zadi", "Gnagne", "Éric", "Hélène", "Brou"]
+LAST = ["Kouadio", "Yapi", "Assi", "Djédjé", "Gbagbo", "Tanoh", "Kablan", "Aké", "Bédié", "Diabaté",
+        "Fofana", "Sangaré", "Touré", "Goré", "Lobognon", "Zoro", "Dago", "Tiémoko", "Ahoua", "Kra"]
+# (requête, ce qu'elle exerce)
+QUERIES = [
+    ("kouame", "sans accent"),
+    ("Djédjé Kouassi", "nom complet"),
+    ("kouasi", "faute de frappe"),
+    ("ané", "fragment"),
+]
+
+
+def _legacy(db, search: str, size: int = 50):
+    query = db.query(Planter).filter(Planter.name.ilike(f"%{search}%"))
+    return query.offset(0).limit(size).all(), query.count()
+
+
+def _time(run, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--planters", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    tag = f"bench_{uuid.uuid4().hex[:8]}"
+    rng = random.Random(42)
+    db = SessionLocal()
+    try:
+        rows = [
+            {"id": uuid.uuid4(), "name": f"{rng.choice(FIRST)} {rng.choice(LAST)} {i}", "cooperative": tag}
+            for i in range(args.planters)
+        ]
+        for start in range(0, len(rows), 10_000):
+            db.execute(insert(Planter), rows[start:start + 10_000])
+        db.commit()
+        db.execute(text("ANALYZE planters"))
+        print(f"{args.planters} planteurs, médiane sur {args.runs} exécutions")
+
+        for search, label in QUERIES:
+            _, legacy_total = _legacy(db, search)
+            hits, total = planter_service.get_planters(db, search)
+            legacy = _time(lambda: _legacy(db, search), args.runs)
+            trigram = _time(lambda: planter_service.get_planters(db, search), args.runs)
+            print(
+                f"{label:<16} {search!r:<18} ILIKE {legacy * 1000:8.1f} ms ({legacy_total:6d})"
+                f"   trigramme {trigram * 1000:8.1f} ms ({total:6d})"
+                f"   1er : {hits[0].name if hits else '-'}"
+            )
+    finally:
+        db.rollback()
+        db.query(Planter).filter(Planter.cooperative == tag).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Rescellement des blocs de traçabilité v1 (hash non reproductible)
+
+    python reseal_chain.py
+
+À lancer une fois après la migration 025, de préférence hors des heures
+d'activité : les ajouts de blocs attendent la fin de l'opération.
+"""
+from app.database import SessionLocal
+from app.services.traceability_service import BlockchainService
+
+db = SessionLocal()
+try:
+    resealed = BlockchainService.reseal_legacy_blocks(db)
+    if resealed:
+        print(f"✅ {resealed} blocs rescellés")
+        verification = BlockchainService.verify_chain(db, full=True)
+        print(f"Audit complet : {verification.blocks_checked} blocs, valide={verification.is_valid}")
+    else:
+        print("Aucun bloc v1 à resceller")
+except Exception as e:
+    db.rollback()
+    print(f"❌ Erreur: {e}")
+    import traceback
+    traceback.print_exc()
+finally:
+    db.close()
@@ -0,0 +1,24 @@
+"""
+Suppression des images de QR code stockées en base64 (colonne qr_code_image)
+
+    python strip_qr_images.py
+
+Les images sont désormais rendues à la demande par
+/traceability/qr-code/{qr_code}/image. Peut être relancé sans risque.
+"""
+from app.database import SessionLocal
+from app.services.qr_image_service import strip_stored_images
+
+db = SessionLocal()
+try:
+    stripped = strip_stored_images(db)
+    print(f"✅ {stripped} images supprimées")
+    if stripped:
+        print("Pour rendre l'espace au système : VACUUM (ANALYZE) traceability_records;")
+except Exception as e:
+    db.rollback()
+    print(f"❌ Erreur: {e}")
+    import traceback
+    traceback.print_exc()
+finally:
+    db.close()
@@ -0,0 +1,142 @@
+"""Tests des synthèses analytiques"""
+import pytest
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import event
+from app.models import ChefPlanteur, Planter, Delivery, DeliveryDailyRollup
+from app.schemas import DeliveryCreate, DeliveryUpdate
+from app.services import analytics_service, rollup_service, delivery_service
+
+
+@contextmanager
+def count_queries(db):
+    """Compter les requêtes SQL émises sur la connexion de la session"""
+    statements = []
+    engine = db.get_bind()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _seed_fournisseurs(db, count: int, start: int = 0):
+    """Créer `count` fournisseurs avec deux planteurs et une livraison chacun"""
+    for i in range(start, start + count):
+        chef = ChefPlanteur(name=f"Fournisseur {i}", quantite_max_kg=10000)
+        db.add(chef)
+        db.flush()
+        for j in range(2):
+            planter = Planter(name=f"Planteur {i}-{j}", chef_planteur_id=chef.id)
+            db.add(planter)
+            db.flush()
+            db.add(Delivery(
+                planter_id=planter.id,
+                date=date(2025, 1, 10),
+                quantity_loaded_kg=100,
+                quantity_kg=90,
+                load_location="Zone A",
+                unload_location="Port",
+                quality="Grade 1"
+            ))
+    db.commit()
+    rollup_service.rebuild_rollup(db)
+
+
+def test_summary_by_fournisseur_totals(db):
+    """Les totaux agrégés correspondent aux livraisons des planteurs"""
+    _seed_fournisseurs(db, 3)
+    db.add(ChefPlanteur(name="Fournisseur sans planteur", quantite_max_kg=500))
+    db.commit()
+
+    summary = analytics_service.get_summary_by_fournisseur(db)
+    items = {item["fournisseur"]: item for item in summary["items"]}
+
+    assert len(items) == 4
+    assert items["Fournisseur 0"]["total_loaded_kg"] == 200
+    assert items["Fournisseur 0"]["total_unloaded_kg"] == 180
+    assert items["Fournisseur 0"]["nombre_livraisons"] == 2
+    assert items["Fournisseur sans planteur"]["nombre_livraisons"] == 0
+    assert summary["total_loaded"] == 600
+    assert summary["total_max"] == 30500
+
+
+def test_summary_by_fournisseur_date_filter_keeps_suppliers(db):
+    """Un fournisseur sans livraison dans la période reste présent à zéro"""
+    _seed_fournisseurs(db, 2)
+
+    summary = analytics_service.get_summary_by_fournisseur(db, from_date=date(2025, 2, 1))
+
+    assert len(summary["items"]) == 2
+    assert all(item["nombre_livraisons"] == 0 for item in summary["items"])
+    assert summary["total_loaded"] == 0
+
+
+def test_rollup_follows_delivery_writes(db):
+    """Création, modification et suppression maintiennent l'agrégat journalier"""
+    planter = Planter(name="Planteur rollup")
+    db.add(planter)
+    db.commit()
+    payload = dict(
+        planter_id=planter.id,
+        date=date(2025, 3, 1),
+        quantity_loaded_kg=100,
+        quantity_kg=95,
+        load_location="Zone A",
+        unload_location="Port",
+        quality="Grade 1"
+    )
+
+    first = delivery_service.create_delivery(db, DeliveryCreate(**payload))
+    delivery_service.create_delivery(db, DeliveryCreate(**payload))
+    row = db.query(DeliveryDailyRollup).one()
+    assert row.delivery_count == 2
+    assert float(row.unloaded_kg) == 190
+
+    delivery_service.update_delivery(db, first.id, DeliveryUpdate(**{**payload, "quality": "Grade 2"}))
+    assert db.query(DeliveryDailyRollup).count() == 2
+
+    delivery_service.delete_delivery(db, first.id)
+    row = db.query(DeliveryDailyRollup).one()
+    assert row.quality == "Grade 1"
+    assert row.delivery_count == 1
+
+    summary = analytics_service.get_summary_by_planter(db)
+    assert summary["total_general"] == 95
+
+
+def test_incremental_rollup_matches_rebuild_exactly(db):
+    """Quantités décimales : l'agrégat incrémental reste égal à l'agrégat reconstruit"""
+    planter = Planter(name="Planteur décimal")
+    db.add(planter)
+    db.commit()
+    for loaded in (0.1, 0.2, 0.7, 1234.35, 0.05):
+        delivery_service.create_delivery(db, DeliveryCreate(
+            planter_id=planter.id, date=date(2025, 3, 2), quantity_loaded_kg=loaded, quantity_kg=loaded,
+            load_location="Zone A", unload_location="Port", quality="Grade 1"
+        ))
+    incremental = db.query(DeliveryDailyRollup.loaded_kg, DeliveryDailyRollup.unloaded_kg).one()
+    assert incremental.loaded_kg == Decimal("1235.40")
+
+    rollup_service.rebuild_rollup(db)
+    assert db.query(DeliveryDailyRollup.loaded_kg, DeliveryDailyRollup.unloaded_kg).one() == incremental
+
+
+@pytest.mark.slow
+def test_summary_by_fournisseur_query_count_is_constant(db):
+    """Le nombre de requêtes ne dépend pas du nombre de fournisseurs"""
+    _seed_fournisseurs(db, 5)
+    with count_queries(db) as small:
+        analytics_service.get_summary_by_fournisseur(db, date(2025, 1, 1), date(2025, 12, 31))
+
+    _seed_fournisseurs(db, 200, start=5)
+
+    with count_queries(db) as large:
+        analytics_service.get_summary_by_fournisseur(db, date(2025, 1, 1), date(2025, 12, 31))
+
+    assert len(small) == len(large) == 1
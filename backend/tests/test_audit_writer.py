@@ -0,0 +1,69 @@
+"""Tests de l'écriture groupée du journal d'audit"""
+import asyncio
+import time
+from app.models import AuditLog
+from app.services.audit_writer import AuditWriter, audit_event
+from tests.conftest import TestingSessionLocal
+
+
+def test_events_are_flushed_in_batches_and_drained_on_stop(db):
+    writer = AuditWriter(batch_size=500, flush_interval=0.2, session_factory=TestingSessionLocal)
+
+    async def scenario():
+        await writer.start()
+        for i in range(1200):
+            assert await writer.enqueue(audit_event("CREATE", "Livraison", entity_id=str(i)))
+        await writer.stop()
+
+    asyncio.run(scenario())
+
+    assert db.query(AuditLog).count() == 1200
+    metrics = writer.get_metrics()
+    assert metrics["written"] == 1200
+    assert metrics["flushes"] >= 3
+    assert metrics["queue_depth"] == 0
+
+
+def test_rejected_event_does_not_drop_its_batch(db):
+    writer = AuditWriter(batch_size=500, flush_interval=0.2, session_factory=TestingSessionLocal)
+    events = [audit_event("CREATE", "Livraison", entity_id=str(i)) for i in range(100)]
+    # action limitée à 50 caractères
+    events[37]["action"] = "X" * 80
+
+    async def scenario():
+        await writer.start()
+        for event in events:
+            await writer.enqueue(event)
+        await writer.stop()
+
+    asyncio.run(scenario())
+
+    assert db.query(AuditLog).count() == 99
+    assert db.query(AuditLog).filter(AuditLog.entity_id == "37").count() == 0
+    metrics = writer.get_metrics()
+    assert metrics["written"] == 99
+    assert metrics["failed"] == 1
+
+
+class SlowWriter(AuditWriter):
+    def _write(self, batch):
+        time.sleep(0.5)
+        self.metrics["written"] += len(batch)
+
+
+def test_full_queue_drops_instead_of_blocking():
+    writer = SlowWriter(maxsize=10, batch_size=5, flush_interval=0.01, enqueue_timeout=0.01)
+
+    async def scenario():
+        await writer.start()
+        start = time.monotonic()
+        results = [await writer.enqueue(audit_event("UPDATE", "Planteur")) for _ in range(50)]
+        elapsed = time.monotonic() - start
+        await writer.stop()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(scenario())
+
+    assert results.count(False) == writer.get_metrics()["dropped"] > 0
+    assert elapsed < 2
+    assert writer.get_metrics()["written"] == results.count(True)
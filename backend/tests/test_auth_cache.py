@@ -0,0 +1,70 @@
+"""Tests du cache d'authentification"""
+from datetime import datetime, timedelta
+from app.models import User
+from app.models.session import Session as SessionModel
+from app.services.auth_cache import AuthCache, auth_cache
+
+
+def test_entries_are_invalidated_by_user_and_session():
+    cache = AuthCache(ttl=60)
+    user = User(email="a@test.com", password_hash="-", role="viewer")
+    user.id = "5b0c6a6e-3f1d-4c55-9d7e-000000000001"
+    session = SessionModel(id=7, expires_at=datetime.utcnow() + timedelta(days=1))
+
+    cache.put("k1", user, session)
+    cache.put("k2", user, None)
+    assert cache.get("k1").session_id == 7
+
+    cache.invalidate_sessions([7])
+    assert cache.get("k1") is None and cache.get("k2") is not None
+
+    cache.invalidate_users([user.id])
+    assert cache.get("k2") is None
+
+
+def test_entry_loaded_before_invalidation_is_not_cached():
+    cache = AuthCache(ttl=60)
+    user = User(email="c@test.com", password_hash="-", role="manager")
+    user.id = "5b0c6a6e-3f1d-4c55-9d7e-000000000002"
+
+    generation = cache.generation()
+    # Rétrogradation validée entre le chargement et la mise en cache
+    cache.invalidate_users([user.id])
+    entry = cache.put("k1", user, None, generation)
+    assert entry.user.role == "manager"
+    assert cache.get("k1") is None
+
+    cache.put("k1", user, None, cache.generation())
+    assert cache.get("k1") is not None
+
+
+def test_cached_user_sees_role_change(client, auth_headers, db):
+    assert client.get("/api/v1/auth/me", headers=auth_headers).json()["role"] == "viewer"
+
+    user = db.query(User).filter(User.email == "test@example.com").one()
+    user.role = "manager"
+    db.commit()
+    # Sans invalidation, l'entrée en cache est servie
+    assert client.get("/api/v1/auth/me", headers=auth_headers).json()["role"] == "viewer"
+
+    auth_cache.invalidate_users([user.id])
+    assert client.get("/api/v1/auth/me", headers=auth_headers).json()["role"] == "manager"
+
+
+def test_activity_updates_are_coalesced(db):
+    user = User(email="b@test.com", password_hash="-", role="viewer")
+    db.add(user)
+    db.commit()
+    old = datetime.utcnow() - timedelta(hours=1)
+    session = SessionModel(user_id=user.id, session_token="t" * 50, expires_at=datetime.utcnow() + timedelta(days=1), last_activity=old)
+    db.add(session)
+    db.commit()
+
+    cache = AuthCache(ttl=60, session_factory=lambda: db)
+    # Tâche de fond simulée : les activités s'accumulent sans écriture
+    cache._task = type("Running", (), {"done": lambda self: False})()
+    for _ in range(10):
+        cache.touch(session.id)
+    session_id = session.id
+    assert cache.flush() == 1
+    assert db.get(SessionModel, session_id).last_activity > old
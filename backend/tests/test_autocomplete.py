@@ -0,0 +1,75 @@
+"""Tests des dictionnaires d'autocomplétion en mémoire"""
+import threading
+from app.services import autocomplete_service
+from app.services.autocomplete_service import ValueDictionary
+
+
+class _Loader:
+    def __init__(self, values):
+        self.values = values
+        self.calls = 0
+
+    def __call__(self, db):
+        self.calls += 1
+        return list(self.values)
+
+
+def test_prefix_search_and_incremental_refresh():
+    loader = _Loader(["Soubré", "San-Pédro", "Daloa", None, "Sassandra"])
+    dictionary = ValueDictionary("lieux", loader)
+
+    assert dictionary.values(None) == ["Daloa", "San-Pédro", "Sassandra", "Soubré"]
+    # Préfixe insensible à la casse et aux accents
+    assert dictionary.prefix(None, "SA") == ["San-Pédro", "Sassandra"]
+    assert dictionary.prefix(None, "soubre") == ["Soubré"]
+    etag = dictionary.etag(None)
+
+    # Ajout incrémental : pas de rechargement, ETag changé
+    dictionary.add(["Séguéla", "Daloa"])
+    assert dictionary.prefix(None, "se") == ["Séguéla"]
+    assert dictionary.etag(None) != etag
+    assert loader.calls == 1
+
+    # Une valeur a pu disparaître : rechargement à la lecture suivante
+    loader.values = ["Daloa"]
+    dictionary.invalidate()
+    assert dictionary.values(None) == ["Daloa"]
+    assert loader.calls == 2
+
+
+def test_locations_are_revalidated_with_etag(client, auth_headers):
+    autocomplete_service.invalidate(*autocomplete_service.DICTIONARIES)
+
+    first = client.get("/api/v1/deliveries/locations/unique", headers=auth_headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    again = client.get("/api/v1/deliveries/locations/unique", headers={**auth_headers, "If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+
+
+def test_invalidate_during_reload_is_not_lost():
+    started, release = threading.Event(), threading.Event()
+
+    class SlowLoader(_Loader):
+        def __call__(self, db):
+            values = super().__call__(db)
+            if self.calls == 1:
+                started.set()
+                release.wait(5)
+            return values
+
+    loader = SlowLoader(["Daloa"])
+    dictionary = ValueDictionary("lieux", loader)
+    reader = threading.Thread(target=dictionary.values, args=(None,))
+    reader.start()
+    assert started.wait(5)
+
+    # Suppression/modification pendant le chargement : la liste lue est déjà périmée
+    loader.values = ["Soubré"]
+    dictionary.invalidate()
+    release.set()
+    reader.join(5)
+
+    assert dictionary.values(None) == ["Soubré"]
+    assert loader.calls == 2
@@ -0,0 +1,71 @@
+"""Tests des statistiques de coopératives"""
+from datetime import date
+from app.models import ChefPlanteur, Planter, Delivery
+from app.services import cooperative_service, rollup_service
+from app.utils import query_counter
+
+
+def _seed(db, coop_count: int):
+    for i in range(coop_count):
+        coop = f"Coop {i:03d}"
+        db.add(ChefPlanteur(name=f"Fournisseur {i}", quantite_max_kg=1000, cooperative=coop))
+        for j in range(2):
+            planter = Planter(name=f"Planteur {i}-{j}", cooperative=coop)
+            db.add(planter)
+            db.flush()
+            db.add(Delivery(
+                planter_id=planter.id,
+                date=date(2025, 1, 10),
+                quantity_loaded_kg=100,
+                quantity_kg=90,
+                load_location="Zone A",
+                unload_location="Port",
+                quality="Grade 1"
+            ))
+    # Coopérative sans planteur
+    db.add(ChefPlanteur(name="Fournisseur seul", quantite_max_kg=1000, cooperative="Coop seule"))
+    db.commit()
+    rollup_service.rebuild_rollup(db)
+
+
+def test_cooperatives_stats_single_query(db):
+    """Effectifs et totaux corrects, calculés en une seule requête"""
+    query_counter.install(db.get_bind())
+    _seed(db, 20)
+
+    with query_counter.track_queries() as queries:
+        stats = cooperative_service.compute_cooperatives_stats(db)
+
+    assert queries.count == 1
+    by_name = {c['nom']: c for c in stats}
+    assert len(by_name) == 21
+    assert by_name['Coop 000'] == {
+        'nom': 'Coop 000',
+        'nb_planteurs': 2,
+        'nb_fournisseurs': 1,
+        'total_charge_kg': 200.0,
+        'total_decharge_kg': 180.0,
+        'pertes_kg': 20.0,
+        'pourcentage_pertes': 10.0
+    }
+    assert by_name['Coop seule']['nb_planteurs'] == 0
+    assert by_name['Coop seule']['nb_fournisseurs'] == 1
+
+
+def test_cooperatives_cache_follows_data_version(db):
+    _seed(db, 2)
+    cooperative_service.invalidate_cache()
+    cooperative_service.get_cooperatives_stats(db)
+
+    db.add(Planter(name="Nouveau planteur", cooperative="Coop nouvelle"))
+    db.commit()
+    # Dans le TTL : liste servie depuis le cache, sans relire la version
+    assert 'Coop nouvelle' not in {c['nom'] for c in cooperative_service.get_cooperatives_stats(db)}
+    # Au-delà du TTL, la version a changé : la liste est recalculée
+    cooperative_service._cache.ttl = 0
+    try:
+        stats = cooperative_service.get_cooperatives_stats(db)
+    finally:
+        cooperative_service._cache.ttl = cooperative_service.COOPERATIVES_CACHE_TTL
+
+    assert 'Coop nouvelle' in {c['nom'] for c in stats}
@@ -0,0 +1,103 @@
+"""Tests du bus temps réel SSE/WebSocket"""
+import asyncio
+from app.routers import sse
+from app.services.event_bus import InProcessBus, PostgresBus
+from tests.conftest import engine
+
+
+def test_in_process_bus_dispatches_from_loop_and_threads():
+    bus = InProcessBus()
+    received = []
+    bus.subscribe("topic", received.append)
+
+    async def scenario():
+        await bus.start()
+        bus.publish("topic", {"n": 1})
+        # Endpoint synchrone : publication depuis le threadpool
+        await asyncio.to_thread(bus.publish_many, "topic", [{"n": 2}, {"n": 3}])
+        await asyncio.sleep(0.01)
+        bus.publish("other", {"n": 4})
+        await bus.stop()
+
+    asyncio.run(scenario())
+    assert received == [{"n": 1}, {"n": 2}, {"n": 3}]
+
+
+def test_postgres_bus_reaches_every_worker():
+    workers = [PostgresBus(engine), PostgresBus(engine)]
+    received = [[], []]
+    for bus, inbox in zip(workers, received):
+        bus.subscribe("topic", inbox.append)
+
+    async def scenario():
+        for bus in workers:
+            await bus.start()
+        await asyncio.to_thread(workers[0].publish_many, "topic", [{"n": 1}, {"n": 2}])
+        for _ in range(50):
+            if all(len(inbox) == 2 for inbox in received):
+                break
+            await asyncio.sleep(0.05)
+        for bus in workers:
+            await bus.stop()
+
+    asyncio.run(scenario())
+    assert received == [[{"n": 1}, {"n": 2}]] * 2
+
+
+def test_postgres_bus_keeps_publish_order_from_the_loop():
+    publisher, listener = PostgresBus(engine), PostgresBus(engine)
+    received = []
+    listener.subscribe("topic", received.append)
+
+    async def scenario():
+        await publisher.start()
+        await listener.start()
+        # Publications successives depuis la même coroutine (ex. record puis invalidate)
+        for n in range(20):
+            publisher.publish("topic", {"n": n})
+        for _ in range(50):
+            if len(received) == 20:
+                break
+            await asyncio.sleep(0.05)
+        await publisher.stop()
+        await listener.stop()
+
+    asyncio.run(scenario())
+    assert received == [{"n": n} for n in range(20)]
+
+
+def test_sse_notifications_go_through_the_bus():
+    async def scenario():
+        await sse.event_bus.start()
+        queue = asyncio.Queue(maxsize=10)
+        sse.active_connections["user-1"] = [queue]
+        try:
+            await asyncio.to_thread(sse.broadcast_notifications, [("user-1", {"id": "a"}), ("user-2", {"id": "b"})])
+            frame = await asyncio.wait_for(queue.get(), timeout=1)
+            return frame.message
+        finally:
+            del sse.active_connections["user-1"]
+            await sse.event_bus.stop()
+
+    assert asyncio.run(scenario()) == {"type": "notification", "data": {"id": "a"}}
+
+
+def test_frame_encoding_does_not_depend_on_orjson(monkeypatch):
+    from datetime import date, datetime, timezone
+    from uuid import UUID
+    from app.utils import frames
+
+    message = {
+        "at": datetime(2024, 3, 1, 8, 30, 15, 250, tzinfo=timezone.utc),
+        "day": date(2024, 3, 1),
+        "id": UUID("12345678-1234-5678-1234-567812345678"),
+        "text": "livraison reçue",
+    }
+    expected = (
+        '{"at":"2024-03-01T08:30:15.000250+00:00","day":"2024-03-01",'
+        '"id":"12345678-1234-5678-1234-567812345678","text":"livraison reçue"}'
+    )
+    if frames.orjson is not None:
+        assert frames.dumps(message) == expected
+    monkeypatch.setattr(frames, "orjson", None)
+    assert frames.dumps(message) == expected
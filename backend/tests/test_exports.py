@@ -0,0 +1,220 @@
+"""Tests des exports"""
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from datetime import date, datetime, timedelta
+import uuid
+import pytest
+from openpyxl import load_workbook
+from app import database
+from app.config import settings
+from app.models import ChefPlanteur, Planter, Delivery, Collecte, ExportJob
+from app.schemas.export_job import ExportJobCreate
+from app.services import export_job_service, export_service, rollup_service
+from app.utils import query_counter
+from tests.conftest import TestingSessionLocal
+
+
+def _seed(db, count: int, start: int = 0):
+    """Créer `count` fournisseurs, chacun avec un planteur, une livraison et une collecte"""
+    for i in range(start, start + count):
+        chef = ChefPlanteur(name=f"Fournisseur {i}", quantite_max_kg=10000, cooperative="Coop")
+        db.add(chef)
+        db.flush()
+        planter = Planter(name=f"Planteur {i}", chef_planteur_id=chef.id, cni=f"CNI{i}")
+        db.add(planter)
+        db.flush()
+        db.add(Delivery(
+            planter_id=planter.id,
+            date=date(2025, 1, 10),
+            quantity_loaded_kg=100,
+            quantity_kg=90,
+            load_location="Zone A",
+            unload_location="Port",
+            quality="Grade 1"
+        ))
+        db.add(Collecte(
+            designation=f"Collecte {i}",
+            chef_planteur_id=chef.id,
+            quantity_loaded_kg=500,
+            load_date=date(2025, 1, 10),
+            quantity_unloaded_kg=480,
+            unload_date=date(2025, 1, 11),
+            date_collecte=date(2025, 1, 10)
+        ))
+    db.commit()
+    rollup_service.rebuild_rollup(db)
+
+
+def _export_query_count(db) -> int:
+    db.expire_all()
+    with query_counter.track_queries() as queries:
+        export_service.export_excel(db)
+    return queries.count
+
+
+def test_export_excel_query_count_is_constant(db):
+    """Planteurs et fournisseurs sont résolus par lot, pas ligne par ligne"""
+    query_counter.install(db.get_bind())
+
+    _seed(db, 3)
+    small = _export_query_count(db)
+
+    _seed(db, 60, start=3)
+    large = _export_query_count(db)
+
+    assert small == large
+
+
+class InlineExecutor:
+    """Exécute les tâches tout de suite, dans le processus du test"""
+
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+@pytest.fixture
+def inline_exports(monkeypatch, tmp_path):
+    executor = InlineExecutor()
+    monkeypatch.setattr(export_job_service, "get_executor", lambda: executor)
+    monkeypatch.setattr(database, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "EXPORT_DIR", str(tmp_path))
+    return executor
+
+
+def test_export_job_reused_until_data_version_changes(db, inline_exports):
+    _seed(db, 2)
+    job_data = ExportJobCreate(format="excel")
+
+    job, cached = export_job_service.create_job(db, job_data)
+    db.expire_all()
+    assert not cached and job.status == "completed"
+
+    again, cached = export_job_service.create_job(db, job_data)
+    assert cached and again.id == job.id and inline_exports.submitted == 1
+
+    _seed(db, 1, start=2)
+    fresh, cached = export_job_service.create_job(db, job_data)
+    assert not cached and fresh.id != job.id and inline_exports.submitted == 2
+
+
+def test_run_export_job_failure_marks_job_failed(db, inline_exports, monkeypatch, tmp_path):
+    def broken(*args, **kwargs):
+        raise RuntimeError("classeur illisible")
+        yield b""
+    monkeypatch.setattr(export_service, "export_excel_stream", broken)
+
+    job, _ = export_job_service.create_job(db, ExportJobCreate(format="excel"))
+    db.expire_all()
+    assert job.status == "failed" and "classeur illisible" in job.error
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_run_export_job_skips_missing_job(inline_exports, tmp_path):
+    assert export_job_service.run_export_job(str(uuid.uuid4()), "excel", {}, str(tmp_path / "x.xlsx")) is None
+
+
+class BrokenExecutor:
+    """Pool dont un processus a été tué"""
+
+    def submit(self, fn, *args):
+        raise BrokenProcessPool("A child process terminated abruptly")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_broken_pool_is_replaced_once(db, inline_exports, monkeypatch):
+    _seed(db, 1)
+    pools = [BrokenExecutor(), inline_exports]
+    monkeypatch.setattr(export_job_service, "get_executor", lambda: pools[0])
+    monkeypatch.setattr(export_job_service, "_discard_executor", lambda broken: pools.remove(broken))
+
+    job, _ = export_job_service.create_job(db, ExportJobCreate(format="excel"))
+    db.expire_all()
+    assert job.status == "completed" and inline_exports.submitted == 1
+
+
+def test_unavailable_pool_does_not_leave_pending_job(db, inline_exports, monkeypatch):
+    _seed(db, 1)
+    monkeypatch.setattr(export_job_service, "get_executor", lambda: BrokenExecutor())
+    job_data = ExportJobCreate(format="excel")
+
+    job, cached = export_job_service.create_job(db, job_data)
+    assert not cached and job.status == "failed"
+
+    # Une demande identique relance un export au lieu de suivre la tâche échouée
+    monkeypatch.setattr(export_job_service, "get_executor", lambda: inline_exports)
+    again, _ = export_job_service.create_job(db, job_data)
+    db.expire_all()
+    assert again.id != job.id and again.status == "completed"
+
+
+def test_cleanup_fails_stale_jobs_and_removes_expired_files(db, tmp_path):
+    now = datetime.utcnow()
+    old_file = tmp_path / "old.xlsx"
+    old_file.write_bytes(b"x")
+    old = ExportJob(format="excel", cache_key="a", status="completed", file_path=str(old_file),
+                    created_at=now - timedelta(hours=settings.EXPORT_RETENTION_HOURS + 1))
+    stale = ExportJob(format="excel", cache_key="b", status="running",
+                      created_at=now - timedelta(minutes=export_job_service.STALE_JOB_MINUTES + 1))
+    recent = ExportJob(format="excel", cache_key="c", status="completed", created_at=now)
+    db.add_all([old, stale, recent])
+    db.commit()
+
+    assert export_job_service.cleanup_jobs(db, now) == 1
+    assert not old_file.exists()
+    assert db.get(ExportJob, old.id) is None
+    assert db.get(ExportJob, stale.id).status == "failed"
+    assert db.get(ExportJob, recent.id) is not None
+
+
+def test_export_job_endpoints(client, auth_headers, db, inline_exports):
+    _seed(db, 1)
+    response = client.post("/api/v1/exports/jobs", json={"format": "excel"}, headers=auth_headers)
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+
+    db.expire_all()
+    status = client.get(f"/api/v1/exports/jobs/{job_id}", headers=auth_headers).json()
+    assert status["status"] == "completed"
+    assert status["download_url"] == f"/api/v1/exports/jobs/{job_id}/download"
+
+    download = client.get(status["download_url"], headers=auth_headers)
+    assert download.status_code == 200
+    assert download.content[:2] == b"PK"
+
+    assert client.get(f"/api/v1/exports/jobs/{uuid.uuid4()}", headers=auth_headers).status_code == 404
+
+
+def test_streamed_excel_export_applies_filters(client, auth_headers, db):
+    _seed(db, 2)
+    planter = db.query(Planter).filter(Planter.name == "Planteur 0").one()
+    for quality, load in (("Grade 2", "Zone B"), ("Grade 2", "Zone A")):
+        db.add(Delivery(
+            planter_id=planter.id, date=date(2025, 1, 12), quantity_loaded_kg=50, quantity_kg=45,
+            load_location=load, unload_location="Port", quality=quality
+        ))
+    db.commit()
+    rollup_service.rebuild_rollup(db)
+
+    response = client.get(
+        "/api/v1/exports/excel",
+        params={"stream": "true", "quality": "grade 2", "load": "zone b"},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    sheet = load_workbook(BytesIO(response.content), read_only=True)["Livraisons"]
+    header, *rows = list(sheet.iter_rows(values_only=True))
+    assert header[0] == "Planteur"
+    assert [(r[0], r[8], r[10], r[5]) for r in rows] == [("Planteur 0", "Zone B", "Grade 2", 45)]
@@ -0,0 +1,73 @@
+"""Tests de la recherche plein texte des messages"""
+import pytest
+from sqlalchemy import text
+from app.models import User, ChannelMember
+from app.schemas.messaging import ChannelCreate, MessageCreate
+from app.services import message_search_service
+from app.services.messaging_service import MessagingService
+
+SEARCH_SETUP = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'french_unaccent') THEN
+            CREATE TEXT SEARCH CONFIGURATION french_unaccent (COPY = french);
+            ALTER TEXT SEARCH CONFIGURATION french_unaccent
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+        END IF;
+    END $$;
+    """,
+]
+
+
+@pytest.fixture
+def search_db(db):
+    for statement in SEARCH_SETUP:
+        db.execute(text(statement))
+    db.commit()
+    return db
+
+
+def _seed(db):
+    me, other, outsider = [User(email=f"user{i}@test.com", password_hash="-", role="admin") for i in range(3)]
+    db.add_all([me, other, outsider])
+    db.commit()
+    channel = MessagingService.create_channel(db, ChannelCreate(name="zone-a", display_name="Zone A"), me.id)
+    private = MessagingService.create_channel(db, ChannelCreate(name="prive", display_name="Privé"), outsider.id)
+    db.add(ChannelMember(channel_id=channel.id, user_id=other.id))
+    db.commit()
+    for i in range(5):
+        MessagingService.send_message(
+            db, MessageCreate(content=f"Livraison n°{i} reçue à l'entrepôt de Soubré", channel_id=channel.id), other.id
+        )
+    MessagingService.send_message(db, MessageCreate(content="Réunion des planteurs demain", channel_id=channel.id), other.id)
+    MessagingService.send_message(db, MessageCreate(content="Livraison confidentielle", channel_id=private.id), outsider.id)
+    return me
+
+
+def test_fulltext_is_stemmed_accent_insensitive_and_paginated(search_db):
+    me = _seed(search_db)
+
+    first = message_search_service.search_messages(search_db, me.id, "livraisons entrepot", limit=3)
+    assert first.mode == "fulltext"
+    assert len(first.hits) == 3 and first.next_cursor
+    assert "<mark>" in first.hits[0].snippet
+
+    second = message_search_service.search_messages(search_db, me.id, "livraisons entrepot", limit=3, cursor=first.next_cursor)
+    assert len(second.hits) == 2 and second.next_cursor is None
+    seen = {h.message.id for h in first.hits} | {h.message.id for h in second.hits}
+    # Le canal privé dont l'utilisateur n'est pas membre est exclu
+    assert len(seen) == 5
+
+    assert message_search_service.count_matches(search_db, me.id, "livraisons entrepot", "fulltext") == 5
+
+
+def test_word_fragments_fall_back_to_substring(search_db):
+    me = _seed(search_db)
+
+    page = message_search_service.search_messages(search_db, me.id, "plant")
+    assert page.mode == "substring"
+    assert [h.message.content for h in page.hits] == ["Réunion des planteurs demain"]
+    assert "<mark>plant</mark>" in page.hits[0].snippet
@@ -0,0 +1,85 @@
+"""Tests des listes de canaux et conversations de la messagerie"""
+from datetime import timedelta
+from app.models import User, ChannelMember, Message, MessageReadWatermark
+from app.schemas.messaging import ChannelCreate, MessageCreate
+from app.services.messaging_service import MessagingService
+from app.utils import query_counter
+from app.utils.cache import TTLCache
+
+
+def _seed(db, conversations: int = 10):
+    me, *others = [User(email=f"user{i}@test.com", password_hash="-", role="admin") for i in range(conversations + 1)]
+    db.add_all([me, *others])
+    db.commit()
+    channel = MessagingService.create_channel(db, ChannelCreate(name="zone-a", display_name="Zone A"), me.id)
+    for other in others:
+        db.add(ChannelMember(channel_id=channel.id, user_id=other.id))
+    db.commit()
+    for other in others:
+        conv = MessagingService.get_or_create_conversation(db, me.id, other.id)
+        for n in range(2):
+            MessagingService.send_message(db, MessageCreate(content=f"Bonjour {n}", conversation_id=conv.id), other.id)
+    return me, others, channel
+
+
+def test_conversation_listing_uses_constant_queries(db):
+    query_counter.install(db.get_bind())
+    me, others, _ = _seed(db)
+
+    with query_counter.track_queries() as queries:
+        listing = MessagingService.get_conversation_listing(db, me.id)
+
+    assert len(listing) == 10
+    # Conversations, interlocuteurs, derniers messages, non-lus (canaux + conversations)
+    assert queries.count <= 5
+    assert all(c["unread_count"] == 2 and c["last_message"] == "Bonjour 1" for c in listing)
+    assert {c["other_user"]["email"] for c in listing} == {o.email for o in others}
+
+
+def test_unread_cache_is_invalidated_on_send_and_read(db):
+    me, others, channel = _seed(db, conversations=2)
+    assert MessagingService.get_unread_counts(db, me.id)["total"] == 4
+
+    message = MessagingService.send_message(
+        db, MessageCreate(content="Livraison reçue", channel_id=channel.id), others[0].id
+    )
+    assert MessagingService.get_unread_counts(db, me.id)["channels"] == {str(channel.id): 1}
+
+    MessagingService.mark_message_as_read(db, message.id, me.id)
+    counts = MessagingService.get_unread_counts(db, me.id)
+    assert counts["channels"] == {} and counts["total"] == 4
+
+    listing = MessagingService.get_channel_listing(db, me.id)
+    assert listing[0]["member_count"] == 3 and listing[0]["unread_count"] == 0
+
+
+def test_read_watermark_only_moves_forward(db):
+    me, others, _ = _seed(db, conversations=1)
+    conv = MessagingService.get_or_create_conversation(db, me.id, others[0].id)
+    first, second = sorted(
+        db.query(Message).filter(Message.conversation_id == conv.id).all(), key=lambda m: m.created_at
+    )
+
+    assert MessagingService.mark_read_up_to(db, me.id, conversation_id=conv.id, up_to=first.created_at) == first.created_at
+    assert MessagingService.get_unread_counts(db, me.id)["conversations"] == {str(conv.id): 1}
+
+    # Un filigrane plus ancien ne fait pas reculer la lecture
+    MessagingService.mark_read_up_to(db, me.id, conversation_id=conv.id, up_to=first.created_at - timedelta(days=1))
+    assert MessagingService.get_unread_counts(db, me.id)["total"] == 1
+
+    assert MessagingService.mark_read_up_to(db, me.id, conversation_id=conv.id) == second.created_at
+    assert MessagingService.get_unread_counts(db, me.id)["total"] == 0
+    assert db.query(MessageReadWatermark).count() == 1
+
+
+def test_ttl_cache_drops_value_computed_across_invalidation():
+    cache = TTLCache(ttl=60)
+
+    def stale():
+        # Écriture concurrente pendant le calcul
+        cache.invalidate(["u1"])
+        return 3
+
+    assert cache.get_or_compute("u1", stale) == 3
+    assert cache.get_or_compute("u1", lambda: 4) == 4
+    assert cache.get_or_compute("u1", lambda: 5) == 4
@@ -0,0 +1,34 @@
+"""Tests de la diffusion groupée des notifications"""
+from app.models import User, Notification
+from app.services import notification_service
+from app.utils import query_counter
+
+
+def _seed_users(db, count: int, role: str = "admin"):
+    users = [User(email=f"{role}{i}@test.com", password_hash="-", role=role) for i in range(count)]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def test_action_notification_fan_out_is_bulk(db):
+    query_counter.install(db.get_bind())
+    actor, *admins = _seed_users(db, 41)
+
+    with query_counter.track_queries() as queries:
+        created = notification_service.create_action_notification(
+            db, 'delivery', 'planteur', 'Planteur A', actor.id, actor.id, ['admin']
+        )
+
+    assert created == 40
+    # Acteur, destinataires, insertion groupée : indépendant du nombre de destinataires
+    assert queries.count <= 4
+    rows = db.query(Notification).all()
+    assert {n.user_id for n in rows} == {u.id for u in admins}
+    assert all(n.message.startswith(actor.email) and n.action_by == actor.id for n in rows)
+
+
+def test_alert_notification_without_recipients(db):
+    assert notification_service.create_alert_notification(
+        db, "Limite", "Limite atteinte", 'planteur', None, ['manager']
+    ) == 0
@@ -0,0 +1,60 @@
+"""Tests de la pagination par curseur"""
+import pytest
+from datetime import date, timedelta
+from fastapi import HTTPException
+from app.models import Planter, Delivery
+from app.services import delivery_service
+from app.utils.pagination import encode_cursor, decode_cursor
+
+
+def _seed_deliveries(db, count: int):
+    planter = Planter(name="Planteur curseur")
+    db.add(planter)
+    db.flush()
+    for i in range(count):
+        # Plusieurs livraisons par jour : le départage par id est nécessaire
+        db.add(Delivery(
+            planter_id=planter.id,
+            date=date(2025, 1, 1) + timedelta(days=i // 3),
+            quantity_loaded_kg=100 + i,
+            quantity_kg=90 + i,
+            load_location="Zone A",
+            unload_location="Port",
+            quality="Grade 1"
+        ))
+    db.commit()
+
+
+@pytest.mark.parametrize("sort", ["date", "quantity"])
+def test_keyset_pages_cover_all_rows_once(db, sort):
+    """Parcourir toutes les pages renvoie chaque livraison une seule fois, dans l'ordre"""
+    _seed_deliveries(db, 23)
+
+    seen, cursor = [], None
+    while True:
+        items, cursor, total = delivery_service.get_deliveries_keyset(db, size=5, sort=sort, cursor=cursor)
+        seen.extend(items)
+        if not cursor:
+            break
+
+    assert total is None
+    assert len(seen) == len({d.id for d in seen}) == 23
+    expected, _ = delivery_service.get_deliveries(db, size=100, sort=sort)
+    key = (lambda d: d.date) if sort == "date" else (lambda d: d.quantity_kg)
+    assert [key(d) for d in seen] == [key(d) for d in expected]
+
+
+def test_keyset_estimated_total(db):
+    _seed_deliveries(db, 10)
+    _, _, total = delivery_service.get_deliveries_keyset(db, size=5, with_total=True)
+    assert total >= 0
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor", [Delivery.date, Delivery.id])
+    assert exc.value.status_code == 400
+
+    cursor = encode_cursor([date(2025, 1, 1)])
+    with pytest.raises(HTTPException):
+        decode_cursor(cursor, [Delivery.date, Delivery.id])
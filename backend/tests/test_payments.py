@@ -0,0 +1,46 @@
+"""Tests des soldes planteurs"""
+from datetime import date
+from app.models import Planter, Delivery, Payment
+from app.services import payment_service, rollup_service
+
+
+def _seed(db):
+    planters = [Planter(name=f"Planteur {i}") for i in range(3)]
+    db.add_all(planters)
+    db.flush()
+    for i, planter in enumerate(planters[:2]):
+        for day in range(i + 1):
+            db.add(Delivery(
+                planter_id=planter.id,
+                date=date(2025, 1, 10 + day),
+                quantity_loaded_kg=110,
+                quantity_kg=100,
+                load_location="Zone A",
+                unload_location="Port",
+                quality="Grade 1"
+            ))
+    db.add(Payment(planter_id=planters[0].id, montant=5000, methode="cash", date_paiement=date(2025, 1, 20)))
+    db.add(Payment(planter_id=planters[0].id, montant=2500, methode="cash", date_paiement=date(2025, 2, 1)))
+    db.commit()
+    rollup_service.rebuild_rollup(db)
+    return planters
+
+
+def test_balances_aggregated_and_sorted(db):
+    planters = _seed(db)
+
+    balances = payment_service.get_balances(db)
+    assert [b.planter_name for b in balances] == ["Planteur 1", "Planteur 0", "Planteur 2"]
+
+    first = payment_service.get_planter_balance(db, planters[0].id)
+    assert first.total_livraisons_kg == 100
+    assert first.nombre_livraisons == 1
+    assert first.total_paiements == 7500
+    assert first.nombre_paiements == 2
+    assert first.dernier_paiement == date(2025, 2, 1)
+
+    empty = payment_service.get_planter_balance(db, planters[2].id)
+    assert empty.nombre_livraisons == 0 and empty.derniere_livraison is None
+
+    page = payment_service.get_balances(db, sort="total_paiements", skip=0, limit=1)
+    assert [b.planter_name for b in page] == ["Planteur 0"]
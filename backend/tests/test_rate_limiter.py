@@ -0,0 +1,74 @@
+"""Tests des backends du rate limiter"""
+import pytest
+from app.middleware.rate_limit_backends import InMemoryBackend, PostgresBackend
+
+CONFIG = {"requests": 5, "window": 60, "block_duration": 30}
+
+
+class FakeClock:
+    def __init__(self, now: float = 6000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_limit_blocks_client_on_all_endpoint_types():
+    clock = FakeClock()
+    backend = InMemoryBackend(clock=clock)
+
+    results = [backend.hit_sync("client", "read", CONFIG) for _ in range(6)]
+    assert [r.allowed for r in results] == [True] * 5 + [False]
+    assert results[4].remaining == 0
+
+    # Bloqué partout pendant block_duration
+    blocked = backend.hit_sync("client", "write", CONFIG)
+    assert blocked.blocked and blocked.retry_after == 30
+    assert backend.hit_sync("other", "read", CONFIG).allowed
+
+
+def test_sliding_window_weights_previous_window():
+    clock = FakeClock()
+    backend = InMemoryBackend(clock=clock)
+    for _ in range(4):
+        assert backend.hit_sync("client", "read", CONFIG).allowed
+
+    # Mi-fenêtre suivante : 4 * 0.5 = 2 requêtes encore comptées
+    clock.now += 90
+    allowed = [backend.hit_sync("client", "read", CONFIG).allowed for _ in range(4)]
+    assert allowed == [True, True, True, False]
+
+
+def test_counters_expire_after_two_windows():
+    clock = FakeClock()
+    backend = InMemoryBackend(clock=clock)
+    for _ in range(5):
+        backend.hit_sync("client", "read", CONFIG)
+
+    clock.now += 125
+    assert backend.hit_sync("client", "read", CONFIG).remaining == 4
+
+    clock.now += InMemoryBackend.STALE_AFTER + 1
+    backend._sweep(clock.now)
+    assert backend.counters == {}
+
+
+@pytest.fixture(params=["memory", "postgres"])
+def backend_and_clock(request):
+    clock = FakeClock()
+    if request.param == "memory":
+        return InMemoryBackend(clock=clock), clock
+    db = request.getfixturevalue("db")
+    return PostgresBackend(engine=db.get_bind(), clock=clock), clock
+
+
+def test_rejected_hits_do_not_count_toward_window(backend_and_clock):
+    """Même comportement pour les deux backends : seuls les accès autorisés comptent"""
+    backend, clock = backend_and_clock
+    results = [backend.hit_sync("client", "read", CONFIG) for _ in range(8)]
+    assert [r.allowed for r in results] == [True] * 5 + [False] * 3
+
+    # Blocage terminé, mi-fenêtre suivante : 5 * 0.5 = 2.5 requêtes comptées (et non 6 ou 8)
+    clock.now += 90
+    allowed = [backend.hit_sync("client", "read", CONFIG).allowed for _ in range(4)]
+    assert allowed == [True, True, True, False]
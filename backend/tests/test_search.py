@@ -0,0 +1,55 @@
+"""Tests de la recherche approchée (trigrammes)"""
+import pytest
+from sqlalchemy import text
+from app.models import Planter, ChefPlanteur, User
+from app.services import planter_service, search_service
+
+SEARCH_SETUP = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """,
+]
+
+
+@pytest.fixture
+def search_db(db):
+    for statement in SEARCH_SETUP:
+        db.execute(text(statement))
+    db.add_all([
+        Planter(name="Kouamé Yao", cooperative="Coopérative Agricole de Soubré"),
+        Planter(name="Kouassi Konan", cooperative="SCOOPS Kouamékro"),
+        Planter(name="Yao Kouamé Aké", cooperative="Coopérative Agricole de Soubré"),
+        Planter(name="Bamba Traoré"),
+    ])
+    db.add(ChefPlanteur(name="Séraphin Zadi", cooperative="Coopérative de Daloa", quantite_max_kg=1000))
+    db.commit()
+    return db
+
+
+def test_planters_are_accent_insensitive_and_ranked(search_db):
+    planters, _ = planter_service.get_planters(search_db, "KOUAME")
+    # Préfixe avant sous-chaîne
+    assert [p.name for p in planters][:2] == ["Kouamé Yao", "Yao Kouamé Aké"]
+
+    # Faute de frappe : correspondance approchée
+    planters, _ = planter_service.get_planters(search_db, "kouasi")
+    assert planters[0].name == "Kouassi Konan"
+
+
+def test_unified_search(search_db):
+    admin = User(email="admin@test.com", password_hash="-", role="admin")
+    search_db.add(admin)
+    search_db.commit()
+
+    results = search_service.search_all(search_db, "seraphin", admin)
+    assert [r.label for r in results["fournisseurs"]] == ["Séraphin Zadi"]
+    assert results["planters"] == []
+
+    coops = search_service.search_cooperatives(search_db, "cooperative agricole")
+    # Dédupliqué entre planteurs, en tête
+    assert coops[0].label == "Coopérative Agricole de Soubré"
+    assert [c.label for c in coops].count("Coopérative Agricole de Soubré") == 1
@@ -0,0 +1,234 @@
+"""Tests de la vérification de la blockchain de traçabilité"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+import os
+import threading
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models import Planter, Delivery, TraceabilityRecord, ChainCheckpoint, ChainHead
+from app.config import settings
+from app.services import block_encoding, export_job_service, qr_image_service, traceability_service
+from app.services.traceability_service import BlockchainService, QRCodeService, TraceabilityService
+from tests.conftest import SQLALCHEMY_DATABASE_URL
+
+WRITERS = 50
+
+
+@pytest.fixture
+def audit_pool():
+    yield
+    traceability_service.shutdown()
+
+
+def _append(db, count, version=block_encoding.CURRENT_HASH_VERSION):
+    planter = db.query(Planter).first() or Planter(name="Kouamé Yao")
+    last = db.query(TraceabilityRecord).order_by(TraceabilityRecord.block_number.desc()).first()
+    number, previous = (last.block_number, last.blockchain_hash) if last else (0, None)
+    for _ in range(count):
+        number += 1
+        delivery = Delivery(
+            planter=planter, date=date(2025, 1, 1), quantity_loaded_kg=100, quantity_kg=100,
+            load_location="Soubré", unload_location="San-Pédro", quality="grade 1"
+        )
+        created_at = datetime(2025, 1, 1, 8, 30) + timedelta(minutes=number, microseconds=number)
+        if version == block_encoding.HASH_VERSION_LEGACY:
+            # Hash v1 : non recalculable, seule l'unicité compte
+            block_hash = f"{number:064x}"
+        else:
+            block_hash = BlockchainService.calculate_hash({"n": number}, previous, number, created_at)
+        db.add(TraceabilityRecord(
+            delivery=delivery, qr_code=f"COCOA-{number}", blockchain_hash=block_hash,
+            previous_hash=previous, block_number=number, hash_version=version,
+            trace_data={"n": number}, created_at=created_at
+        ))
+        previous = block_hash
+    db.commit()
+
+
+def test_canonical_hash_ignores_key_order_and_formatting():
+    at = datetime(2025, 1, 1, 8, 30, 0, 123456)
+    a = BlockchainService.calculate_hash({"quantity_kg": 100.0, "quality": "grade 1"}, None, 1, at)
+    b = BlockchainService.calculate_hash({"quality": "grade 1", "quantity_kg": 100.0}, None, 1, at)
+    assert a == b
+    assert a != BlockchainService.calculate_hash({"quality": "grade 1", "quantity_kg": 100}, None, 1, at)
+    assert a != BlockchainService.calculate_hash({"quality": "grade 1", "quantity_kg": 100.0}, None, 1, at + timedelta(microseconds=1))
+
+
+def test_created_record_verifies_from_stored_columns(db):
+    planter = Planter(name="Kouamé Yao")
+    delivery = Delivery(
+        planter=planter, date=date(2025, 1, 1), quantity_loaded_kg=100, quantity_kg=100,
+        load_location="Soubré", unload_location="San-Pédro", quality="grade 1"
+    )
+    db.add(delivery)
+    db.commit()
+    record = TraceabilityService.create_traceability_record(db, delivery)
+    db.expire_all()
+
+    result = TraceabilityService.verify_traceability(db, record.qr_code)
+    assert result["is_valid"] and result["hash_version"] == block_encoding.CURRENT_HASH_VERSION
+
+
+def test_incremental_verification_only_reads_new_blocks(db):
+    _append(db, 5)
+    first = BlockchainService.verify_chain(db, batch_size=2)
+    assert first.is_valid and first.blocks_checked == 5
+    assert db.get(ChainCheckpoint, "traceability").block_number == 5
+
+    _append(db, 2)
+    second = BlockchainService.verify_chain(db)
+    assert second.is_valid and (second.from_block, second.to_block, second.blocks_checked) == (6, 7, 2)
+
+
+def test_full_audit_detects_tampering_before_checkpoint(db):
+    _append(db, 5)
+    BlockchainService.verify_chain(db)
+
+    record = db.query(TraceabilityRecord).filter(TraceabilityRecord.block_number == 3).one()
+    record.trace_data = {"n": 300}
+    db.commit()
+    # Déjà vérifié : invisible en incrémental
+    assert BlockchainService.verify_chain(db).is_valid
+
+    audit = BlockchainService.verify_chain(db, full=True)
+    assert not audit.is_valid and audit.first_invalid_block == 3 and audit.reason == "hash mismatch"
+    # Le point de contrôle revient au dernier bloc valide : l'incrémental voit l'altération
+    assert db.get(ChainCheckpoint, "traceability").block_number == 2
+    assert not BlockchainService.verify_chain(db).is_valid
+
+
+def test_parallel_full_audit_reports_first_invalid_block(db, audit_pool):
+    _append(db, 9)
+    assert BlockchainService.verify_chain(db, full=True, batch_size=2, parallel=True).is_valid
+
+    for number in (4, 8):
+        record = db.query(TraceabilityRecord).filter(TraceabilityRecord.block_number == number).one()
+        record.trace_data = {"n": -number}
+    db.commit()
+    audit = BlockchainService.verify_chain(db, full=True, batch_size=2, parallel=True)
+    assert not audit.is_valid and audit.first_invalid_block == 4 and audit.to_block == 3
+
+
+def test_reseal_rewrites_legacy_blocks_and_keeps_old_hash(db):
+    _append(db, 3, version=block_encoding.HASH_VERSION_LEGACY)
+    audit = BlockchainService.verify_chain(db, full=True)
+    assert not audit.is_valid and audit.first_invalid_block == 1 and "reseal" in audit.reason
+
+    assert BlockchainService.reseal_legacy_blocks(db) == 3
+    assert BlockchainService.reseal_legacy_blocks(db) == 0
+    assert BlockchainService.verify_chain(db, full=True).is_valid
+    record = db.query(TraceabilityRecord).filter(TraceabilityRecord.block_number == 2).one()
+    assert record.legacy_hash == f"{2:064x}" and record.qr_code == "COCOA-2"
+
+
+def test_concurrent_appends_keep_chain_linear(db):
+    # Pool dédié : une connexion par écrivain
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_size=WRITERS, max_overflow=0)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    planter = Planter(name="Kouamé Yao")
+    deliveries = [
+        Delivery(
+            planter=planter, date=date(2025, 1, 1), quantity_loaded_kg=100, quantity_kg=100 + i,
+            load_location="Soubré", unload_location="San-Pédro", quality="grade 1"
+        )
+        for i in range(WRITERS * 3)
+    ]
+    db.add_all(deliveries)
+    db.commit()
+    ids = [d.id for d in deliveries]
+    barrier = threading.Barrier(WRITERS)
+
+    def write(worker):
+        session = factory()
+        try:
+            mine = session.query(Delivery).filter(Delivery.id.in_(ids[worker::WRITERS])).all()
+            barrier.wait()
+            # Un bloc seul puis un lot de deux
+            TraceabilityService.create_traceability_record(session, mine[0])
+            TraceabilityService.create_traceability_records(session, mine[1:])
+        finally:
+            session.close()
+
+    try:
+        with ThreadPoolExecutor(max_workers=WRITERS) as pool:
+            list(pool.map(write, range(WRITERS)))
+    finally:
+        engine.dispose()
+
+    numbers = [n for (n,) in db.query(TraceabilityRecord.block_number).order_by(TraceabilityRecord.block_number)]
+    assert numbers == list(range(1, WRITERS * 3 + 1))
+    assert BlockchainService.verify_chain(db, full=True).is_valid
+    head = db.get(ChainHead, "traceability")
+    assert head.block_number == WRITERS * 3
+
+
+def test_qr_image_rendered_on_demand_with_etag(client, auth_headers, db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "QR_CACHE_DIR", str(tmp_path))
+    qr_image_service._memory.clear()
+    _append(db, 1)
+    record = db.query(TraceabilityRecord).one()
+    url = f"/api/v1/traceability/qr-code/{record.qr_code}/image"
+
+    response = client.get(url, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.content.startswith(b"\x89PNG")
+    assert list(tmp_path.rglob("*.png"))
+
+    cached = client.get(url, headers={**auth_headers, "If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+    svg = client.get(url, params={"format": "svg"}, headers=auth_headers)
+    assert svg.headers["content-type"].startswith("image/svg+xml") and b"<svg" in svg.content
+    assert svg.headers["etag"] != response.headers["etag"]
+
+
+def test_strip_stored_images(db):
+    _append(db, 3)
+    db.query(TraceabilityRecord).update({TraceabilityRecord.qr_code_image: "data:image/png;base64,AAAA"})
+    db.commit()
+    assert qr_image_service.strip_stored_images(db, batch_size=2) == 3
+    assert db.query(TraceabilityRecord).filter(TraceabilityRecord.qr_code_image.isnot(None)).count() == 0
+
+
+def test_label_sheet_pdf(client, auth_headers, db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "QR_CACHE_DIR", str(tmp_path))
+    _append(db, 5)
+    ids = [str(d) for (d,) in db.query(TraceabilityRecord.delivery_id)]
+    try:
+        response = client.post(
+            "/api/v1/traceability/labels", json={"delivery_ids": ids, "per_page": 4}, headers=auth_headers
+        )
+    finally:
+        export_job_service.shutdown()
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.content.startswith(b"%PDF")
+    # 5 étiquettes, 4 par page
+    assert b"/Count 2" in response.content
+
+    assert client.post("/api/v1/traceability/labels", json={}, headers=auth_headers).status_code == 400
+    assert client.post(
+        "/api/v1/traceability/labels", json={"delivery_ids": ids, "per_page": 5}, headers=auth_headers
+    ).status_code == 400
+
+
+def test_qr_disk_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "QR_CACHE_DIR", str(tmp_path))
+    qr_image_service._memory.clear()
+    payloads = [QRCodeService.payload(f"COCOA-{n}", n, f"{n:064x}") for n in range(3)]
+    for n, payload in enumerate(payloads):
+        qr_image_service.get_image(payload)
+        path = next(tmp_path.rglob(f"{qr_image_service.image_key(payload, 'png')}.png"))
+        os.utime(path, (1000 + n, 1000 + n))
+    sizes = sorted(p.stat().st_size for p in tmp_path.rglob("*.png"))
+
+    # Relire la plus ancienne la rend la plus récente
+    qr_image_service._memory.clear()
+    qr_image_service.cached_image(payloads[0], "png")
+
+    assert qr_image_service.prune_disk_cache(max_bytes=sum(sizes[-2:])) == 1
+    remaining = {p.stem for p in tmp_path.rglob("*.png")}
+    assert qr_image_service.image_key(payloads[1], "png") not in remaining
+    assert qr_image_service.image_key(payloads[0], "png") in remaining
@@ -0,0 +1,91 @@
+"""Tests du gestionnaire de connexions WebSocket"""
+import asyncio
+import json
+from app.routers.websocket import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+class SmallQueueManager(ConnectionManager):
+    SEND_QUEUE_SIZE = 5
+
+
+def test_disconnect_only_cleans_the_user_subscriptions():
+    async def scenario():
+        manager = ConnectionManager()
+        ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(ws_a, "a")
+        await manager.connect(ws_b, "b")
+        manager.subscribe_to_channel("a", "c1")
+        manager.subscribe_to_channel("b", "c1")
+        manager.subscribe_to_conversation("a", "d1")
+
+        manager.disconnect(ws_a, "a")
+        manager.disconnect(ws_a, "a")
+        return manager
+
+    manager = asyncio.run(scenario())
+    assert manager.channel_subscriptions == {"c1": {"b"}}
+    assert manager.conversation_subscriptions == {}
+    assert "a" not in manager.user_subscriptions
+
+
+def test_slow_consumer_is_evicted_without_stalling_the_channel():
+    async def scenario():
+        manager = SmallQueueManager()
+        fast, slow = FakeWebSocket(), FakeWebSocket(delay=60)
+        await manager.connect(fast, "fast")
+        await manager.connect(slow, "slow")
+        for user_id in ("fast", "slow"):
+            manager.subscribe_to_channel(user_id, "c1")
+
+        for i in range(20):
+            manager.handle_event({"scope": "channel", "target": "c1", "exclude": None, "message": {"n": i}})
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.01)
+        return manager, fast, slow
+
+    manager, fast, slow = asyncio.run(scenario())
+    assert len(fast.sent) == 20
+    assert slow.closed_with == ConnectionManager.SLOW_CONSUMER_CLOSE_CODE
+    assert "slow" not in manager.active_connections
+    assert manager.channel_subscriptions["c1"] == {"fast"}
+    assert manager.evicted == 1
+
+
+def test_status_only_reaches_users_sharing_a_topic():
+    async def scenario():
+        manager = ConnectionManager()
+        sockets = {uid: FakeWebSocket() for uid in ("peer", "stranger")}
+        for uid, ws in sockets.items():
+            await manager.connect(ws, uid)
+        manager.subscribe_to_conversation("peer", "d1")
+        manager.subscribe_to_channel("stranger", "c2")
+
+        manager.handle_event({
+            "scope": "status",
+            "target": {"channels": ["c1"], "conversations": ["d1"]},
+            "exclude": "me",
+            "message": {"type": "user_status"}
+        })
+        await asyncio.sleep(0.01)
+        return sockets
+
+    sockets = asyncio.run(scenario())
+    assert sockets["peer"].sent == [{"type": "user_status"}]
+    assert sockets["stranger"].sent == []
@@ -426,11 +426,23 @@ async function downloadQrCode(deliveryId) {
         
         const trace = await traceResponse.json();
         
+        // Image rendue à la demande par l'API
+        const imageResponse = await fetch(`${api.baseUrl}/traceability/qr-code/${trace.qr_code}/image`, {
+            headers: api.getHeaders()
+        });
+        
+        if (!imageResponse.ok) {
+            throw new Error('Image du QR code indisponible');
+        }
+        
+        const url = window.URL.createObjectURL(await imageResponse.blob());
+        
         // Créer un lien de téléchargement
         const link = document.createElement('a');
-        link.href = trace.qr_code_image;
+        link.href = url;
         link.download = `QR_${trace.qr_code}.png`;
         link.click();
+        window.URL.revokeObjectURL(url);
         
         showToast('✓ QR Code téléchargé', 'success');
     } catch (error) {